@@ -0,0 +1,116 @@
+"""
+Vectorized mortgage amortization.
+
+Balances come from the closed-form annuity formula evaluated at every month
+(or year-end) index at once, so a 360-month schedule for thousands of loans is
+a few array operations with no Python loop over months. All inputs broadcast
+against each other; the period axis is always last.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+
+class AmortizationSchedule(NamedTuple):
+    payment: np.ndarray      # (..., periods) mortgage paid in each period (0 once the loan is paid off)
+    interest: np.ndarray     # (..., periods) interest part of those payments
+    principal: np.ndarray    # (..., periods) principal part of those payments
+    balance: np.ndarray      # (..., periods) remaining balance at the end of each period
+
+
+def _annuity_terms(monthly_rate, n_payments):
+    """
+    Growth and annuity factors of numpy_financial.pmt, on the (rate, term) shape only.
+
+    Computing these once per distinct rate / term (instead of once per deal or
+    grid point) is what lets sensitivity grids share them across every price,
+    rent and vacancy combination.
+    """
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        growth = (1 + monthly_rate) ** n_payments
+        zero_rate = monthly_rate == 0
+        masked_rate = np.where(zero_rate, 1, monthly_rate)
+        factor = np.where(zero_rate, n_payments, (growth - 1) / masked_rate)
+    return growth, factor
+
+
+def _monthly_payment(loan_amount, monthly_rate, n_payments):
+    """Vectorized version of the scalar payment rules (always positive dollars)."""
+    growth, factor = _annuity_terms(monthly_rate, n_payments)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Same operation order as npf.pmt, so results match the scalar engine bit for bit
+        amortized = np.abs(loan_amount * growth / factor)
+        straight = loan_amount / n_payments
+    payment = np.where(monthly_rate > 0, amortized, straight)
+    return np.where(n_payments <= 0, 0.0, payment)
+
+
+def _balance_after(loan_amount, monthly_rate, n_payments, monthly_payment, months):
+    """Remaining balance after `months` payments; `months` runs along a new trailing axis."""
+    loan = np.asarray(loan_amount, dtype=float)[..., None]
+    rate = np.asarray(monthly_rate, dtype=float)[..., None]
+    n = np.asarray(n_payments)[..., None]
+    payment = np.asarray(monthly_payment, dtype=float)[..., None]
+
+    paid = np.minimum(months, n)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        growth = (1 + rate) ** paid
+        masked_rate = np.where(rate > 0, rate, 1)
+        amortized = loan * growth - payment * (growth - 1) / masked_rate
+    straight = loan - payment * paid
+    balance = np.where(rate > 0, amortized, straight)
+    # Exactly zero once the term is over (the closed form leaves ~1e-9 residue)
+    return np.where((paid >= n) & (n > 0), 0.0, balance)
+
+
+def _schedule(loan_amount, monthly_rate, n_payments, monthly_payment, n_periods, months_per_period, first_period=0):
+    ends = months_per_period * np.arange(first_period, n_periods + 1)
+    balances = _balance_after(loan_amount, monthly_rate, n_payments, monthly_payment, ends)
+
+    n = np.asarray(n_payments)[..., None]
+    months_paid = np.clip(n - ends[:-1], 0, months_per_period)
+    payment = np.asarray(monthly_payment, dtype=float)[..., None] * months_paid
+    principal = balances[..., :-1] - balances[..., 1:]
+    return AmortizationSchedule(
+        payment=payment,
+        interest=payment - principal,
+        principal=principal,
+        balance=balances[..., 1:],
+    )
+
+
+def yearly_schedule(loan_amount, monthly_rate, n_payments, monthly_payment, n_years, first_year=0):
+    """
+    Per-year amortization over `n_years`, from engine-style inputs (monthly rate, payment count).
+
+    With `first_year` only years first_year+1 .. n_years are returned; every
+    year is closed form, so the values match the same years of a full schedule.
+    """
+    return _schedule(loan_amount, monthly_rate, n_payments, monthly_payment, int(n_years), 12, int(first_year))
+
+
+def monthly_schedule(loan_amount, monthly_rate, n_payments, monthly_payment, n_months):
+    """Per-month amortization over `n_months`, from engine-style inputs."""
+    return _schedule(loan_amount, monthly_rate, n_payments, monthly_payment, int(n_months), 1)
+
+
+def amortization_schedule(loan_amount, mortgage_rate, mortgage_term, periods=None, frequency="yearly"):
+    """
+    Amortization schedule from UI-style inputs (annual rate in %, term in years).
+
+    `periods` defaults to the full term; `frequency` is "yearly" or "monthly".
+    Returns an AmortizationSchedule whose arrays carry the broadcast input
+    shape plus a trailing period axis.
+    """
+    loan_amount = np.asarray(loan_amount, dtype=float)
+    monthly_rate = (np.asarray(mortgage_rate, dtype=float) / 100.0) / 12.0
+    n_payments = np.trunc(np.asarray(mortgage_term, dtype=float) * 12).astype(int)
+    monthly_payment = _monthly_payment(loan_amount, monthly_rate, n_payments)
+
+    if frequency == "yearly":
+        n_periods = periods if periods is not None else int(np.ceil(np.max(n_payments, initial=0) / 12))
+        return yearly_schedule(loan_amount, monthly_rate, n_payments, monthly_payment, n_periods)
+    if frequency == "monthly":
+        n_periods = periods if periods is not None else int(np.max(n_payments, initial=0))
+        return monthly_schedule(loan_amount, monthly_rate, n_payments, monthly_payment, n_periods)
+    raise ValueError(f"Unknown frequency: {frequency}")
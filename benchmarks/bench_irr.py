@@ -0,0 +1,92 @@
+"""
+IRR solver benchmark: per-deal npf.irr + Newton fallback vs irr_engine.irr_batch.
+
+    python benchmarks/bench_irr.py --deals 5000
+
+Builds operational and total cash-flow vectors for random deals with
+calculate_metrics_batch, then times both solvers on the same rows and reports
+agreement on the rows where the legacy path produced a real answer.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+import warnings
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import numpy_financial as npf
+
+from calc_engine import robust_irr
+from irr_engine import CONVERGED, irr_batch
+
+
+def random_cash_flows(n_deals, seed=0):
+    """Operational + total cash-flow rows (period 0 first) for random 1-30 year deals."""
+    rng = np.random.default_rng(seed)
+    price = rng.uniform(80_000, 900_000, n_deals)
+    down = price * rng.choice([0.05, 0.1, 0.2, 0.25], n_deals)
+    rent = price * rng.uniform(0.005, 0.011, n_deals)
+    horizon = rng.integers(1, 31, n_deals)
+    growth = 1 + rng.uniform(0.0, 0.05, n_deals)
+    years = np.arange(1, horizon.max() + 1)
+    cash = (rent * 12 * 0.95)[:, None] * growth[:, None] ** (years - 1) - (price * 0.075)[:, None]
+    cash = np.where(years <= horizon[:, None], np.round(cash, 2), 0.0)
+    total = cash + np.where(years == horizon[:, None], (price * 1.03 ** horizon)[:, None], 0.0)
+    rows = np.vstack([np.hstack([-down[:, None], cash]), np.hstack([-down[:, None], total])])
+    lengths = np.concatenate([horizon, horizon]) + 1
+    return rows, lengths
+
+
+def legacy_irr(rows, lengths):
+    """The previous calc_engine path: npf.irr per row, robust_irr (scipy Newton) on failure."""
+    out = np.empty(len(rows))
+    with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for i, (row, n) in enumerate(zip(rows, lengths)):
+            flows = row[:n].tolist()
+            try:
+                val = npf.irr(flows)
+                if val is None or np.isnan(val):
+                    raise ValueError("npf.irr failed")
+                out[i] = round(val * 100.0, 2)
+            except Exception:
+                out[i] = robust_irr(flows)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--deals", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rows, lengths = random_cash_flows(args.deals, args.seed)
+
+    start = time.perf_counter()
+    legacy = legacy_irr(rows, lengths)
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = irr_batch(rows)
+    batch_s = time.perf_counter() - start
+    batched = np.round(result.rate * 100.0, 2)
+
+    solved = result.status == CONVERGED
+    comparable = solved & (legacy != 0)
+    max_diff = np.abs(batched[comparable] - legacy[comparable]).max(initial=0.0)
+
+    print(f"IRR solves:          {len(rows):,} ({args.deals:,} deals x operational + total)")
+    print(f"legacy npf + newton: {legacy_s:8.3f} s  ({len(rows) / legacy_s:,.0f} solves/s)")
+    print(f"irr_batch:           {batch_s:8.3f} s  ({len(rows) / batch_s:,.0f} solves/s)")
+    print(f"speed-up:            {legacy_s / batch_s:8.1f}x")
+    print(f"converged:           {solved.sum():,} / {len(rows):,}")
+    print(f"legacy silent 0s:    {(legacy == 0).sum():,}")
+    print(f"max |diff| (pct pt): {max_diff:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Chart memory per session: pyplot figures vs. chart_engine.
+
+    python benchmarks/chart_memory.py                 # table
+    python benchmarks/chart_memory.py --reruns 200 --json out.json
+
+Replays one user session (a slider dragged through `--reruns` different
+deals) that draws the pages' cash-flow, equity and 6-curve A vs B charts on
+every rerun, three ways:
+
+- pyplot, never closed: plt.subplots() + savefig per chart and no close,
+  so every figure stays in pyplot's global registry
+- pyplot, closed: the same with plt.close(fig) after each chart
+- chart_engine: bare Figures cleared after saving, content-keyed cache
+  (the disk cache is switched off so every new deal really renders)
+
+Each mode runs in a fresh process. Memory is resident set size (from
+/proc/self/statm, so Linux only) measured after one warm-up rerun, so
+matplotlib's import and font cache aren't counted, and again at the end;
+"open figures" is len(plt.get_fignums()). A second pass revisits deals the
+session already saw, which is what most reruns do (widget changes that
+don't touch the deal).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+MODES = ("pyplot_leak", "pyplot_close", "chart_engine")
+
+_PROBE = """
+import json, os, time
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from calc_engine import calculate_metrics
+from chart_engine import cash_flow_chart, dual_cash_flow_chart, equity_chart
+
+MODE, RERUNS = {mode!r}, {reruns}
+PAGE = os.sysconf("SC_PAGE_SIZE")
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * PAGE / 2**20
+
+def pyplot_png(draw):
+    fig = plt.figure()
+    draw(fig)
+    buffer = __import__("io").BytesIO()
+    fig.savefig(buffer, format="png", dpi=200, bbox_inches="tight")
+    if MODE == "pyplot_close":
+        plt.close(fig)
+    return buffer.getvalue()
+
+def rerun(price):
+    a = calculate_metrics(price, 2000, 20, 6.5, 30, 300, 5, 3, 3, 10)
+    b = calculate_metrics(price + 50000, 2300, 20, 6.5, 30, 300, 5, 3, 3, 7)
+    series_a = (a.cash_flows, a.rents_by_year, a.roi_by_year)
+    series_b = (b.cash_flows, b.rents_by_year, b.roi_by_year)
+    if MODE == "chart_engine":
+        cash_flow_chart(*series_a)
+        equity_chart(a.equity_by_year, a.loan_balance_by_year)
+        dual_cash_flow_chart(series_a, series_b)
+    else:
+        from chart_engine import _draw_cash_flow, _draw_dual_cash_flow, _draw_equity
+        pyplot_png(lambda fig: _draw_cash_flow(fig, *series_a))
+        pyplot_png(lambda fig: _draw_equity(fig, a.equity_by_year, a.loan_balance_by_year))
+        pyplot_png(lambda fig: _draw_dual_cash_flow(fig, *series_a, *series_b))
+
+prices = [200000 + 1000 * i for i in range(RERUNS)]
+rerun(150000)  # warm-up: imports, font cache
+start_mb = rss_mb()
+start = time.perf_counter()
+for price in prices:
+    rerun(price)
+new_s = (time.perf_counter() - start) / RERUNS
+new_mb = rss_mb()
+start = time.perf_counter()
+for price in prices:
+    rerun(price)
+repeat_s = (time.perf_counter() - start) / RERUNS
+print(json.dumps({{"start_mb": start_mb, "after_new_mb": new_mb, "end_mb": rss_mb(), "open_figures": len(plt.get_fignums()),
+                  "new_ms": new_s * 1e3, "repeat_ms": repeat_s * 1e3}}))
+"""
+
+
+def run_mode(mode, reruns):
+    env = dict(os.environ, PYTHONPATH=ROOT, DEAL_ANALYZER_DISK_CACHE="off")
+    out = subprocess.run([sys.executable, "-c", _PROBE.format(mode=mode, reruns=reruns)], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reruns", type=int, default=100, help="distinct deals per session")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = {mode: run_mode(mode, args.reruns) for mode in MODES}
+    print(f"session of {args.reruns} reruns x 3 charts")
+    print(f"{'mode':<14} {'RSS growth':>11} {'open figs':>10} {'new deal':>10} {'seen deal':>10}")
+    for mode, row in results.items():
+        print(f"{mode:<14} {row['end_mb'] - row['start_mb']:8.1f} MB {row['open_figures']:>10} "
+              f"{row['new_ms']:7.1f} ms {row['repeat_ms']:7.1f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Cold-start profile: how long each entry point takes from a fresh interpreter.
+
+    python benchmarks/import_profile.py            # table
+    python benchmarks/import_profile.py --json out.json --runs 5
+
+Every measurement runs in a new subprocess so nothing is already imported.
+Engine modules are timed as a bare `import`, with the slowest imports taken
+from `python -X importtime`. Streamlit scripts (main.py and each page) are
+run once through streamlit.testing's AppTest, logged in, which is what a
+fresh container does on its first request; the time to import streamlit
+itself is reported separately since no change here can affect it. The last
+column lists which heavy optional libraries the entry point pulled in.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+HEAVY_MODULES = ("scipy", "matplotlib", "reportlab", "numpy_financial", "pandas", "pyarrow")
+
+MODULE_TARGETS = ("calc_engine", "irr_engine", "simulation_engine", "bulk_screen")
+SCRIPT_TARGETS = (
+    "main.py",
+    "pages/1_Main_Single_Property.py",
+    "pages/2_Main_Dual_Property.py",
+    "pages/3_Sensitivity_Analysis.py",
+)
+
+_MODULE_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+_SCRIPT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+streamlit_s = time.perf_counter() - start
+app = AppTest.from_file({path!r}, default_timeout=300)
+app.session_state["authenticated"] = True
+start = time.perf_counter()
+app.run()
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "streamlit_s": streamlit_s, "exceptions": len(app.exception),
+                  "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def _run_probe(code):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(module, top=5):
+    """(module, cumulative ms) for the slowest imports under `module`, from -X importtime."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT,
+                         env=dict(os.environ, PYTHONPATH=ROOT), capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        depth = len(name) - len(name.lstrip())
+        if depth == 3:  # direct imports of the target only
+            rows.append((name.strip(), int(cumulative) / 1000.0))
+    return sorted(rows, key=lambda row: -row[1])[:top]
+
+
+def profile(runs=3):
+    results = {}
+    for module in MODULE_TARGETS:
+        samples = [_run_probe(_MODULE_PROBE.format(module=module, heavy=HEAVY_MODULES)) for _ in range(runs)]
+        results[f"import {module}"] = {
+            "seconds": statistics.median(s["seconds"] for s in samples),
+            "heavy": samples[-1]["heavy"],
+            "slowest_imports": slowest_imports(module),
+        }
+    for script in SCRIPT_TARGETS:
+        samples = [_run_probe(_SCRIPT_PROBE.format(path=os.path.join(ROOT, script), heavy=HEAVY_MODULES))
+                   for _ in range(runs)]
+        results[script] = {
+            "seconds": statistics.median(s["seconds"] for s in samples),
+            "streamlit_s": statistics.median(s["streamlit_s"] for s in samples),
+            "exceptions": samples[-1]["exceptions"],
+            "heavy": samples[-1]["heavy"],
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="fresh processes per target (median is reported)")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = profile(args.runs)
+    print(f"{'entry point':<36} {'cold start':>11}  heavy modules loaded")
+    for name, row in results.items():
+        print(f"{name:<36} {row['seconds'] * 1e3:8.0f} ms  {', '.join(row['heavy']) or '-'}")
+        for module, ms in row.get("slowest_imports", []):
+            print(f"{'':<6}{module:<30} {ms:8.1f} ms")
+    streamlit_s = [row["streamlit_s"] for row in results.values() if "streamlit_s" in row]
+    if streamlit_s:
+        print(f"\n(streamlit itself: ~{statistics.median(streamlit_s) * 1e3:.0f} ms per process, not included above)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+Benchmark suite for the engine, the verdicts and PDF generation.
+
+    python benchmarks/run_benchmarks.py                 # run, compare with baseline.json
+    python benchmarks/run_benchmarks.py --save          # run and (re)write baseline.json
+    python benchmarks/run_benchmarks.py --quick -k pdf  # fewer repeats, only cases matching "pdf"
+
+Each case is timed over repeated calls (at least --min-time seconds or
+--max-repeats calls); median and best per-call times are reported and written
+as JSON. When a baseline exists, any case whose best time is more than
+--threshold slower than the baseline's fails the run (exit code 1), so this
+can gate a change in CI. Best-of-N is compared rather than the median since
+it is far less sensitive to background noise on sub-millisecond cases, and
+cases that look slower are re-timed (--retries) before being reported.
+--save re-times every case the same way and keeps its quietest pass.
+Everything runs offline: no Streamlit, no network, no display (matplotlib is
+never imported).
+
+Baselines are machine specific; regenerate with --save on the box you compare on.
+"""
+import argparse
+import json
+import os
+import pickle
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from calc_engine import calculate_metrics, calculate_metrics_batch
+from comparison_engine import compare_properties
+from disk_cache import DiskCache
+from irr_engine import irr_batch
+from portfolio_engine import Portfolio, portfolio_summary
+from projection_engine import Projection, exit_year_analysis
+from ranking_engine import top_k
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+BASE_DEAL = dict(
+    purchase_price=300000, monthly_rent=2000, down_payment_pct=20, mortgage_rate=6.5, mortgage_term=30,
+    monthly_expenses=300, vacancy_rate=5, appreciation_rate=3, rent_growth_rate=3, time_horizon=10,
+)
+PROPERTY_DATA = dict(BASE_DEAL, street_address="123 Main St", zip_code="94110")
+
+
+def random_deals(n, seed=0):
+    """Reproducible random deal inputs as a dict of columns."""
+    rng = np.random.default_rng(seed)
+    return dict(
+        purchase_price=rng.uniform(80_000, 900_000, n),
+        monthly_rent=rng.uniform(800, 6000, n),
+        down_payment_pct=rng.choice([5.0, 10.0, 20.0, 25.0], n),
+        mortgage_rate=rng.uniform(3, 9, n),
+        mortgage_term=rng.choice([15, 30], n),
+        monthly_expenses=rng.uniform(100, 900, n),
+        vacancy_rate=rng.uniform(0, 10, n),
+        appreciation_rate=rng.uniform(0, 6, n),
+        rent_growth_rate=rng.uniform(0, 5, n),
+        time_horizon=rng.integers(1, 31, n),
+    )
+
+
+def build_cases(quick=False):
+    """name -> (zero-arg callable, items processed per call)."""
+    from pdf_dual import generate_ai_verdict as dual_verdict
+    from pdf_dual import generate_comparison_pdf_table_style
+    from pdf_dual import generate_pdf as dual_pdf
+    from pdf_single import generate_ai_verdict as single_verdict
+    from pdf_single import generate_pdf as single_pdf
+
+    cases = {}
+
+    # ---- Scalar engine, every horizon
+    for horizon in range(1, 31):
+        deal = dict(BASE_DEAL, time_horizon=horizon)
+        cases[f"scalar_engine/h{horizon:02d}"] = (lambda deal=deal: calculate_metrics(**deal), 1)
+
+    # ---- Horizon slider dragged 1 -> 30 years: full recompute per step vs. one incremental Projection
+    inputs = {name: value for name, value in BASE_DEAL.items() if name != "time_horizon"}
+    cases["drag_30/scalar_engine"] = (lambda: [calculate_metrics(**inputs, time_horizon=h) for h in range(1, 31)], 30)
+
+    def drag_projection():
+        projection = Projection(**inputs)
+        return [projection.metrics(h) for h in range(1, 31)]
+    cases["drag_30/projection"] = (drag_projection, 30)
+    cases["exit_years/30"] = (lambda: exit_year_analysis(**inputs, max_years=30), 30)
+
+    # ---- Batch throughput
+    for n in (1_000, 10_000) if quick else (1_000, 10_000, 100_000):
+        deals = random_deals(n)
+        cases[f"batch_engine/{n // 1000}k"] = (lambda deals=deals: calculate_metrics_batch(deals), n)
+
+    # ---- Same 10k deals with a capex plan: one roof (no uplift) + one remodel (rent uplift) per deal
+    capex_deals = random_deals(10_000)
+    rng = np.random.default_rng(6)
+    capex = dict(
+        deal=np.repeat(np.arange(10_000), 2),
+        year=np.column_stack([rng.integers(1, 11, 10_000), rng.integers(1, 11, 10_000)]).ravel(),
+        amount=rng.uniform(5_000, 40_000, 20_000),
+        rent_uplift=np.column_stack([np.zeros(10_000), rng.uniform(50, 300, 10_000)]).ravel(),
+    )
+    cases["batch_engine/10k_capex"] = (lambda: calculate_metrics_batch(capex_deals, capex=capex), 10_000)
+    cases["batch_engine/10k_tax"] = (lambda: calculate_metrics_batch(capex_deals, tax=True), 10_000)
+
+    # ---- Per-year paths: rent growth, vacancy and appreciation by year, plus expense growth
+    path_deals = random_deals(10_000, seed=7)
+    rng = np.random.default_rng(7)
+    path_deals["rent_growth_rate"] = rng.normal(3.0, 1.5, (10_000, 30))
+    path_deals["vacancy_rate"] = rng.uniform(2.0, 10.0, (10_000, 30))
+    path_deals["appreciation_rate"] = rng.normal(3.0, 2.5, (10_000, 30))
+    expense_growth = rng.uniform(1.0, 4.0, (10_000, 30))
+    cases["batch_engine/10k_paths"] = (
+        lambda: calculate_metrics_batch(path_deals, expense_growth_rate=expense_growth), 10_000)
+
+    # ---- Top-50 by total IRR with bound pruning (compare batch_engine/100k for the full pass)
+    ranked = random_deals(100_000, seed=2)
+    cases["rank/top50_100k"] = (lambda: top_k(ranked, 50), 100_000)
+
+    # ---- N-property comparison + Pareto frontier: one batch call, flat in N
+    for n in (2, 20):
+        properties = random_deals(n, seed=3)
+        cases[f"compare/{n}"] = (lambda properties=properties: compare_properties(properties), n)
+
+    # ---- Portfolio on a common calendar: 500 from scratch vs. one more property added to it
+    holdings = random_deals(500, seed=4)
+    holdings["purchase_year"] = np.random.default_rng(4).integers(2000, 2025, 500)
+    newcomer = {name: values[:1] for name, values in random_deals(1, seed=5).items()}
+    newcomer["purchase_year"] = [2024]
+    cases["portfolio/500"] = (lambda: portfolio_summary(holdings), 500)
+    portfolio = Portfolio(holdings)
+
+    def add_one():
+        portfolio.add(newcomer)
+        return portfolio.summary()
+    cases["portfolio/add_1"] = (add_one, 1)
+
+    # ---- IRR: one 11-period row, and 10k rows batched
+    deals = calculate_metrics_batch(random_deals(5_000, seed=1))
+    flows = np.nan_to_num(deals["Multi-Year Cash Flow"])
+    rows = np.hstack([np.full((len(flows), 1), -60_000.0), flows])
+    rows = np.vstack([rows, rows])
+    single_row = [-60_000.0] + [5_000.0] * 9 + [400_000.0]
+    cases["irr/single"] = (lambda: irr_batch([single_row]), 1)
+    cases["irr/batch_10k"] = (lambda: irr_batch(rows), len(rows))
+
+    # ---- Persistent cache hits (temporary file, so the app's own cache is untouched)
+    disk = DiskCache(os.path.join(tempfile.mkdtemp(), "bench.sqlite"))
+    stored_metrics = calculate_metrics(**BASE_DEAL)
+    disk.put("metrics", "base", pickle.dumps(stored_metrics))
+    disk.put("pdf", "base", single_pdf(PROPERTY_DATA, stored_metrics, "").getvalue())
+    cases["disk_cache/metrics_hit"] = (lambda: pickle.loads(disk.get("metrics", "base")), 1)
+    cases["disk_cache/pdf_hit"] = (lambda: disk.get("pdf", "base"), 1)
+
+    # ---- Verdicts and PDFs (fresh metrics each call: the verdicts mutate "Grade")
+    metrics_a = calculate_metrics(**BASE_DEAL)
+    metrics_b = calculate_metrics(**dict(BASE_DEAL, purchase_price=350000, monthly_rent=2300))
+    summary, _ = single_verdict(metrics_a.copy())
+    cases["verdict/single"] = (lambda: single_verdict(metrics_a.copy()), 1)
+    cases["verdict/dual"] = (lambda: dual_verdict(metrics_a.copy(), metrics_b.copy()), 1)
+    cases["pdf/single"] = (lambda: single_pdf(PROPERTY_DATA, metrics_a.copy(), summary), 1)
+    cases["pdf/dual"] = (lambda: dual_pdf(PROPERTY_DATA, PROPERTY_DATA, metrics_a.copy(), metrics_b.copy(), summary), 1)
+    cases["pdf/table_style"] = (
+        lambda: generate_comparison_pdf_table_style(metrics_a, metrics_b, "123 Main St", "94110", "9 Oak Ave", "94110"),
+        1,
+    )
+    return cases
+
+
+def time_case(fn, min_time, max_repeats):
+    """Median and min seconds per call (after one warm-up call)."""
+    fn()
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < max_repeats and (len(samples) < 3 or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), min(samples), len(samples)
+
+
+def machine_info():
+    import numpy
+    import reportlab
+    import scipy
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "scipy": scipy.__version__,
+        "reportlab": reportlab.Version,
+    }
+
+
+def compare(results, baseline, threshold, min_delta=0.0):
+    """
+    Rows of (name, baseline s, current s, ratio, regressed) for cases in both runs.
+
+    A case regresses when it is more than `threshold` slower *and* at least
+    `min_delta` seconds slower, so microsecond-level jitter never fails a run.
+    """
+    rows = []
+    for name, current in results.items():
+        if name not in baseline:
+            continue
+        base = baseline[name]["min_s"]
+        ratio = current["min_s"] / base if base else float("inf")
+        regressed = ratio > 1 + threshold and current["min_s"] - base > min_delta
+        rows.append((name, base, current["min_s"], ratio, regressed))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", "--filter", default="", help="only run cases whose name contains this text")
+    parser.add_argument("--quick", action="store_true", help="skip the 100k batch and shorten timing")
+    parser.add_argument("--min-time", type=float, default=None, help="seconds to spend timing each case (default 0.5, quick 0.1)")
+    parser.add_argument("--max-repeats", type=int, default=200)
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON to compare against / save to")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--output", help="also write this run's results to this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown vs baseline (default 0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="ignore slowdowns smaller than this (default 0.05 ms)")
+    parser.add_argument("--retries", type=int, default=2, help="re-time apparently regressed cases (or, with --save, every case) this many times")
+    args = parser.parse_args(argv)
+    min_time = args.min_time if args.min_time is not None else (0.1 if args.quick else 0.5)
+
+    cases = build_cases(args.quick)
+    cases = {name: case for name, case in cases.items() if args.filter in name}
+
+    results = {}
+    for name, (fn, items) in cases.items():
+        median, best, repeats = time_case(fn, min_time, args.max_repeats)
+        results[name] = {"median_s": median, "min_s": best, "repeats": repeats, "items_per_s": items / median}
+        print(f"{name:<24} {median * 1e3:10.3f} ms  (min {best * 1e3:.3f} ms, {repeats} runs, {items / median:,.0f} items/s)")
+
+    if args.save:
+        # A baseline is the reference for every later run: time each case again and keep its quietest
+        # pass, so one noisy window can't record a slow entry that later regressions hide under
+        for _ in range(args.retries):
+            for name, (fn, items) in cases.items():
+                median, best, repeats = time_case(fn, min_time, args.max_repeats)
+                if median < results[name]["median_s"]:
+                    results[name].update(median_s=median, repeats=repeats, items_per_s=items / median)
+                results[name]["min_s"] = min(results[name]["min_s"], best)
+
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "machine": machine_info(), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save:
+        if os.path.exists(args.baseline):
+            # Keep cases that were filtered out of this run
+            with open(args.baseline) as f:
+                previous = json.load(f).get("results", {})
+            report["results"] = {**previous, **results}
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("ℹ️ No baseline yet; run with --save to create one.")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("machine", {}).get("platform") != report["machine"]["platform"]:
+        print("⚠️ Baseline was recorded on a different machine; timings may not be comparable.")
+
+    rows = compare(results, baseline.get("results", {}), args.threshold, args.min_delta_ms / 1e3)
+    for _ in range(args.retries):
+        suspects = [row[0] for row in rows if row[4]]
+        if not suspects:
+            break
+        # Re-time and keep the best run seen, so one noisy burst does not fail the suite
+        for name in suspects:
+            _, best, _ = time_case(cases[name][0], min_time, args.max_repeats)
+            results[name]["min_s"] = min(results[name]["min_s"], best)
+        rows = compare(results, baseline.get("results", {}), args.threshold, args.min_delta_ms / 1e3)
+    regressions = [row for row in rows if row[4]]
+    print(f"\nCompared {len(rows)} cases with {args.baseline} (threshold +{args.threshold:.0%})")
+    for name, base, current, ratio, _ in regressions:
+        print(f"❌ {name}: {base * 1e3:.3f} ms → {current * 1e3:.3f} ms ({ratio:.2f}x)")
+    if regressions:
+        return 1
+    print("✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,313 @@
+"""
+Headless bulk screening: run the batch engine over a CSV / Parquet listing feed.
+
+    python bulk_screen.py listings.csv -o results.parquet --workers 8
+
+The input is streamed in chunks, each chunk is evaluated in a worker process
+with calculate_metrics_batch, and results are appended to the output as they
+arrive (Parquet row groups or CSV blocks), so memory stays flat however big
+the feed is. Columns that are not engine inputs (listing id, address, ...) are
+passed through. Missing inputs can be filled with --set name=value.
+
+--tax adds the after-tax columns (after-tax IRR, recapture, ...). Tax fields
+come from --tax name=value or, per row, from feed columns with the same name
+(e.g. an income_tax_rate column for each investor's bracket):
+
+    python bulk_screen.py listings.csv -o results.parquet --tax income_tax_rate=32 --tax land_value_pct=25
+
+With --top K only the best K rows are written (ranking_engine: cheap bounds
+first, full evaluation only for rows that can still make the cut):
+
+    python bulk_screen.py listings.csv -o best.csv --top 50 --rank-by irr --min first_year_cash_flow=0
+
+Only the engine and pandas / pyarrow are imported here: no streamlit,
+matplotlib or reportlab, so this runs fine on a box without a display.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from calc_engine import (AFTER_TAX_KEYS, AFTER_TAX_SERIES_KEYS, BATCH_INPUTS, BATCH_SERIES_KEYS, TaxProfile,
+                         calculate_metrics_batch)
+from ranking_engine import TopK
+
+# Scalar result columns written for every row, in output order
+OUTPUT_COLUMNS = (
+    "Cap Rate (%)", "Cash-on-Cash Return (%)", "Final Year ROI (%)", "First Year Cash Flow ($)",
+    "Monthly Mortgage ($)", "Grade", "IRR (Operational) (%)", "IRR (Total incl. Sale) (%)",
+    "equity_multiple", "Net Sale Proceeds ($)", "IRR (Operational) Status", "IRR (Total) Status",
+)
+
+# --rank-by / --min short names -> result keys (see ranking_engine.RANK_KEYS / FILTER_COLUMNS)
+RANK_BY = {
+    "irr": "IRR (Total incl. Sale) (%)",
+    "irr_operational": "IRR (Operational) (%)",
+    "coc": "Cash-on-Cash Return (%)",
+    "cap_rate": "Cap Rate (%)",
+    "equity_multiple": "equity_multiple",
+}
+FILTERS = {
+    "cap_rate": "Cap Rate (%)",
+    "coc": "Cash-on-Cash Return (%)",
+    "first_year_cash_flow": "First Year Cash Flow ($)",
+}
+
+
+def _read_chunks(path, chunk_size):
+    """
+    Yield DataFrames of at most `chunk_size` rows from a CSV or Parquet file.
+
+    CSV passthrough columns are read as text, so a column doesn't change type
+    from one chunk to the next (an id column that turns float on a blank cell);
+    screen_chunk coerces the engine inputs (and --tax columns) to float.
+    """
+    if path.endswith((".parquet", ".pq")):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        header = pd.read_csv(path, nrows=0).columns
+        yield from pd.read_csv(path, chunksize=chunk_size,
+                               dtype={name: str for name in header if name not in BATCH_INPUTS})
+
+
+def _chunk_inputs(chunk, defaults=None):
+    """The ten engine inputs of a DataFrame chunk as float arrays (non-numeric -> NaN)."""
+    inputs = {}
+    for name in BATCH_INPUTS:
+        if name in chunk:
+            inputs[name] = pd.to_numeric(chunk[name], errors="coerce").to_numpy(dtype=float)
+        elif defaults and name in defaults:
+            inputs[name] = np.full(len(chunk), float(defaults[name]))
+        else:
+            raise KeyError(f"Input column {name!r} missing (add it to the file or pass --set {name}=...)")
+    return inputs
+
+
+def _chunk_tax(chunk, tax):
+    """TaxProfile fields for a chunk: feed columns named like a field win over the --tax values."""
+    fields = dict(tax)
+    for name in TaxProfile._fields:
+        if name in chunk and name not in ("depreciation_years", "offset_losses"):  # those two are per run
+            fields[name] = pd.to_numeric(chunk[name], errors="coerce").to_numpy(dtype=float)
+    return fields
+
+
+def screen_chunk(chunk, defaults=None, with_series=False, tax=None):
+    """Evaluate one DataFrame of listings; returns passthrough columns + metrics (+ after-tax with `tax`)."""
+    chunk = chunk.reset_index(drop=True)
+    inputs = _chunk_inputs(chunk, defaults)
+    tax = _chunk_tax(chunk, tax) if tax is not None else None
+    coerced = inputs | {name: value for name, value in (tax or {}).items() if isinstance(value, np.ndarray)}
+
+    # Rows with missing / non-numeric inputs are reported, not evaluated
+    columns = list(inputs.values()) + [value for value in (tax or {}).values() if isinstance(value, np.ndarray)]
+    valid = np.all([np.isfinite(col) for col in columns], axis=0)
+    if tax is not None:
+        tax = {name: value[valid] if isinstance(value, np.ndarray) else value for name, value in tax.items()}
+    batch = calculate_metrics_batch({name: col[valid] for name, col in inputs.items()}, tax=tax)
+
+    # Inputs go out as the floats the engine saw (non-numeric cells -> NaN), so every chunk has the same schema
+    out = chunk.copy()
+    for name, values in coerced.items():
+        if name in out:
+            out[name] = values
+    for key in OUTPUT_COLUMNS + (AFTER_TAX_KEYS + ("After-Tax IRR Status",) if tax is not None else ()):
+        if key == "Grade":
+            column = pd.array([None] * len(chunk), dtype="string")
+        else:
+            column = np.full(len(chunk), np.nan)
+        column[valid] = batch[key]
+        out[key] = column
+    if with_series:
+        # One flat array per series, split at each row's horizon (invalid rows get an empty list)
+        lengths = np.zeros(len(chunk), dtype=int)
+        lengths[valid] = batch["Time Horizon"]
+        in_horizon = np.arange(batch[BATCH_SERIES_KEYS[0]].shape[1]) < batch["Time Horizon"][:, None]
+        for key in BATCH_SERIES_KEYS + (AFTER_TAX_SERIES_KEYS if tax is not None else ()):
+            out[key] = np.split(batch[key][in_horizon], np.cumsum(lengths)[:-1])
+    out["valid_input"] = valid
+    return out
+
+
+class _Writer:
+    """Appends result chunks to a Parquet or CSV file as they arrive."""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.endswith((".parquet", ".pq"))
+        self._writer = None
+        self._first = True
+
+    def write(self, frame):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode="w" if self._first else "a", header=self._first, index=False)
+        self._first = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def run(input_path, output_path, workers=None, chunk_size=50_000, defaults=None, with_series=False, progress=True,
+        tax=None):
+    """Screen `input_path` into `output_path`; returns (rows, seconds)."""
+    workers = workers or os.cpu_count() or 1
+    writer = _Writer(output_path)
+    rows = 0
+    start = time.perf_counter()
+
+    def report(final=False):
+        if progress:
+            elapsed = time.perf_counter() - start
+            rate = rows / elapsed if elapsed else 0.0
+            end = "\n" if final else "\r"
+            print(f"{rows:,} rows in {elapsed:.1f}s ({rate:,.0f} rows/sec)", end=end, file=sys.stderr, flush=True)
+
+    try:
+        if workers == 1:
+            for chunk in _read_chunks(input_path, chunk_size):
+                writer.write(screen_chunk(chunk, defaults, with_series, tax))
+                rows += len(chunk)
+                report()
+        else:
+            # Keep a bounded number of chunks in flight so the reader never runs ahead of the pool
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                for chunk in _read_chunks(input_path, chunk_size):
+                    pending.append(pool.submit(screen_chunk, chunk, defaults, with_series, tax))
+                    if len(pending) >= 2 * workers:
+                        result = pending.popleft().result()
+                        writer.write(result)
+                        rows += len(result)
+                        report()
+                while pending:
+                    result = pending.popleft().result()
+                    writer.write(result)
+                    rows += len(result)
+                    report()
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    report(final=True)
+    return rows, elapsed
+
+
+def rank(input_path, output_path, k, key, filters=None, chunk_size=50_000, defaults=None, with_series=False,
+         progress=True, tax=None):
+    """Write only the top `k` rows of `input_path` by `key`, best first; returns (rows, seconds, stats)."""
+    ranker = TopK(k, key, filters)
+    start = time.perf_counter()
+    for chunk in _read_chunks(input_path, chunk_size):
+        ranker.push(_chunk_inputs(chunk, defaults))
+        if progress:
+            print(f"{ranker.candidates:,} rows ranked, {ranker.evaluated:,} fully evaluated", end="\r",
+                  file=sys.stderr, flush=True)
+    result = ranker.result()
+
+    # Second pass over the feed picks up the winners' passthrough columns (id, address, ...)
+    wanted = np.sort(result.index)
+    picked, offset = [], 0
+    for chunk in _read_chunks(input_path, chunk_size):
+        local = wanted[(wanted >= offset) & (wanted < offset + len(chunk))] - offset
+        if len(local):
+            rows = chunk.iloc[local]
+            rows.index = local + offset
+            picked.append(rows)
+        offset += len(chunk)
+
+    writer = _Writer(output_path)
+    try:
+        if picked:
+            top = screen_chunk(pd.concat(picked).loc[result.index], defaults, with_series, tax)
+            top.insert(0, "rank", np.arange(1, len(top) + 1))
+            writer.write(top)
+    finally:
+        writer.close()
+    if progress:
+        print(file=sys.stderr)
+    return len(result.index), time.perf_counter() - start, result.stats
+
+
+def _parse_defaults(pairs):
+    defaults = {}
+    for pair in pairs or []:
+        name, _, value = pair.partition("=")
+        if name not in BATCH_INPUTS or not value:
+            raise argparse.ArgumentTypeError(f"--set expects one of {', '.join(BATCH_INPUTS)} as name=value, got {pair!r}")
+        defaults[name] = float(value)
+    return defaults
+
+
+def _parse_tax(pairs):
+    """--tax name=value pairs -> TaxProfile fields ({} for a bare --tax)."""
+    fields = {}
+    for pair in pairs:
+        if not pair:
+            continue
+        name, _, value = pair.partition("=")
+        if name not in TaxProfile._fields or not value:
+            raise argparse.ArgumentTypeError(f"--tax expects one of {', '.join(TaxProfile._fields)} as name=value, got {pair!r}")
+        fields[name] = value.lower() in ("1", "true", "yes") if name == "offset_losses" else float(value)
+    return fields
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Screen a CSV / Parquet listing feed with the batch engine.")
+    parser.add_argument("input", help="CSV or Parquet file with one listing per row")
+    parser.add_argument("-o", "--output", required=True, help="output file (.parquet or .csv)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="rows per chunk (default: 50000)")
+    parser.add_argument("--set", action="append", metavar="NAME=VALUE",
+                        help="value for an input column missing from the file, e.g. --set mortgage_rate=6.5")
+    parser.add_argument("--with-series", action="store_true", help="also write the per-year series as list columns")
+    parser.add_argument("--top", type=int, metavar="K", help="only write the best K rows (ranked, with pruning)")
+    parser.add_argument("--rank-by", choices=sorted(RANK_BY), default="irr", help="sort key for --top (default: irr)")
+    parser.add_argument("--min", action="append", metavar="NAME=VALUE",
+                        help=f"minimum for --top candidates, NAME one of {', '.join(FILTERS)}; e.g. --min cap_rate=5")
+    parser.add_argument("--tax", action="append", nargs="?", const="", metavar="NAME=VALUE",
+                        help="add after-tax columns; optional TaxProfile overrides, e.g. --tax income_tax_rate=32")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no progress output")
+    args = parser.parse_args(argv)
+
+    try:
+        defaults = _parse_defaults(args.set)
+        tax = _parse_tax(args.tax) if args.tax is not None else None
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    if args.top is not None:
+        filters = {}
+        for pair in args.min or []:
+            name, _, value = pair.partition("=")
+            if name not in FILTERS or not value:
+                parser.error(f"--min expects one of {', '.join(FILTERS)} as name=value, got {pair!r}")
+            filters[FILTERS[name]] = float(value)
+        rows, elapsed, stats = rank(args.input, args.output, args.top, RANK_BY[args.rank_by], filters,
+                                    args.chunk_size, defaults, args.with_series, progress=not args.quiet, tax=tax)
+        print(f"✅ Top {rows} of {stats['candidates']:,} rows by {RANK_BY[args.rank_by]} in {elapsed:.2f}s → {args.output}")
+        print(f"   filtered {stats['filter_rate']:.1%}, pruned by bound {stats['prune_rate']:.1%}, "
+              f"fully evaluated {stats['evaluated']:,} ({stats['evaluated'] / max(stats['candidates'], 1):.1%})")
+        return
+
+    rows, elapsed = run(args.input, args.output, args.workers, args.chunk_size, defaults,
+                        args.with_series, progress=not args.quiet, tax=tax)
+    print(f"✅ Screened {rows:,} rows in {elapsed:.2f}s ({rows / elapsed if elapsed else 0:,.0f} rows/sec) → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,326 @@
-from scipy.optimize import newton
+import logging
+from typing import NamedTuple
+
 import numpy as np
-import numpy_financial as npf
+from irr_engine import irr_batch, irr_warm
+from amortization_engine import _annuity_terms, _monthly_payment, yearly_schedule
+from deal_metrics import SERIES_FIELDS, DealMetrics
+from instrumentation import timed
+
+log = logging.getLogger("deal_analyzer.calc")
 
 def robust_irr(cash_flows, guess=0.1):
+    """Legacy single-vector Newton IRR; the engine itself now uses irr_engine.irr_batch."""
+    from scipy.optimize import newton  # ~0.5 s import, so only paid by callers of this fallback
     def npv(rate):
         return sum(cf / (1 + rate) ** i for i, cf in enumerate(cash_flows))
     try:
         irr_solution = newton(npv, guess)
         return round(irr_solution * 100, 2)
     except Exception as e:
-        print(f"IRR calculation failed: {e}")
+        log.warning("IRR calculation failed: %s", e)
         return 0
 
+def _irr_percent(cash_flow_rows):
+    """Batched IRR in percent (rounded to 2 dp, NaN when unsolvable) plus per-row solver status."""
+    result = irr_batch(cash_flow_rows)
+    return _round2(result.rate * 100.0), result.status
+
+def _scalar_payment(loan_amount, monthly_rate, n_payments):
+    """Monthly mortgage payment as a plain float (always positive dollars)."""
+    if n_payments <= 0:
+        return 0.0
+    if monthly_rate > 0:
+        # Same arithmetic as numpy_financial.pmt (abs of the outflow) without importing it;
+        # kept a plain float so every downstream round() uses Python semantics
+        return float(_monthly_payment(loan_amount, monthly_rate, n_payments))
+    return loan_amount / n_payments
+
+def _grade(coc_return):
+    """Letter grade from the cash-on-cash return (%)."""
+    if coc_return >= 15:
+        return "A"
+    elif coc_return >= 12:
+        return "B"
+    elif coc_return >= 9:
+        return "C"
+    elif coc_return >= 6:
+        return "D"
+    return "F"
+
+# =============================
+# 📈 Per-year drivers
+# =============================
+
+# Rates that may be one value for every year or a path with one value per year (year 1 first).
+# A path shorter than the horizon holds its last value; expense_growth_rate is optional (default 0).
+YEARLY_INPUTS = ("rent_growth_rate", "vacancy_rate", "appreciation_rate", "expense_growth_rate")
+
+
+def _yearly_key(name):
+    """Batch column holding a driver's (n_deals, years) path."""
+    return f"{name}_by_year"
+
+
+def _per_year(rate, years):
+    """
+    A driver with the year axis last, fitted to `years`: scalars and length-1
+    paths stay length 1 (they broadcast), longer paths are cut, shorter ones
+    hold their last value.
+    """
+    rate = np.atleast_1d(np.asarray(rate, dtype=float))
+    if not rate.shape[-1]:
+        raise ValueError("per-year paths need at least one value")
+    if rate.shape[-1] == 1 or rate.shape[-1] == years:
+        return rate
+    if rate.shape[-1] > years:
+        return rate[..., :years]
+    return np.concatenate([rate, np.repeat(rate[..., -1:], years - rate.shape[-1], axis=-1)], axis=-1)
+
+
+def _first_year(rate):
+    """Year-1 value of a scalar or per-year driver (for cap rate / CoC)."""
+    return rate if np.ndim(rate) == 0 else np.asarray(rate, dtype=float)[..., 0]
+
+
+def _growth_path(start, growth, years, uplift=None):
+    """
+    `start` in year 1, then multiplied by each year's growth factor: year t+1
+    is year t times growth[t] (year axis last, length 1 broadcasts), i.e. a
+    running product. Capex rent uplifts break the pure product, so with any
+    uplift the same recurrence runs one year at a time (r * g + uplift).
+    """
+    start = np.asarray(start, dtype=float)
+    growth = np.asarray(growth, dtype=float)
+    batch_shape = np.broadcast_shapes(start.shape, growth.shape[:-1],
+                                      uplift.shape[:-1] if uplift is not None else ())
+    path = np.empty(batch_shape + (years,))
+    if not years:
+        return path
+    path[..., 0] = start
+    if uplift is not None and uplift.any():
+        last = growth.shape[-1] - 1
+        for year in range(1, years):
+            path[..., year] = path[..., year - 1] * growth[..., min(year - 1, last)] + uplift[..., year - 1]
+        return path
+    path[..., 1:] = growth[..., :years - 1] if growth.shape[-1] > 1 else growth
+    return np.cumprod(path, axis=-1, out=path)
+
+
+# =============================
+# 🏗️ Capital improvements
+# =============================
+
+# Sparse capex events: the outlay is paid in `year` (1 = first year after purchase) and the
+# monthly rent uplift joins the rent from the next year on, growing with it like the rest of the rent
+CAPEX_COLUMNS = ("year", "amount", "rent_uplift")
+
+
+def _capex_table(capex):
+    """Validated (k, 3) float array of (year, amount, rent_uplift) rows, in row order."""
+    if capex is None:
+        return np.zeros((0, 3))
+    if hasattr(capex, "columns") or isinstance(capex, dict):
+        year = np.asarray(capex["year"], dtype=float)
+        uplift = capex["rent_uplift"] if "rent_uplift" in capex else np.zeros(len(year))
+        table = np.column_stack([year, np.asarray(capex["amount"], dtype=float), np.asarray(uplift, dtype=float)])
+    else:
+        table = np.array([(event["year"], event["amount"], event.get("rent_uplift", 0.0)) if isinstance(event, dict)
+                          else tuple(event) + (0.0,) * (3 - len(event)) for event in capex], dtype=float).reshape(-1, 3)
+    if not np.isfinite(table).all():
+        raise ValueError("capex events need a finite year, amount and rent_uplift")
+    if ((table[:, 0] < 1) | (table[:, 0] != np.trunc(table[:, 0]))).any():
+        raise ValueError("capex years must be whole years >= 1")
+    return table
+
+
+def capex_events(capex):
+    """
+    Normalize one deal's capex events to a tuple of (year, amount, rent_uplift) tuples.
+
+    Accepts None, (year, amount[, rent_uplift]) tuples, dicts with those keys,
+    or a DataFrame / dict of columns. Rows keep their order.
+    """
+    return tuple((int(year), amount, rent_uplift) for year, amount, rent_uplift in _capex_table(capex).tolist())
+
+
+def _capex_grids(capex, years, n_deals=None):
+    """
+    Dense (outlay, rent uplift) per year, or (None, None) when there are no events.
+
+    Without `n_deals` the events apply to every deal and the grids have shape
+    (years,). Batch event tables may instead carry a "deal" column (flat row
+    index), giving (n_deals, years) grids. Events past `years` are dropped;
+    several events in one year add up in row order.
+    """
+    if capex is None or len(capex) == 0:
+        return None, None
+    per_deal = (hasattr(capex, "columns") or isinstance(capex, dict)) and "deal" in capex
+    events = _capex_table(capex)
+    year_index = events[:, 0].astype(int) - 1
+    keep = year_index < years
+    flat, size, shape = year_index[keep], years, (years,)
+    if per_deal:
+        if n_deals is None:
+            raise ValueError("per-deal capex (a 'deal' column) needs calculate_metrics_batch")
+        deal = np.asarray(capex["deal"], dtype=int)[keep]
+        if deal.size and (deal.min() < 0 or deal.max() >= n_deals):
+            raise ValueError(f"capex deal index out of range for {n_deals} deals")
+        flat, size, shape = deal * years + flat, n_deals * years, (n_deals, years)
+    # bincount adds same-cell events in row order, like a running sum
+    outlay = np.bincount(flat, weights=events[keep, 1], minlength=size).reshape(shape)
+    uplift = np.bincount(flat, weights=events[keep, 2], minlength=size).reshape(shape)
+    return outlay, uplift
+
+
+# =============================
+# 🧾 Taxes & depreciation
+# =============================
+
+class TaxProfile(NamedTuple):
+    """Investor tax assumptions (rates in %); fields may be per-deal arrays in batch mode."""
+    income_tax_rate: float = 24.0       # marginal rate on rental income
+    capital_gains_rate: float = 15.0    # long-term rate on the gain above the depreciation taken
+    recapture_rate: float = 25.0        # rate on the gain up to the depreciation taken (recapture)
+    land_value_pct: float = 20.0        # share of the price that is land, which never depreciates
+    depreciation_years: float = 27.5    # residential straight-line life
+    offset_losses: bool = False         # True: losses offset other income yearly; False: carried to the sale
+
+
+def tax_profile(tax):
+    """TaxProfile from None (no taxes), True (defaults), a dict of fields or a TaxProfile."""
+    if tax is None or tax is False:
+        return None
+    if tax is True:
+        return TaxProfile()
+    profile = TaxProfile(**tax) if isinstance(tax, dict) else TaxProfile(*tax)
+    return profile._replace(depreciation_years=float(profile.depreciation_years),
+                            offset_losses=bool(profile.offset_losses))
+
+
+def depreciation_schedule(placed_in_service, life=27.5):
+    """
+    Straight-line depreciation per year for basis placed in service per year.
+
+    `placed_in_service` has the year axis last (year 1 first); each amount
+    depreciates by amount / life from its own year on, full years (no mid-month
+    convention), with the half year left at 27.5 years taken in year 28.
+    """
+    placed_in_service = np.asarray(placed_in_service, dtype=float)
+    years = placed_in_service.shape[-1]
+    lag = np.arange(years)
+    fraction = (np.minimum(lag + 1, life) - np.minimum(lag, life)) / life
+    depreciation = np.zeros_like(placed_in_service)
+    # One pass per year that places any basis (year 1 for the building, capex years), not per year of age
+    placed_years = np.flatnonzero(placed_in_service.reshape(-1, years).any(axis=0)) if years else ()
+    for year in placed_years:
+        depreciation[..., year:] += placed_in_service[..., year, None] * fraction[:years - year]
+    return depreciation
+
+
+def _after_tax(tax, purchase_price, down_payment_amount, noi, interest, outlay, cash_flows, in_horizon,
+               sale_value, net_sale_proceeds):
+    """
+    After-tax flows from the pre-tax per-year arrays (year axis last), shared by every engine.
+
+    Taxable income is NOI less mortgage interest and depreciation (building
+    from year 1, capex from its own year); capex itself is capitalized, not
+    expensed. Losses either offset other income right away or are carried
+    forward and released at the sale. At the sale, the gain over the adjusted
+    basis is taxed at the recapture rate up to the depreciation taken and at
+    the capital-gains rate above it; a loss is deducted at the income rate.
+    Returns the per-year series plus the after-tax IRR row for the caller to
+    solve with its other rows.
+    """
+    income_rate = np.asarray(tax.income_tax_rate, dtype=float)[..., None] / 100.0
+    building = np.asarray(purchase_price) * (1 - np.asarray(tax.land_value_pct, dtype=float) / 100.0)
+    placed = np.zeros(np.broadcast_shapes(building.shape + (1,), np.shape(noi)))
+    has_years = placed.shape[-1] > 0  # a zero horizon has no year to place the building in, nor any to tax
+    if has_years:
+        placed[..., 0] = building
+    if outlay is not None:
+        placed = placed + outlay
+    depreciation = np.where(in_horizon, depreciation_schedule(placed, tax.depreciation_years), 0.0)
+    taxable = np.where(in_horizon, noi - interest - depreciation, 0.0)
+
+    # ---- Yearly income tax; carried-forward losses only shelter later income
+    running_income = np.cumsum(taxable, axis=-1)
+    if tax.offset_losses:
+        taxed = taxable
+        released = 0.0
+    else:
+        taxed_to_date = np.maximum(np.maximum.accumulate(running_income, axis=-1), 0.0)
+        taxed = np.diff(taxed_to_date, axis=-1, prepend=0.0)
+        released = (taxed_to_date[..., -1] - running_income[..., -1]) if has_years else 0.0  # losses still suspended at the sale
+    income_tax = _round2(taxed * income_rate)
+    after_tax_cash_flows = np.where(in_horizon, _round2(cash_flows - income_tax), 0.0)
+
+    # ---- Sale: recapture up to the depreciation taken, capital gains above it
+    accumulated = np.cumsum(depreciation, axis=-1)[..., -1] if has_years else 0.0
+    capex_total = np.cumsum(np.where(in_horizon, outlay, 0.0), axis=-1)[..., -1] if outlay is not None and has_years else 0.0
+    gain = sale_value - ((purchase_price + capex_total) - accumulated)
+    recapture_tax = np.clip(gain, 0.0, accumulated) * (np.asarray(tax.recapture_rate, dtype=float) / 100.0)
+    capital_gains_tax = np.maximum(gain - accumulated, 0.0) * (np.asarray(tax.capital_gains_rate, dtype=float) / 100.0)
+    ordinary_deduction = released - np.minimum(gain, 0.0)
+    sale_tax = (recapture_tax + capital_gains_tax) - ordinary_deduction * income_rate[..., 0]
+    after_tax_sale_proceeds = net_sale_proceeds - sale_tax
+
+    last_year = np.arange(1, in_horizon.shape[-1] + 1) == np.sum(in_horizon, axis=-1)[..., None]
+    after_tax_total = after_tax_cash_flows + np.where(last_year, np.asarray(after_tax_sale_proceeds)[..., None], 0.0)
+    total_cash_received = np.cumsum(after_tax_total, axis=-1)[..., -1] if after_tax_total.shape[-1] else 0.0
+    has_down = down_payment_amount != 0
+    return dict(
+        depreciation=_round2(depreciation),
+        taxable_income=_round2(taxable),
+        income_tax=income_tax,
+        after_tax_cash_flows=after_tax_cash_flows,
+        after_tax_total=after_tax_total,
+        recapture_tax=_round2(recapture_tax),
+        capital_gains_tax=_round2(capital_gains_tax),
+        after_tax_sale_proceeds=_round2(after_tax_sale_proceeds),
+        equity_multiple=np.where(has_down, _round2(total_cash_received / np.where(has_down, down_payment_amount, 1.0)), 0.0),
+    )
+
+
+# After-tax keys added to the scalar result (DealMetrics side dict) and the batch columns
+AFTER_TAX_KEYS = (
+    "After-Tax IRR (%)", "After-Tax Equity Multiple", "After-Tax Sale Proceeds ($)",
+    "Depreciation Recapture Tax ($)", "Capital Gains Tax ($)",
+)
+AFTER_TAX_SERIES_KEYS = (
+    "After-Tax Cash Flow", "Depreciation $ (by year)", "Taxable Income $ (by year)", "Income Tax $ (by year)",
+)
+
+
+def _after_tax_extras(after_tax, irr):
+    """Scalar-engine extra keys (DealMetrics side dict) from an _after_tax() result for one deal."""
+    return {
+        "After-Tax IRR (%)": irr,
+        "After-Tax Equity Multiple": after_tax["equity_multiple"].item(),
+        "After-Tax Sale Proceeds ($)": after_tax["after_tax_sale_proceeds"].item(),
+        "Depreciation Recapture Tax ($)": after_tax["recapture_tax"].item(),
+        "Capital Gains Tax ($)": after_tax["capital_gains_tax"].item(),
+        "After-Tax Cash Flow": after_tax["after_tax_cash_flows"].tolist(),
+        "Depreciation $ (by year)": after_tax["depreciation"].tolist(),
+        "Taxable Income $ (by year)": after_tax["taxable_income"].tolist(),
+        "Income Tax $ (by year)": after_tax["income_tax"].tolist(),
+    }
+
+
+@timed("calc")
 def calculate_metrics(purchase_price, monthly_rent, down_payment_pct, mortgage_rate, mortgage_term,
-                      monthly_expenses, vacancy_rate, appreciation_rate, rent_growth_rate, time_horizon):
+                      monthly_expenses, vacancy_rate, appreciation_rate, rent_growth_rate, time_horizon,
+                      capex=None, tax=None, expense_growth_rate=0.0):
+    """
+    Metrics for one deal. `capex` is an optional list of capital-improvement
+    events (year, amount, monthly rent_uplift); see capex_events(). With `tax`
+    (True, a dict or a TaxProfile) the after-tax keys ("After-Tax IRR (%)",
+    "Depreciation $ (by year)", ...) are added.
+
+    Rent growth, vacancy, appreciation and expense growth (default 0: flat
+    expenses) take one rate for every year or a list with one per year, year
+    1 first; see YEARLY_INPUTS.
+    """
 
     # ---- Loan basics
     down_payment_amount = purchase_price * (down_payment_pct / 100.0)
@@ -22,16 +329,13 @@ def calculate_metrics(purchase_price, monthly_rent, down_payment_pct, mortgage_r
     n_payments = int(mortgage_term * 12)
 
     # ---- Monthly mortgage payment (always positive dollars)
-    if n_payments <= 0:
-        monthly_mortgage_payment = 0.0
-    elif monthly_rate > 0:
-        # numpy_financial.pmt returns a negative number (cash outflow); take abs for display/math
-        monthly_mortgage_payment = abs(npf.pmt(monthly_rate, n_payments, loan_amount))
-    else:
-        monthly_mortgage_payment = loan_amount / n_payments
+    monthly_mortgage_payment = _scalar_payment(loan_amount, monthly_rate, n_payments)
+
+    # ---- Amortization: mortgage actually paid each year (0 after payoff) and balance still owed
+    schedule = yearly_schedule(loan_amount, monthly_rate, n_payments, monthly_mortgage_payment, time_horizon)
 
     # ---- Year-1 flows (for cap rate / CoC / first-year cash flow)
-    effective_monthly_rent = monthly_rent * (1 - vacancy_rate / 100.0)
+    effective_monthly_rent = monthly_rent * (1 - float(_first_year(vacancy_rate)) / 100.0)
     annual_rent = effective_monthly_rent * 12.0
     annual_expenses = monthly_expenses * 12.0
     annual_mortgage = monthly_mortgage_payment * 12.0
@@ -42,87 +346,428 @@ def calculate_metrics(purchase_price, monthly_rent, down_payment_pct, mortgage_r
     cap_rate = ((annual_rent - annual_expenses) / purchase_price) * 100.0 if purchase_price else 0.0
     coc_return = (annual_cash_flow / down_payment_amount) * 100.0 if down_payment_amount else 0.0
 
-    # ---- Multi-year projections (rent growth only; expenses & mortgage held flat)
-    cash_flows = []
-    rents = []
-    current_monthly_rent = monthly_rent
-    for year in range(1, time_horizon + 1):
-        eff_rent_mo = current_monthly_rent * (1 - vacancy_rate / 100.0)
-        year_rent = eff_rent_mo * 12.0
-        year_cash_flow = year_rent - annual_expenses - annual_mortgage
-        cash_flows.append(round(year_cash_flow, 2))
-        rents.append(round(current_monthly_rent * 12.0, 2))  # track annual rent dollars, optional
-        current_monthly_rent *= (1 + rent_growth_rate / 100.0)
-
-    print(f"[DEBUG] appreciation_rate={appreciation_rate}, time_horizon={time_horizon}, cash_flows={cash_flows[:3]} ...")
-
-    # ---- IRR & Equity Multiple (dual-solver, operational + total) ----
-    def safe_irr(cashflows):
-        """Try npf.irr first; fallback to Newton if it fails."""
-        try:
-            val = npf.irr(cashflows)
-            if val is None or np.isnan(val):
-                raise ValueError("npf.irr failed")
-            return round(val * 100.0, 2)
-        except Exception:
-            return robust_irr(cashflows)
-
-    # --- Operational IRR (based on annual cash flows only) ---
-    irr_operational = safe_irr([-down_payment_amount] + cash_flows)
-
-    # --- Total IRR (adds terminal sale / appreciation value) ---
-    sale_value = purchase_price * ((1 + appreciation_rate / 100.0) ** time_horizon)
+    # ---- Multi-year projections: running products of each year's rent / expense growth, vacancy per year,
+    # mortgage stops after the term. Capex outlays come out of their year's cash flow; rent uplifts join the
+    # rent the year after
+    outlay, uplift = _capex_grids(capex, time_horizon)
+    monthly_rents = _growth_path(monthly_rent, 1 + _per_year(rent_growth_rate, time_horizon) / 100.0, time_horizon, uplift)
+    year_rent = monthly_rents * (1 - _per_year(vacancy_rate, time_horizon) / 100.0) * 12.0
+    if np.any(expense_growth_rate):
+        annual_expenses = _growth_path(annual_expenses, 1 + _per_year(expense_growth_rate, time_horizon) / 100.0, time_horizon)
+    net_operating_income = year_rent - annual_expenses
+    cash_flows = net_operating_income - schedule.payment
+    if outlay is not None:
+        cash_flows = cash_flows - outlay
+    cash_flows = _round2(cash_flows)
+    rents = _round2(monthly_rents * 12.0)  # track annual rent dollars, optional
+
+    log.debug("appreciation_rate=%s, time_horizon=%s, cash_flows=%s ...", appreciation_rate, time_horizon, cash_flows[:3])
+
+    # ---- Appreciation: one rate compounds as (1 + a) ** t, a per-year path as its running product
+    years = np.arange(1, time_horizon + 1)
+    if np.ndim(appreciation_rate) == 0:
+        appreciation_growth = (1 + appreciation_rate / 100.0) ** time_horizon
+        property_values = purchase_price * (1 + appreciation_rate / 100.0) ** years
+    else:
+        value_growth = np.cumprod(np.broadcast_to(1 + _per_year(appreciation_rate, time_horizon) / 100.0, (time_horizon,)))
+        appreciation_growth = value_growth[-1].item() if time_horizon else 1.0
+        property_values = purchase_price * value_growth
+
+    # ---- IRR & Equity Multiple (operational + total solved in one batched call) ----
+    # Total IRR adds the terminal sale, net of the loan payoff, to the final year
+    sale_value = purchase_price * appreciation_growth
+    net_sale_proceeds = sale_value - (schedule.balance[-1].item() if time_horizon else 0.0)
     cash_flows_total = cash_flows.copy()
-    if cash_flows_total:
-        cash_flows_total[-1] += sale_value
-    irr_total = safe_irr([-down_payment_amount] + cash_flows_total)
+    if time_horizon:
+        cash_flows_total[-1] += net_sale_proceeds
+    irr_rows = [
+        np.concatenate([[-down_payment_amount], cash_flows]),
+        np.concatenate([[-down_payment_amount], cash_flows_total]),
+    ]
+
+    # ---- After tax: depreciation, interest deduction, recapture on sale (same kernel as the batch engine)
+    tax = tax_profile(tax)
+    if tax is not None:
+        after_tax = _after_tax(tax, purchase_price, down_payment_amount, net_operating_income,
+                               schedule.interest, outlay, cash_flows, np.ones(time_horizon, dtype=bool),
+                               sale_value, net_sale_proceeds)
+        irr_rows.append(np.concatenate([[-down_payment_amount], after_tax["after_tax_total"]]))
+    # One deal's rows are short, so pure-Python Newton beats irr_batch's per-call numpy overhead
+    irr_values = _round2([irr_warm(row, 0.1)[0] * 100.0 for row in irr_rows])
+    irr_operational, irr_total = irr_values[:2].tolist()
 
     # --- Equity Multiple (total case) ---
-    total_cash_received = sum(cash_flows_total)
+    total_cash_received = np.cumsum(cash_flows_total)[-1].item() if time_horizon else 0.0
     equity_multiple = (
         round(total_cash_received / down_payment_amount, 2)
         if down_payment_amount
         else 0.0
     )
 
-
     # ---- ROI by year (simple heuristic including linearized appreciation)
-    appreciation_value_total = purchase_price * ((1 + appreciation_rate / 100.0) ** time_horizon - 1)
-    roi_list = []
-    cum_cf = 0.0
-    for i in range(time_horizon):
-        cum_cf += cash_flows[i]
-        # spread total appreciation evenly across years for a simple trend (same as your prior intent)
-        linearized_app = appreciation_value_total * ((i + 1) / time_horizon)
-        roi = ((cum_cf + linearized_app) / down_payment_amount) * 100.0 if down_payment_amount else 0.0
-        roi_list.append(round(roi, 2))
+    # spread total appreciation evenly across years for a simple trend
+    appreciation_value_total = purchase_price * (appreciation_growth - 1)
+    linearized_app = appreciation_value_total * (years / time_horizon) if time_horizon else np.zeros(0)
+    if down_payment_amount:
+        roi = _round2(((np.cumsum(cash_flows) + linearized_app) / down_payment_amount) * 100.0)
+    else:
+        roi = np.zeros(time_horizon)
+
+    # ---- Equity by year: appreciated value minus what is still owed
+    equity_by_year = _round2(property_values - schedule.balance)
 
     # ---- Grade (unchanged)
-    if coc_return >= 15:
-        grade = "A"
-    elif coc_return >= 12:
-        grade = "B"
-    elif coc_return >= 9:
-        grade = "C"
-    elif coc_return >= 6:
-        grade = "D"
+    grade = _grade(coc_return)
+
+    return DealMetrics(
+        extra=_after_tax_extras(after_tax, irr_values[2].item()) if tax is not None else None,
+        cap_rate=round(cap_rate, 2),
+        cash_on_cash=round(coc_return, 2),
+        final_year_roi=roi[-1].item() if time_horizon else 0.0,
+        first_year_cash_flow=cash_flows[0].item() if time_horizon else 0.0,
+        monthly_mortgage=round(monthly_mortgage_payment, 2),
+        grade=grade,
+        irr_operational=irr_operational,
+        irr_total=irr_total,
+        equity_multiple=equity_multiple,
+        net_sale_proceeds=round(net_sale_proceeds, 2),
+        series=[cash_flows, roi, rents, _round2(schedule.balance), equity_by_year],
+    )
+
+
+# =============================
+# 📦 Batch (vectorized) engine
+# =============================
+
+# Same ten inputs as calculate_metrics, in the same positional order
+BATCH_INPUTS = (
+    "purchase_price", "monthly_rent", "down_payment_pct", "mortgage_rate", "mortgage_term",
+    "monthly_expenses", "vacancy_rate", "appreciation_rate", "rent_growth_rate", "time_horizon",
+)
+
+# Per-year series returned as (n_deals, max_horizon) matrices, NaN-padded past each deal's horizon
+BATCH_SERIES_KEYS = tuple(key for _, key in SERIES_FIELDS)
+
+
+def _batch_inputs(args, kwargs):
+    """
+    Resolve positional / keyword / DataFrame-style inputs into a dict of column arrays.
+
+    A per-year driver given as a 2-D (deals, years) array, or as a column of
+    lists, keeps its paths under _yearly_key(name) with the year-1 value in the
+    flat column; expense_growth_rate is only stored as a path.
+    """
+    first = args[0] if args else None
+    if first is not None and (hasattr(first, "columns") or isinstance(first, dict)):
+        source = first
+        values = {name: source[name] for name in BATCH_INPUTS}
+        if "expense_growth_rate" in source:
+            values["expense_growth_rate"] = source["expense_growth_rate"]
+        if "expense_growth_rate" in kwargs:
+            values["expense_growth_rate"] = kwargs["expense_growth_rate"]
     else:
-        grade = "F"
+        values = dict(zip(BATCH_INPUTS, args))
+        values.update(kwargs)
+        missing = [name for name in BATCH_INPUTS if name not in values]
+        if missing:
+            raise TypeError(f"calculate_metrics_batch() missing inputs: {', '.join(missing)}")
 
-    return {
-        "Cap Rate (%)": round(cap_rate, 2),
-        "Cash-on-Cash Return (%)": round(coc_return, 2),
-        "Final Year ROI (%)": round(roi_list[-1], 2) if roi_list else 0,
-        "First Year Cash Flow ($)": round(cash_flows[0], 2) if cash_flows else 0,
-        "Monthly Mortgage ($)": round(monthly_mortgage_payment, 2),
-        "Grade": grade,
-        "10yr Cash Flow": cash_flows,  # kept for back-compat
-        "Multi-Year Cash Flow": [round(x, 2) for x in cash_flows],
-        "Annual ROI % (by year)": roi_list,
-        # If you want annual rent dollars (not monthly), keep as below; otherwise store monthly series
-        "Annual Rents $ (by year)": rents,
-        "irr (%)": irr_total,  # backward compatibility
+    paths = {}
+    for name in YEARLY_INPUTS:
+        if name in values:
+            path = _path_column(values[name])
+            if path.ndim >= 2 or name == "expense_growth_rate":
+                paths[name] = path
+
+    columns = {name: np.asarray(paths[name][..., 0] if name in paths else values[name], dtype=float)
+               for name in BATCH_INPUTS}
+    shape = np.broadcast_shapes(*(col.shape for col in columns.values()))
+    columns = dict(zip(BATCH_INPUTS, np.broadcast_arrays(*columns.values())))
+    columns = {name: np.atleast_1d(col).ravel() for name, col in columns.items()}
+    columns["time_horizon"] = columns["time_horizon"].astype(int)
+    n = len(columns["time_horizon"])
+    for name, path in paths.items():
+        if path.ndim < 2:  # one expense growth rate per deal: a length-1 path
+            path = path[..., None]
+        path = np.broadcast_to(path, shape + path.shape[-1:]).reshape(n, path.shape[-1])
+        if name == "expense_growth_rate" and not path.any():
+            continue
+        columns[_yearly_key(name)] = path
+    return columns
+
+
+def _path_column(values):
+    """Float array of a driver column; a column of per-deal lists becomes (deals, longest path)."""
+    try:
+        return np.asarray(values, dtype=float)
+    except ValueError:  # ragged lists
+        pass
+    array = np.asarray(values, dtype=object)
+    if array.ndim != 1:
+        raise ValueError("per-year paths must be a (deals, years) array or one list per deal")
+    years = max(np.size(v) for v in array)
+    return np.stack([np.broadcast_to(_per_year(v, years), (years,)) for v in array])
+
+
+def _round2(values):
+    """np.round(values, 2), deferring to Python's round() on near-ties so batch == scalar exactly."""
+    values = np.asarray(values, dtype=float)
+    scaled = values * 100.0
+    whole = np.rint(scaled)  # np.round(values, 2) is rint(values * 100) / 100
+    rounded = np.asarray(whole / 100.0)
+    near_tie = np.abs(scaled - whole) > 0.5 - 1e-6
+    if near_tie.any():
+        rounded[near_tie] = [round(v, 2) for v in values[near_tie].tolist()]
+    return rounded
+
+
+@timed("calc.batch")
+def calculate_metrics_batch(*args, capex=None, tax=None, **kwargs):
+    """
+    Vectorized calculate_metrics over many deals at once.
+
+    Accepts the same ten inputs as calculate_metrics, either as arrays / scalars
+    (broadcast against each other) or as a single DataFrame / dict holding those
+    columns. Returns a dict of NumPy columns using the scalar result keys; the
+    per-year series in BATCH_SERIES_KEYS are 2-D and NaN-padded past each deal's
+    horizon. IRRs are NaN where the solver failed, with the reason in the
+    "IRR (Operational) Status" / "IRR (Total) Status" columns (irr_engine codes).
+    Use metrics_from_batch() to get the scalar-style dict for one row.
+
+    `capex` takes the same events as calculate_metrics (applied to every deal),
+    or an event table with a "deal" column holding the flat row each event
+    belongs to, for per-deal value-add plans.
+
+    `tax` adds the after-tax columns of calculate_metrics; TaxProfile fields
+    may be per-deal arrays (e.g. each investor's own bracket).
+    """
+    return _evaluate_batch(_batch_inputs(args, kwargs), capex, tax)
+
+
+def _year_one_batch(cols):
+    """
+    Loan terms and year-1 metrics for broadcastable inputs: no year axis, no IRR.
+
+    This is the cheap part of the batch engine, shared with ranking_engine's
+    pre-screen; values match the full engine exactly.
+    """
+    purchase_price = cols["purchase_price"]
+    down_payment_amount = purchase_price * (cols["down_payment_pct"] / 100.0)
+    loan_amount = purchase_price - down_payment_amount
+    monthly_rate = (cols["mortgage_rate"] / 100.0) / 12.0
+    n_payments = np.trunc(cols["mortgage_term"] * 12).astype(int)
+    monthly_mortgage_payment = _monthly_payment(loan_amount, monthly_rate, n_payments)
+
+    vacancy_factor = 1 - cols["vacancy_rate"] / 100.0
+    annual_rent = cols["monthly_rent"] * vacancy_factor * 12.0
+    annual_expenses = cols["monthly_expenses"] * 12.0
+    annual_mortgage = monthly_mortgage_payment * 12.0
+    annual_cash_flow = annual_rent - annual_expenses - annual_mortgage
+
+    has_price = purchase_price != 0
+    has_down = down_payment_amount != 0
+    safe_price = np.where(has_price, purchase_price, 1.0)
+    safe_down = np.where(has_down, down_payment_amount, 1.0)
+    return dict(
+        down_payment_amount=down_payment_amount,
+        loan_amount=loan_amount,
+        monthly_rate=monthly_rate,
+        n_payments=n_payments,
+        monthly_mortgage_payment=monthly_mortgage_payment,
+        vacancy_factor=vacancy_factor,
+        annual_expenses=annual_expenses,
+        has_down=has_down,
+        safe_down=safe_down,
+        cap_rate=np.where(has_price, ((annual_rent - annual_expenses) / safe_price) * 100.0, 0.0),
+        coc_return=np.where(has_down, (annual_cash_flow / safe_down) * 100.0, 0.0),
+    )
+
+
+def _evaluate_batch(cols, capex=None, tax=None):
+    """
+    Core of calculate_metrics_batch over broadcastable input arrays.
+
+    Inputs only need to broadcast against each other, so each intermediate is
+    computed on the shape of the inputs it depends on (e.g. the annuity factor on
+    the rate x term shape, rents on the rent x growth shape) and only combined
+    at the end. Outputs have the full broadcast shape, with a trailing year axis
+    for the per-year series. Per-year driver paths (_yearly_key columns) carry
+    their own year axis.
+    """
+    purchase_price = cols["purchase_price"]
+    time_horizon = cols["time_horizon"]
+    shape = np.broadcast_shapes(*(np.shape(cols[name]) for name in BATCH_INPUTS))
+    max_years = int(np.max(time_horizon, initial=0))
+
+    def driver(name):
+        """A driver's rates with the year axis last: its path fitted to max_years, else one rate per deal."""
+        key = _yearly_key(name)
+        if key in cols:
+            return _per_year(cols[key], max_years)
+        return np.asarray(cols[name] if name in cols else 0.0)[..., None]
+
+    def full(values, series=False):
+        return np.broadcast_to(values, shape + (max_years,) if series else shape).copy()
+
+    # ---- Loan basics and year-1 flows
+    year_one = _year_one_batch(cols)
+    down_payment_amount = year_one["down_payment_amount"]
+    monthly_mortgage_payment = year_one["monthly_mortgage_payment"]
+    annual_expenses = year_one["annual_expenses"]
+    has_down, safe_down = year_one["has_down"], year_one["safe_down"]
+    cap_rate, coc_return = year_one["cap_rate"], year_one["coc_return"]
+
+    # ---- Amortization over the longest horizon: yearly mortgage paid and balance owed
+    schedule = yearly_schedule(year_one["loan_amount"], year_one["monthly_rate"], year_one["n_payments"],
+                               monthly_mortgage_payment, max_years)
+
+    # ---- Multi-year projections: year axis last
+    years = np.arange(1, max_years + 1)
+    horizon = np.asarray(time_horizon)[..., None]
+    in_horizon = years <= horizon
+    outlay, uplift = _capex_grids(capex, max_years, int(np.prod(shape)))
+    if outlay is not None and outlay.ndim == 2:
+        outlay, uplift = outlay.reshape(shape + (max_years,)), uplift.reshape(shape + (max_years,))
+    monthly_rents = _growth_path(cols["monthly_rent"], 1 + driver("rent_growth_rate") / 100.0, max_years, uplift)
+    year_rent = monthly_rents * (1 - driver("vacancy_rate") / 100.0) * 12.0
+    annual_expenses = np.asarray(annual_expenses)[..., None]
+    if _yearly_key("expense_growth_rate") in cols:
+        annual_expenses = _growth_path(annual_expenses[..., 0], 1 + driver("expense_growth_rate") / 100.0, max_years)
+    net_operating_income = year_rent - annual_expenses
+    cash_flows = net_operating_income - schedule.payment
+    if outlay is not None:
+        cash_flows = cash_flows - outlay
+    cash_flows = _round2(cash_flows)
+    cash_flows = np.where(in_horizon, cash_flows, 0.0)
+    rents = _round2(monthly_rents * 12.0)
+
+    # ---- Appreciation: one rate compounds as (1 + a) ** t, a per-year path as its running product
+    if _yearly_key("appreciation_rate") in cols:
+        value_factor = 1 + driver("appreciation_rate") / 100.0
+        value_growth = np.cumprod(np.broadcast_to(value_factor, value_factor.shape[:-1] + (max_years,)), axis=-1)
+        if max_years:
+            final_index = np.maximum(horizon - 1, 0)
+            appreciation_growth = np.where(time_horizon > 0, np.take_along_axis(value_growth, final_index, axis=-1)[..., 0], 1.0)
+        else:
+            appreciation_growth = np.ones(np.shape(time_horizon))
+    else:
+        appreciation_growth = (1 + cols["appreciation_rate"] / 100.0) ** time_horizon
+        value_growth = (1 + np.asarray(cols["appreciation_rate"])[..., None] / 100.0) ** years
+
+    # ---- Sale value, net of the loan payoff, lands on each deal's final year
+    sale_value = purchase_price * appreciation_growth
+    last_year = years == horizon
+    exit_balance = np.where(last_year, schedule.balance, 0.0).sum(axis=-1)
+    net_sale_proceeds = sale_value - exit_balance
+    cash_flows_total = cash_flows + np.where(last_year, np.asarray(net_sale_proceeds)[..., None], 0.0)
+
+    # ---- Equity by year: appreciated value minus what is still owed
+    property_values = np.asarray(purchase_price)[..., None] * value_growth
+    equity = _round2(property_values - schedule.balance)
+
+    # ---- After tax: same kernel as the scalar engine, on the whole year grid
+    tax = tax_profile(tax)
+    if tax is not None:
+        after_tax = _after_tax(tax, purchase_price, down_payment_amount, net_operating_income, schedule.interest,
+                               outlay, cash_flows, in_horizon, sale_value, net_sale_proceeds)
+
+    # ---- IRR: operational, total (and after-tax) rows solved together (zero padding past the horizon is harmless)
+    n_deals = int(np.prod(shape))
+    initial = full(-down_payment_amount).reshape(n_deals, 1)
+    irr_rows = [
+        np.hstack([initial, full(cash_flows, series=True).reshape(n_deals, max_years)]),
+        np.hstack([initial, full(cash_flows_total, series=True).reshape(n_deals, max_years)]),
+    ]
+    if tax is not None:
+        irr_rows.append(np.hstack([initial, full(after_tax["after_tax_total"], series=True).reshape(n_deals, max_years)]))
+    irr_values, irr_status = _irr_percent(np.vstack(irr_rows))
+    irr_operational, irr_total = irr_values[:n_deals].reshape(shape), irr_values[n_deals:2 * n_deals].reshape(shape)
+
+    # ---- Equity multiple
+    total_cash_received = np.cumsum(cash_flows_total, axis=-1)[..., -1] if max_years else 0.0
+    equity_multiple = np.where(has_down, _round2(total_cash_received / safe_down), 0.0)
+
+    # ---- ROI by year (linearized appreciation, same heuristic as the scalar engine)
+    appreciation_value_total = purchase_price * (appreciation_growth - 1)
+    safe_horizon = np.where(horizon > 0, horizon, 1)
+    linearized_app = np.asarray(appreciation_value_total)[..., None] * (years / safe_horizon)
+    cum_cf = np.cumsum(cash_flows, axis=-1)
+    roi = np.where(has_down[..., None], ((cum_cf + linearized_app) / safe_down[..., None]) * 100.0, 0.0)
+    roi = full(_round2(roi), series=True)
+
+    # ---- Grade
+    grade = np.select(
+        [coc_return >= 15, coc_return >= 12, coc_return >= 9, coc_return >= 6],
+        ["A", "B", "C", "D"],
+        default="F",
+    )
+
+    if max_years:
+        final_index = full(np.maximum(time_horizon - 1, 0))[..., None]
+        final_roi = np.where(full(time_horizon) > 0, np.take_along_axis(roi, final_index, axis=-1)[..., 0], 0.0)
+        first_cash_flow = full(cash_flows[..., 0])
+    else:
+        final_roi = first_cash_flow = np.zeros(shape)
+
+    results = {
+        "Cap Rate (%)": full(_round2(cap_rate)),
+        "Cash-on-Cash Return (%)": full(_round2(coc_return)),
+        "Final Year ROI (%)": final_roi,
+        "First Year Cash Flow ($)": first_cash_flow,
+        "Monthly Mortgage ($)": full(_round2(monthly_mortgage_payment)),
+        "Grade": full(grade),
+        "Multi-Year Cash Flow": full(np.where(in_horizon, cash_flows, np.nan), series=True),
+        "Annual ROI % (by year)": np.where(in_horizon, roi, np.nan),
+        "Annual Rents $ (by year)": full(np.where(in_horizon, rents, np.nan), series=True),
         "IRR (Operational) (%)": irr_operational,
         "IRR (Total incl. Sale) (%)": irr_total,
-        "equity_multiple": equity_multiple
+        "equity_multiple": full(equity_multiple),
+        "Net Sale Proceeds ($)": full(_round2(net_sale_proceeds)),
+        "Loan Balance $ (by year)": full(np.where(in_horizon, _round2(schedule.balance), np.nan), series=True),
+        "Equity $ (by year)": full(np.where(in_horizon, equity, np.nan), series=True),
+        "IRR (Operational) Status": irr_status[:n_deals].reshape(shape),
+        "IRR (Total) Status": irr_status[n_deals:2 * n_deals].reshape(shape),
+        "Time Horizon": full(time_horizon),
     }
+    if tax is not None:
+        def series(values):
+            return full(np.where(in_horizon, values, np.nan), series=True)
+
+        results.update({
+            "After-Tax IRR (%)": irr_values[2 * n_deals:].reshape(shape),
+            "After-Tax Equity Multiple": full(after_tax["equity_multiple"]),
+            "After-Tax Sale Proceeds ($)": full(after_tax["after_tax_sale_proceeds"]),
+            "Depreciation Recapture Tax ($)": full(after_tax["recapture_tax"]),
+            "Capital Gains Tax ($)": full(after_tax["capital_gains_tax"]),
+            "After-Tax Cash Flow": series(after_tax["after_tax_cash_flows"]),
+            "Depreciation $ (by year)": series(after_tax["depreciation"]),
+            "Taxable Income $ (by year)": series(after_tax["taxable_income"]),
+            "Income Tax $ (by year)": series(after_tax["income_tax"]),
+            "After-Tax IRR Status": irr_status[2 * n_deals:].reshape(shape),
+        })
+    return results
+
+
+def metrics_from_batch(batch, index):
+    """Return row `index` of a calculate_metrics_batch result as a DealMetrics (same as calculate_metrics)."""
+    horizon = int(batch["Time Horizon"][index])
+
+    def value(key):
+        return batch[key][index].item()
+
+    return DealMetrics(
+        cap_rate=value("Cap Rate (%)"),
+        cash_on_cash=value("Cash-on-Cash Return (%)"),
+        final_year_roi=value("Final Year ROI (%)"),
+        first_year_cash_flow=value("First Year Cash Flow ($)"),
+        monthly_mortgage=value("Monthly Mortgage ($)"),
+        grade=value("Grade"),
+        irr_operational=value("IRR (Operational) (%)"),
+        irr_total=value("IRR (Total incl. Sale) (%)"),
+        equity_multiple=value("equity_multiple"),
+        net_sale_proceeds=value("Net Sale Proceeds ($)"),
+        series=[batch[key][index, :horizon] for key in BATCH_SERIES_KEYS],
+        extra=({key: value(key) for key in AFTER_TAX_KEYS}
+               | {key: batch[key][index, :horizon].tolist() for key in AFTER_TAX_SERIES_KEYS}
+               if "After-Tax IRR (%)" in batch else None),
+    )
@@ -0,0 +1,323 @@
+"""
+Chart rendering from metric arrays, cached by content.
+
+Every chart the pages show is a function of a few arrays, so it is rendered
+once per distinct content and handed to st.image as PNG (or SVG) bytes:
+
+1. the arrays are hashed together with the chart name, format and dpi
+2. the bytes come from a bounded in-memory LRU, then from the persistent
+   disk cache (disk_cache.py), and only on a miss is anything drawn
+3. drawing uses a bare matplotlib Figure, never pyplot: nothing is
+   registered in pyplot's global figure list, the figure is cleared right
+   after it is saved, and matplotlib is only imported on the first miss
+
+So a rerun with unchanged inputs (or a repeat scenario after a restart)
+does no rasterizing at all, and long sessions don't accumulate figures.
+"""
+import io
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from disk_cache import DISK_CACHE, fingerprint
+from instrumentation import increment, span
+
+FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+DEFAULT_DPI = 200  # what st.pyplot used
+DEFAULT_MEMORY_MB = 32
+
+
+class ChartCache:
+    """Byte-bounded LRU of rendered charts with hit / miss counters."""
+
+    def __init__(self, max_bytes=DEFAULT_MEMORY_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.renders = 0
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return data
+
+    def put(self, key, data):
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, dropped = self._entries.popitem(last=False)
+                self._bytes -= len(dropped)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.disk_hits = self.renders = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "renders": self.renders,
+            }
+
+
+# One cache per process, shared by every Streamlit session
+CHART_CACHE = ChartCache()
+
+
+def _figure_bytes(draw, data, fmt, dpi, figsize):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    buffer = io.BytesIO()
+    try:
+        draw(fig, *data)
+        fig.savefig(buffer, format=fmt, dpi=dpi, bbox_inches="tight")
+    finally:
+        fig.clear()  # drop the artists now rather than whenever the GC gets to them
+    return buffer.getvalue()
+
+
+def render(name, draw, *data, fmt="png", dpi=DEFAULT_DPI, figsize=(6.4, 4.8)):
+    """
+    Bytes of the chart draw(fig, *data) produces.
+
+    `data` must be everything the chart shows (arrays, numbers, labels);
+    it is what the cache key is built from.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown chart format {fmt!r}; choose one of {', '.join(FORMATS)}")
+    key = fingerprint(name, fmt, dpi, figsize, data)
+    chart = CHART_CACHE.get(key)
+    if chart is not None:
+        increment("chart.hit")
+        return chart
+
+    disk_key = DISK_CACHE.key("chart", key) if DISK_CACHE is not None else None  # adds chart_engine.py's version
+    chart = DISK_CACHE.get("chart", disk_key) if disk_key else None
+    if chart is not None:
+        CHART_CACHE.disk_hits += 1
+    else:
+        with span("chart"):
+            chart = _figure_bytes(draw, data, fmt, dpi, figsize)
+        CHART_CACHE.renders += 1
+        increment("chart.render")
+        if disk_key:
+            DISK_CACHE.put("chart", disk_key, chart)
+    CHART_CACHE.put(key, chart)
+    return chart
+
+
+def _years(values):
+    return np.arange(1, len(values) + 1)
+
+
+def _merge_legends(ax, ax2, loc):
+    lines, labels = ax.get_legend_handles_labels()
+    lines2, labels2 = ax2.get_legend_handles_labels()
+    ax.legend(lines + lines2, labels + labels2, loc=loc)
+
+
+# ---- Single property
+def _draw_cash_flow(fig, cash_flows, rents, roi):
+    years = _years(cash_flows)
+    ax = fig.subplots()
+    ax.plot(years, cash_flows, marker='o', label="Multi-Year Cash Flow ($)")
+    ax.plot(years, rents, marker='s', linestyle='--', label="Projected Rent ($)")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Projected Cash Flow / Rent ($)")
+    ax.grid(True)
+    ax2 = ax.twinx()
+    ax2.plot(years, roi, color='green', marker='^', label="ROI (%)")
+    ax2.set_ylabel("ROI (%)", color='green')
+    _merge_legends(ax, ax2, "upper left")
+    ax.set_title("Multi - Year Projected Cash Flow & ROI")
+
+
+def cash_flow_chart(cash_flows, rents, roi, fmt="png"):
+    """Cash flow + rent (left axis) and ROI (right axis) by year."""
+    return render("cash_flow", _draw_cash_flow, np.asarray(cash_flows, dtype=float),
+                  np.asarray(rents, dtype=float), np.asarray(roi, dtype=float), fmt=fmt)
+
+
+def _draw_equity(fig, equity, loan_balance):
+    years = _years(equity)
+    ax = fig.subplots()
+    ax.bar(years, equity, color='seagreen', alpha=0.6, label="Equity ($)")
+    ax.plot(years, loan_balance, color='indianred', marker='o', label="Loan Balance ($)")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Dollars ($)")
+    ax.grid(True)
+    ax.legend(loc="upper left")
+    ax.set_title("Remaining Loan Balance vs Equity")
+
+
+def equity_chart(equity, loan_balance, fmt="png"):
+    """Equity bars against the remaining loan balance by year."""
+    return render("equity", _draw_equity, np.asarray(equity, dtype=float), np.asarray(loan_balance, dtype=float), fmt=fmt)
+
+
+def _draw_exit_years(fig, years, irr_total, equity_multiple, best_year, best_irr, horizon):
+    ax = fig.subplots()
+    ax.plot(years, irr_total, color='navy', marker='o', label="IRR incl. Sale (%)")
+    if best_year:
+        ax.scatter([best_year], [best_irr], s=120, color='gold', edgecolor='black', zorder=3, label="Best Exit Year")
+    ax.axvline(horizon, color='gray', linestyle=':', label="Selected Horizon")
+    ax.set_xlabel("Exit Year")
+    ax.set_ylabel("IRR (%)")
+    ax.grid(True)
+    ax2 = ax.twinx()
+    ax2.plot(years, equity_multiple, color='darkorange', linestyle='--', label="Equity Multiple")
+    ax2.set_ylabel("Equity Multiple (x)", color='darkorange')
+    _merge_legends(ax, ax2, "best")
+    ax.set_title("IRR & Equity Multiple by Exit Year")
+
+
+def exit_year_chart(exits, horizon, fmt="png"):
+    """IRR and equity multiple by exit year, from a projection_engine.ExitAnalysis."""
+    return render("exit_years", _draw_exit_years, exits.years, exits.irr_total, exits.equity_multiple,
+                  exits.best_year, exits.best_irr, horizon, fmt=fmt)
+
+
+def _draw_roi_fan(fig, roi_fan, n_paths):
+    years = _years(roi_fan[0])
+    ax = fig.subplots()
+    ax.fill_between(years, roi_fan[0], roi_fan[4], color='green', alpha=0.15, label="5th–95th percentile")
+    ax.fill_between(years, roi_fan[1], roi_fan[3], color='green', alpha=0.35, label="25th–75th percentile")
+    ax.plot(years, roi_fan[2], color='darkgreen', marker='o', label="Median ROI (%)")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("ROI (%)")
+    ax.grid(True)
+    ax.legend(loc="upper left")
+    ax.set_title(f"Simulated ROI Range ({n_paths:,} paths)")
+
+
+def roi_fan_chart(roi_fan, n_paths, fmt="png"):
+    """Monte Carlo ROI percentile fan (rows P5, P25, P50, P75, P95)."""
+    return render("roi_fan", _draw_roi_fan, np.asarray(roi_fan, dtype=float), int(n_paths), fmt=fmt)
+
+
+# ---- Two properties
+def _draw_dual_cash_flow(fig, cf_a, rent_a, roi_a, cf_b, rent_b, roi_b):
+    ax1 = fig.subplots()
+    years_a, years_b = _years(cf_a), _years(cf_b)
+    # Primary Y-axis: Cash Flow & Rent
+    ax1.plot(years_a, cf_a, marker='o', label="Cash Flow A ($)", color='blue')
+    ax1.plot(years_b, cf_b, marker='o', label="Cash Flow B ($)", color='skyblue')
+    ax1.plot(years_a, rent_a, marker='s', linestyle='--', label="Rent A ($)", color='orange')
+    ax1.plot(years_b, rent_b, marker='s', linestyle='--', label="Rent B ($)", color='goldenrod')
+    ax1.set_xlabel("Year")
+    ax1.set_ylabel("Cash Flow / Rent ($)")
+    ax1.grid(True)
+    # Secondary Y-axis: ROI
+    ax2 = ax1.twinx()
+    ax2.plot(years_a, roi_a, marker='^', linestyle='-', label="ROI A (%)", color='green')
+    ax2.plot(years_b, roi_b, marker='^', linestyle='--', label="ROI B (%)", color='darkgreen')
+    ax2.set_ylabel("ROI (%)", color='green')
+    ax2.tick_params(axis='y', labelcolor='green')
+    _merge_legends(ax1, ax2, "upper left")
+    ax1.set_title("Projected Cash Flow, Rent, and ROI Over Time")
+
+
+def _trimmed(cash_flows, rents, roi):
+    """One property's three series cut to their common length."""
+    n = min(len(cash_flows), len(rents), len(roi))
+    return [np.asarray(values[:n], dtype=float) for values in (cash_flows, rents, roi)]
+
+
+def dual_cash_flow_chart(series_a, series_b, fmt="png"):
+    """The 6-curve A vs B chart; each series is (cash_flows, rents, roi) over that property's own horizon."""
+    return render("dual_cash_flow", _draw_dual_cash_flow, *_trimmed(*series_a), *_trimmed(*series_b), fmt=fmt)
+
+
+def _draw_dual_roi_fan(fig, fan_a, fan_b, n_paths):
+    ax = fig.subplots()
+    for fan, color, label in [(fan_a, 'blue', "A"), (fan_b, 'orange', "B")]:
+        years = _years(fan[0])
+        ax.fill_between(years, fan[0], fan[4], color=color, alpha=0.12)
+        ax.fill_between(years, fan[1], fan[3], color=color, alpha=0.3, label=f"ROI {label} 25th–75th (%)")
+        ax.plot(years, fan[2], color=color, marker='o', label=f"Median ROI {label} (%)")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("ROI (%)")
+    ax.grid(True)
+    ax.legend(loc="upper left")
+    ax.set_title(f"Simulated ROI Range, A vs B ({n_paths:,} paths each)")
+
+
+def dual_roi_fan_chart(fan_a, fan_b, n_paths, fmt="png"):
+    return render("dual_roi_fan", _draw_dual_roi_fan, np.asarray(fan_a, dtype=float),
+                  np.asarray(fan_b, dtype=float), int(n_paths), fmt=fmt)
+
+
+# ---- Sensitivity and comparison pages
+def _draw_heatmap(fig, values, x_values, y_values, x_base, y_base, x_label, y_label, metric_label):
+    ax = fig.subplots()
+    image = ax.imshow(values, origin="lower", aspect="auto", cmap="RdYlGn",
+                      extent=[x_values[0], x_values[-1], y_values[0], y_values[-1]])
+    ax.contour(x_values, y_values, values, colors="black", linewidths=0.5, levels=8)
+    ax.axvline(x_base, color="white", linestyle="--", linewidth=1)
+    ax.axhline(y_base, color="white", linestyle="--", linewidth=1)
+    ax.set_xlabel(x_label)
+    ax.set_ylabel(y_label)
+    ax.set_title(f"{metric_label} across {len(y_values)} x {len(x_values)} scenarios")
+    fig.colorbar(image, ax=ax, label=metric_label)
+
+
+def heatmap_chart(values, x_values, y_values, x_base, y_base, x_label, y_label, metric_label, fmt="png"):
+    """Metric grid (rows = y) with contours and the base case marked."""
+    return render("heatmap", _draw_heatmap, np.asarray(values, dtype=float), np.asarray(x_values, dtype=float),
+                  np.asarray(y_values, dtype=float), x_base, y_base, x_label, y_label, metric_label,
+                  fmt=fmt, figsize=(8, 5))
+
+
+def _draw_tornado(fig, lows, highs, base_value, labels, metric_label):
+    ax = fig.subplots()
+    for i, (low, high) in enumerate(zip(lows, highs)):
+        ax.barh(i, low - base_value, left=base_value, color="indianred")
+        ax.barh(i, high - base_value, left=base_value, color="seagreen")
+    ax.set_yticks(range(len(labels)))
+    ax.set_yticklabels(labels, fontsize=8)
+    ax.axvline(base_value, color="black", linewidth=0.8)
+    ax.set_xlabel(metric_label)
+    ax.set_title("Metric at low (red) vs high (green) input")
+
+
+def tornado_chart(lows, highs, base_value, labels, metric_label, fmt="png"):
+    """Horizontal low / high bars around the base value, first row at the bottom."""
+    return render("tornado", _draw_tornado, np.asarray(lows, dtype=float), np.asarray(highs, dtype=float),
+                  float(base_value), list(labels), metric_label, fmt=fmt, figsize=(8, 4))
+
+
+def _draw_frontier(fig, names, coc, irr, sizes, pareto):
+    ax = fig.subplots()
+    ax.scatter(coc[~pareto], irr[~pareto], s=sizes[~pareto], color='lightsteelblue', edgecolor='gray', label="Dominated")
+    ax.scatter(coc[pareto], irr[pareto], s=sizes[pareto], color='gold', edgecolor='black', label="Pareto Frontier")
+    for x, y, name in zip(coc, irr, names):
+        ax.annotate(name, (x, y), textcoords="offset points", xytext=(5, 5), fontsize=8)
+    ax.set_xlabel("Cash-on-Cash Return (%)")
+    ax.set_ylabel("IRR (Total incl. Sale) (%)")
+    ax.grid(True)
+    ax.legend(loc="best")
+    ax.set_title(f"{len(names)} Properties (bubble size = equity multiple)")
+
+
+def frontier_chart(names, coc, irr, equity_multiple, pareto, fmt="png"):
+    """IRR vs Cash-on-Cash scatter, bubble size = equity multiple, frontier highlighted."""
+    sizes = 60 * np.clip(np.nan_to_num(np.asarray(equity_multiple, dtype=float)), 0.2, None)
+    return render("frontier", _draw_frontier, list(names), np.asarray(coc, dtype=float), np.asarray(irr, dtype=float),
+                  sizes, np.asarray(pareto, dtype=bool), fmt=fmt, figsize=(8, 5))
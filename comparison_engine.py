@@ -0,0 +1,72 @@
+"""
+N-property comparison.
+
+Evaluates any number of properties in one calculate_metrics_batch call and
+finds the Pareto frontier on total IRR, Cash-on-Cash and equity multiple:
+the properties no other property beats on all three at once. Everything is
+column arrays, so 20 properties cost about the same as 2.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from calc_engine import BATCH_INPUTS, calculate_metrics_batch
+
+# Higher is better for all of them
+PARETO_METRICS = ("IRR (Total incl. Sale) (%)", "Cash-on-Cash Return (%)", "equity_multiple")
+
+
+class Comparison(NamedTuple):
+    names: list                 # one label per property, input order
+    inputs: dict                # the ten input columns
+    metrics: dict               # calculate_metrics_batch columns, one row per property
+    pareto: np.ndarray          # True where the property is on the frontier
+    dominated_by: np.ndarray    # how many properties beat each one on every Pareto metric
+    rank: np.ndarray            # 1 = best, by total IRR (unsolvable IRRs last)
+
+
+def pareto_frontier(values):
+    """
+    Non-dominated rows of `values` (n rows x m metrics, higher is better).
+
+    Returns (on_frontier mask, dominated_by count). A row is dominated when
+    another row is >= on every metric and > on at least one; NaN counts as
+    the worst possible value.
+    """
+    values = np.nan_to_num(np.asarray(values, dtype=float), nan=-np.inf)
+    if values.ndim != 2:
+        raise ValueError("values must be a 2-D (rows x metrics) array")
+    # (i, j): does row j dominate row i
+    at_least = (values[None, :, :] >= values[:, None, :]).all(axis=-1)
+    better = (values[None, :, :] > values[:, None, :]).any(axis=-1)
+    dominated_by = (at_least & better).sum(axis=1)
+    return dominated_by == 0, dominated_by
+
+
+def compare_properties(properties, names=None):
+    """
+    Evaluate and compare properties.
+
+    `properties` is a DataFrame / dict of input columns (one row per property)
+    or a list of input dicts; `names` defaults to a "name" column / key when
+    there is one, else "Property 1", "Property 2", ...
+    """
+    if isinstance(properties, (list, tuple)):
+        if names is None and properties and all("name" in p for p in properties):
+            names = [p["name"] for p in properties]
+        properties = {name: [p[name] for p in properties] for name in BATCH_INPUTS}
+    elif names is None and "name" in properties:
+        names = list(properties["name"])
+
+    inputs = {name: np.asarray(properties[name], dtype=float) for name in BATCH_INPUTS}
+    n = len(inputs["purchase_price"])
+    names = [str(name) for name in names] if names is not None else [f"Property {i + 1}" for i in range(n)]
+    if len(names) != n:
+        raise ValueError(f"Got {len(names)} names for {n} properties")
+
+    metrics = calculate_metrics_batch(inputs)
+    pareto, dominated_by = pareto_frontier(np.column_stack([metrics[key] for key in PARETO_METRICS]))
+    irr = np.nan_to_num(np.asarray(metrics["IRR (Total incl. Sale) (%)"], dtype=float), nan=-np.inf)
+    rank = np.empty(n, dtype=int)
+    rank[np.argsort(-irr, kind="stable")] = np.arange(1, n + 1)
+    return Comparison(names, inputs, metrics, pareto, dominated_by, rank)
@@ -0,0 +1,265 @@
+"""
+Persistent, content-addressed result cache (one SQLite file).
+
+Every Streamlit process starts cold, and every session recomputes the same
+popular scenarios. This cache keeps metric results, rendered chart PNGs and
+PDF bytes on disk, so a restarted server serves repeat scenarios straight
+from the file.
+
+Keys are a hash of the content (inputs, metrics, text...) plus a version
+hash of the source files that produce it, e.g. calc_engine.py for metrics
+and calc_engine.py + pdf_single.py / pdf_dual.py for PDFs. Editing any of
+those files changes the version, so stale entries simply stop matching;
+they are purged when the cache is opened and otherwise age out through the
+size-bounded LRU eviction. Lookups also match the version column, so an
+older process still writing to the same file is never served.
+
+    DEAL_ANALYZER_DISK_CACHE=path/to/cache.sqlite   where to keep it (default .cache/ next to the app)
+    DEAL_ANALYZER_DISK_CACHE=off                    disable it
+    DEAL_ANALYZER_DISK_CACHE_MB=256                 size limit
+"""
+import hashlib
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections.abc import Mapping
+
+import numpy as np
+
+from instrumentation import increment
+
+log = logging.getLogger("deal_analyzer.cache")
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATH = os.path.join(APP_DIR, ".cache", "deal_analyzer.sqlite")
+DEFAULT_MAX_MB = 256
+
+# Source files behind each kind of entry; editing one invalidates that kind. The pages compute
+# "metrics" entries through result_cache with Projection.calculate, so every module on that path counts
+ENGINE_FILES = ("calc_engine.py", "projection_engine.py", "amortization_engine.py", "irr_engine.py",
+                "deal_metrics.py", "result_cache.py", "instrumentation.py")
+PDF_FILES = ("pdf_single.py", "pdf_dual.py", "pdf_multi.py")
+KIND_SOURCES = {
+    "metrics": ENGINE_FILES,
+    "pdf": ENGINE_FILES + PDF_FILES,
+    "chart": ("chart_engine.py",),
+}
+
+
+def source_version(files):
+    """Hash of the given app files' contents (missing files hash as empty)."""
+    digest = hashlib.blake2b(digest_size=8)
+    for name in files:
+        digest.update(name.encode())
+        try:
+            with open(os.path.join(APP_DIR, name), "rb") as f:
+                digest.update(f.read())
+        except OSError:
+            pass
+    return digest.hexdigest()
+
+
+def _feed(digest, value):
+    """Canonical, type-tagged encoding of `value` into `digest`."""
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            _feed(digest, value.tolist())
+        else:
+            digest.update(f"a{value.dtype.str}{value.shape}".encode())
+            digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, Mapping):
+        items = sorted((str(key), item) for key, item in value.items())
+        digest.update(f"d{len(items)}".encode())
+        for key, item in items:
+            _feed(digest, key)
+            _feed(digest, item)
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"l{len(value)}".encode())
+        for item in value:
+            _feed(digest, item)
+    elif isinstance(value, (bool, np.bool_)):
+        digest.update(b"T" if value else b"F")
+    elif isinstance(value, (int, float, np.integer, np.floating)):
+        value = float(value)
+        digest.update(f"n{0.0 if value == 0 else value!r};".encode())  # 3 == 3.0, -0.0 == 0.0
+    elif isinstance(value, str):
+        data = value.encode()
+        digest.update(f"s{len(data)}:".encode())
+        digest.update(data)
+    elif value is None:
+        digest.update(b"N")
+    else:
+        raise TypeError(f"Cannot fingerprint {type(value).__name__}")
+
+
+def fingerprint(*parts):
+    """Content hash of nested dicts / lists / arrays / scalars / strings (DealMetrics included)."""
+    digest = hashlib.blake2b(digest_size=16)
+    _feed(digest, parts)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    Size-bounded LRU of bytes in one SQLite file, safe across threads and processes.
+
+    Values are stored under (kind, key); `key()` builds content keys that
+    already include the kind's source version.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, max_bytes=DEFAULT_MAX_MB * 1024 * 1024, sources=KIND_SOURCES):
+        self.path = path
+        self.max_bytes = int(max_bytes)
+        self.versions = {kind: source_version(files) for kind, files in sources.items()}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " kind TEXT NOT NULL, key TEXT NOT NULL, version TEXT NOT NULL,"
+            " value BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL,"
+            " PRIMARY KEY (kind, key))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self.purge_stale()
+
+    def key(self, kind, *parts):
+        """Content key for `parts` under `kind`'s current source version."""
+        return fingerprint(kind, self.versions.get(kind, ""), parts)
+
+    def get(self, kind, key):
+        """Stored bytes, or None (also for entries another process wrote under a different version)."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM entries WHERE kind = ? AND key = ? AND version = ?",
+                (kind, key, self.versions.get(kind, "")),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                increment("disk_cache.miss")
+                return None
+            self._db.execute("UPDATE entries SET accessed = ? WHERE kind = ? AND key = ?", (time.time(), kind, key))
+            self.hits += 1
+        increment("disk_cache.hit")
+        return row[0]
+
+    def put(self, kind, key, value):
+        value = bytes(value)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (kind, key, version, value, size, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, key, self.versions.get(kind, ""), value, len(value), time.time()),
+            )
+            self._evict()
+
+    def get_or_compute(self, kind, key, compute):
+        """Bytes for `key`, running compute() (which returns bytes) and storing the result on a miss."""
+        value = self.get(kind, key)
+        if value is None:
+            value = compute()
+            self.put(kind, key, value)
+        return value
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used entries until 10% below the limit, so this doesn't run on every put
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        for kind, key, size in self._db.execute("SELECT kind, key, size FROM entries ORDER BY accessed").fetchall():
+            if freed >= target:
+                break
+            self._db.execute("DELETE FROM entries WHERE kind = ? AND key = ?", (kind, key))
+            freed += size
+            self.evictions += 1
+        log.debug("disk cache evicted %d bytes", freed)
+
+    def purge_stale(self):
+        """Delete entries written by an older version of their kind's source files."""
+        with self._lock:
+            removed = 0
+            for kind, version in self.versions.items():
+                removed += self._db.execute("DELETE FROM entries WHERE kind = ? AND version != ?", (kind, version)).rowcount
+        if removed:
+            log.debug("disk cache purged %d stale entries", removed)
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "path": self.path,
+                "entries": entries,
+                "bytes": size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def open_default():
+    """The cache configured by the environment, or None when it is off or can't be opened."""
+    path = os.getenv("DEAL_ANALYZER_DISK_CACHE", DEFAULT_PATH)
+    if path.lower() in ("", "0", "off", "false", "no"):
+        return None
+    try:
+        return DiskCache(path, float(os.getenv("DEAL_ANALYZER_DISK_CACHE_MB", DEFAULT_MAX_MB)) * 1024 * 1024)
+    except (OSError, sqlite3.Error) as e:
+        log.warning("disk cache disabled: %s", e)
+        return None
+
+
+# One cache file per process (shared with other processes through SQLite)
+DISK_CACHE = open_default()
+
+
+# ---- Typed helpers (all fall back to computing when the cache is off; charts: chart_engine.render)
+def load_metrics(key):
+    if DISK_CACHE is None:
+        return None
+    value = DISK_CACHE.get("metrics", DISK_CACHE.key("metrics", key))
+    return pickle.loads(value) if value is not None else None
+
+
+def store_metrics(key, metrics):
+    if DISK_CACHE is not None:
+        # Versioned like the pdf and chart keys, so processes on older engine files never share entries
+        DISK_CACHE.put("metrics", DISK_CACHE.key("metrics", key), pickle.dumps(metrics, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _pdf_bytes(pdf):
+    return pdf.getvalue() if hasattr(pdf, "getvalue") else pdf  # the generators return BytesIO or bytes
+
+
+def cached_pdf(generate, *args, **kwargs):
+    """
+    generate(*args, **kwargs) as PDF bytes, served from disk when the same
+    report was built before (same generator, same arguments).
+    """
+    if DISK_CACHE is None:
+        return _pdf_bytes(generate(*args, **kwargs))
+    key = DISK_CACHE.key("pdf", generate.__module__, generate.__qualname__, args, kwargs)
+    pdf = DISK_CACHE.get("pdf", key)
+    if pdf is None:
+        pdf = _pdf_bytes(generate(*args, **kwargs))
+        if pdf is not None:
+            DISK_CACHE.put("pdf", key, pdf)
+    return pdf
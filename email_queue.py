@@ -0,0 +1,294 @@
+"""
+Background email delivery.
+
+The "Send Email Report" buttons used to open a fresh SMTP connection, run
+STARTTLS and log in while the page script waited, freezing the session for
+seconds. Now they submit() a message and return at once; a worker thread
+delivers it:
+
+- bounded queue: submit() raises queue.Full instead of piling up work
+- one pooled, authenticated connection per worker, reused across messages
+  and re-opened when the server drops it or it has sat idle too long
+- transient failures (disconnects, timeouts, 4xx replies) are retried with
+  exponential backoff; permanent ones (5xx, bad login, refused recipient)
+  fail right away
+- every job has a status the page can poll: queued -> sending -> sent, or
+  retrying / failed with the last error
+
+Attachments may be bytes or a zero-argument callable (e.g. a pdf_jobs
+PdfJob), which is then rendered on the worker, not on the page.
+
+    SMTP_HOST=smtp.gmail.com   SMTP_PORT=587   SMTP_STARTTLS=1   (defaults)
+    EMAIL_USER / EMAIL_PASSWORD                login (skipped when EMAIL_USER is unset)
+    SMTP_HOST=127.0.0.1 SMTP_PORT=1025 SMTP_STARTTLS=0   a local stand-in server
+"""
+import heapq
+import itertools
+import logging
+import os
+import queue
+import smtplib
+import threading
+import time
+import uuid
+from email.message import EmailMessage
+
+from instrumentation import increment, span
+
+log = logging.getLogger("deal_analyzer.email")
+
+DEFAULT_MAX_QUEUED = 100
+DEFAULT_MAX_ATTEMPTS = 4
+DEFAULT_BACKOFF_S = 2.0       # 2 s, 4 s, 8 s ...
+MAX_BACKOFF_S = 60.0
+IDLE_RECONNECT_S = 60.0       # check a pooled connection with NOOP after this long unused
+MAX_HISTORY = 1000            # finished jobs kept for status()
+SMTP_TIMEOUT_S = 20.0
+
+TRANSIENT_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError)
+
+
+def smtp_settings():
+    """SMTP connection settings from the environment."""
+    return {
+        "host": os.getenv("SMTP_HOST", "smtp.gmail.com"),
+        "port": int(os.getenv("SMTP_PORT", "587")),
+        "starttls": os.getenv("SMTP_STARTTLS", "1").lower() not in ("0", "false", "no", "off"),
+        "user": os.getenv("EMAIL_USER"),
+        "password": os.getenv("EMAIL_PASSWORD"),
+    }
+
+
+def is_transient(error):
+    """Worth retrying? Connection problems and 4xx replies are; 5xx replies and bad logins aren't."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, (smtplib.SMTPAuthenticationError, smtplib.SMTPNotSupportedError)):
+        return False
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+class _Job:
+    __slots__ = ("id", "recipient", "subject", "body", "attachment", "filename",
+                 "status", "attempts", "error", "submitted", "finished")
+
+    def __init__(self, recipient, subject, body, attachment, filename):
+        self.id = uuid.uuid4().hex[:12]
+        self.recipient = recipient
+        self.subject = subject
+        self.body = body
+        self.attachment = attachment
+        self.filename = filename
+        self.status = "queued"
+        self.attempts = 0
+        self.error = None
+        self.submitted = time.time()
+        self.finished = None
+
+    def snapshot(self):
+        return {
+            "id": self.id,
+            "recipient": self.recipient,
+            "status": self.status,
+            "attempts": self.attempts,
+            "error": self.error,
+            "submitted": self.submitted,
+            "finished": self.finished,
+        }
+
+
+class _Connection:
+    """One worker's pooled SMTP connection."""
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.smtp = None
+        self.last_used = 0.0
+
+    def get(self):
+        if self.smtp is not None and time.monotonic() - self.last_used > IDLE_RECONNECT_S:
+            try:
+                self.smtp.noop()
+            except TRANSIENT_ERRORS + (smtplib.SMTPException,):
+                self.close()
+        if self.smtp is None:
+            settings = self.settings
+            smtp = smtplib.SMTP(settings["host"], settings["port"], timeout=SMTP_TIMEOUT_S)
+            try:
+                if settings["starttls"]:
+                    smtp.starttls()
+                if settings["user"]:
+                    smtp.login(settings["user"], settings["password"])
+            except BaseException:
+                smtp.close()
+                raise
+            self.smtp = smtp
+            increment("email.connect")
+            log.debug("smtp connected to %s:%s", settings["host"], settings["port"])
+        return self.smtp
+
+    def close(self):
+        if self.smtp is not None:
+            try:
+                self.smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                self.smtp.close()
+            self.smtp = None
+
+
+class EmailQueue:
+    """
+    Bounded background delivery queue; submit() returns a job id, status(job_id) reports on it.
+
+    Workers start on the first submit and are daemon threads.
+    """
+
+    def __init__(self, max_queued=DEFAULT_MAX_QUEUED, workers=1, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                 backoff_s=DEFAULT_BACKOFF_S, settings=None, sender=None):
+        self.max_queued = max_queued
+        self.n_workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_s = backoff_s
+        self.settings = settings
+        self.sender = sender
+        self._ready = []              # (due time, sequence, job) min-heap; retries wait here too
+        self._sequence = itertools.count()
+        self._jobs = {}
+        self._pending = 0             # queued + retrying + sending
+        self._cond = threading.Condition()
+        self._workers = []
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+
+    # ---- Page side
+    def submit(self, recipient, subject, body, attachment=None, filename="report.pdf"):
+        """Queue a message and return its job id; raises queue.Full when max_queued jobs are pending."""
+        job = _Job(recipient, subject, body, attachment, filename)
+        with self._cond:
+            if self._pending >= self.max_queued:
+                increment("email.rejected")
+                raise queue.Full(f"{self._pending} emails already waiting; try again shortly")
+            self._pending += 1
+            self._jobs[job.id] = job
+            heapq.heappush(self._ready, (time.monotonic(), next(self._sequence), job))
+            self._start_workers()
+            self._cond.notify()
+        increment("email.queued")
+        return job.id
+
+    def status(self, job_id):
+        """Snapshot dict of one job (None for an unknown id)."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return job.snapshot() if job is not None else None
+
+    def stats(self):
+        with self._cond:
+            return {"pending": self._pending, "sent": self.sent, "failed": self.failed,
+                    "retried": self.retried, "workers": len(self._workers)}
+
+    def wait(self, timeout=None):
+        """Block until nothing is pending (for scripts and shutdown); True if drained."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    # ---- Worker side
+    def _start_workers(self):
+        while len(self._workers) < self.n_workers:
+            worker = threading.Thread(target=self._work, name=f"email-{len(self._workers)}", daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def _next_job(self, connection):
+        with self._cond:
+            while True:
+                if self._ready:
+                    due = self._ready[0][0] - time.monotonic()
+                    if due <= 0:
+                        job = heapq.heappop(self._ready)[2]
+                        job.status = "sending"
+                        return job
+                    self._cond.wait(due)
+                else:
+                    # Nothing to do: hang up after a while rather than hold the server's slot
+                    if not self._cond.wait(IDLE_RECONNECT_S):
+                        connection.close()
+
+    def _message(self, job, settings):
+        msg = EmailMessage()
+        msg["Subject"] = job.subject
+        msg["From"] = settings["user"] or f"deal-analyzer@{settings['host']}"
+        msg["To"] = job.recipient
+        msg.set_content(job.body)
+        if job.attachment is not None:
+            data = job.attachment() if callable(job.attachment) else job.attachment
+            msg.add_attachment(data, maintype="application", subtype="pdf", filename=job.filename)
+        return msg
+
+    def _work(self):
+        settings = self.settings or smtp_settings()
+        connection = _Connection(settings)
+        while True:
+            job = self._next_job(connection)
+            job.attempts += 1
+            try:
+                with span("email"):
+                    msg = self._message(job, settings)
+                    if self.sender is not None:
+                        self.sender(msg)
+                    else:
+                        connection.get().send_message(msg)
+                        connection.last_used = time.monotonic()
+            except Exception as e:
+                self._failed_attempt(job, e, connection)
+            else:
+                self._finish(job, "sent")
+
+    def _failed_attempt(self, job, error, connection):
+        if isinstance(error, OSError):  # smtplib errors included
+            connection.close()  # start the next attempt on a fresh connection
+        if is_transient(error) and job.attempts < self.max_attempts:
+            delay = min(self.backoff_s * 2 ** (job.attempts - 1), MAX_BACKOFF_S)
+            log.debug("email %s attempt %d failed (%s); retrying in %.1f s", job.id, job.attempts, error, delay)
+            with self._cond:
+                job.status = "retrying"
+                job.error = str(error)
+                self.retried += 1
+                heapq.heappush(self._ready, (time.monotonic() + delay, next(self._sequence), job))
+                self._cond.notify()
+            increment("email.retry")
+        else:
+            job.error = str(error)
+            self._finish(job, "failed")
+
+    def _finish(self, job, status):
+        with self._cond:
+            job.status = status
+            job.finished = time.time()
+            job.attachment = job.body = None  # keep only the status around
+            if status == "sent":
+                job.error = None
+            self._pending -= 1
+            if status == "sent":
+                self.sent += 1
+            else:
+                self.failed += 1
+            if len(self._jobs) > MAX_HISTORY:
+                for job_id in [job_id for job_id, old in self._jobs.items() if old.finished][:len(self._jobs) - MAX_HISTORY]:
+                    del self._jobs[job_id]
+            self._cond.notify_all()
+        increment(f"email.{status}")
+        log.debug("email %s to %s %s after %d attempt(s)", job.id, job.recipient, status, job.attempts)
+
+
+# One queue per process, shared by every Streamlit session
+EMAIL_QUEUE = EmailQueue()
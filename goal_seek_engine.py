@@ -0,0 +1,120 @@
+"""
+Goal seek: the input value at which a deal just hits a target metric.
+
+E.g. the highest purchase price that still clears a 12% total IRR, or the
+lowest rent that gets Cash-on-Cash to 8%. Every metric we target is "higher
+is better", so the solver bisects on feasibility (metric >= target) between
+two bounds, for a whole batch of deals at once: each step is one batch-engine
+call over the deals that have not converged yet. A deal whose metric cannot
+be solved (NaN IRR) counts as missing the target.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from calc_engine import _batch_inputs, _evaluate_batch, _yearly_key
+from irr_engine import CONVERGED, INVALID_INPUT, MAX_ITERATIONS, NO_SIGN_CHANGE
+
+# Inputs we can solve for: name -> (default bounds as a function of the base value, tolerance)
+SOLVABLE_INPUTS = {
+    "purchase_price": (lambda base: (base * 0.01, base * 10.0), 1.0),
+    "monthly_rent": (lambda base: (0.0, np.maximum(base, 100.0) * 10.0), 0.5),
+    "down_payment_pct": (lambda base: (1.0, 100.0), 0.01),
+    "mortgage_rate": (lambda base: (0.0, 30.0), 0.001),
+    "monthly_expenses": (lambda base: (0.0, np.maximum(base, 100.0) * 20.0), 0.5),
+    "vacancy_rate": (lambda base: (0.0, 100.0), 0.01),
+}
+
+TARGET_METRICS = (
+    "IRR (Total incl. Sale) (%)", "IRR (Operational) (%)", "Cash-on-Cash Return (%)",
+    "Cap Rate (%)", "equity_multiple",
+)
+
+
+class GoalSeekResult(NamedTuple):
+    value: np.ndarray          # solved input value per deal (NaN when not bracketed)
+    metric_value: np.ndarray   # metric at that value (meets the target)
+    status: np.ndarray         # irr_engine status codes per deal
+    iterations: int
+
+
+def _feasible(cols, solve_for, values, metric, target, capex=None):
+    trial = dict(cols)
+    trial[solve_for] = values
+    result = np.asarray(_evaluate_batch(trial, capex)[metric], dtype=float)
+    return np.nan_to_num(result, nan=-np.inf) >= target, result
+
+
+def goal_seek(deals, solve_for, metric, target, bounds=None, tol=None, max_iter=100, capex=None):
+    """
+    Solve each deal for the `solve_for` input at which `metric` reaches `target`.
+
+    `deals` is a DataFrame / dict of the ten calculate_metrics inputs (arrays or
+    scalars; rates other than `solve_for` may be per-year paths). `target` may be a scalar or one value per deal; `bounds` is a
+    (low, high) pair of scalars or arrays and defaults to a wide range around
+    each deal's current value (see SOLVABLE_INPUTS). Exactly one bound has to
+    meet the target, otherwise the deal gets NO_SIGN_CHANGE and a NaN value.
+
+    The returned value is the feasible side of the final bracket, so it always
+    meets the target: for purchase price that is the maximum offer, for rent
+    the minimum rent. `capex` events (see calc_engine.capex_events) apply to
+    every deal.
+    """
+    if solve_for not in SOLVABLE_INPUTS:
+        raise ValueError(f"Cannot solve for {solve_for!r}; choose one of {', '.join(SOLVABLE_INPUTS)}")
+    if metric not in TARGET_METRICS:
+        raise ValueError(f"Unsupported target metric {metric!r}")
+    if capex is not None and (hasattr(capex, "columns") or isinstance(capex, dict)) and "deal" in capex:
+        raise ValueError("goal_seek applies one capex plan to every deal; per-deal tables aren't supported")
+
+    cols = _batch_inputs((deals,), {})
+    if _yearly_key(solve_for) in cols:
+        raise ValueError(f"Cannot solve for {solve_for!r} when it is a per-year path")
+    n = len(cols["purchase_price"])
+    default_bounds, default_tol = SOLVABLE_INPUTS[solve_for]
+    lo, hi = bounds if bounds is not None else default_bounds(cols[solve_for])
+    lo = np.broadcast_to(np.asarray(lo, dtype=float), (n,)).copy()
+    hi = np.broadcast_to(np.asarray(hi, dtype=float), (n,)).copy()
+    target = np.broadcast_to(np.asarray(target, dtype=float), (n,))
+    tol = default_tol if tol is None else tol
+
+    value = np.full(n, np.nan)
+    metric_value = np.full(n, np.nan)
+    status = np.full(n, NO_SIGN_CHANGE, dtype=np.int8)
+    invalid = ~(np.isfinite(target) & np.isfinite(lo) & np.isfinite(hi)) | (lo > hi)
+    status[invalid] = INVALID_INPUT
+
+    # ---- Bracket: exactly one end must meet the target
+    ends = np.concatenate([lo, hi])
+    both = {name: np.concatenate([col, col]) for name, col in cols.items()}
+    feasible_ends, metric_ends = _feasible(both, solve_for, ends, metric, np.concatenate([target, target]), capex)
+    lo_ok, hi_ok = feasible_ends[:n], feasible_ends[n:]
+    active = ~invalid & (lo_ok != hi_ok)
+
+    # Keep the feasible end in `good` and the infeasible end in `bad`
+    good = np.where(lo_ok, lo, hi)
+    bad = np.where(lo_ok, hi, lo)
+    good_metric = np.where(lo_ok, metric_ends[:n], metric_ends[n:])
+
+    iterations = 0
+    while active.any() and iterations < max_iter:
+        iterations += 1
+        idx = np.flatnonzero(active)
+        mid = 0.5 * (good[idx] + bad[idx])
+        ok, mid_metric = _feasible({name: col[idx] for name, col in cols.items()}, solve_for, mid, metric, target[idx], capex)
+        good[idx] = np.where(ok, mid, good[idx])
+        good_metric[idx] = np.where(ok, mid_metric, good_metric[idx])
+        bad[idx] = np.where(ok, bad[idx], mid)
+        active[idx] = np.abs(good[idx] - bad[idx]) > tol
+
+    solved = ~invalid & (lo_ok != hi_ok)
+    value[solved] = good[solved]
+    metric_value[solved] = good_metric[solved]
+    status[solved] = CONVERGED
+    status[solved & active] = MAX_ITERATIONS
+    return GoalSeekResult(value=value, metric_value=metric_value, status=status, iterations=iterations)
+
+
+def max_offer_price(deals, target, metric="IRR (Total incl. Sale) (%)", bounds=None, capex=None):
+    """Highest purchase price per deal at which `metric` still reaches `target`."""
+    return goal_seek(deals, "purchase_price", metric, target, bounds=bounds, capex=capex)
@@ -0,0 +1,231 @@
+"""
+Lightweight instrumentation: timing spans, counters and an opt-in logger.
+
+Off by default. While disabled, span() hands back one shared no-op context
+manager and @timed functions cost a single flag check, so the hot path pays
+next to nothing. Turn it on with environment variables:
+
+    DEAL_ANALYZER_METRICS=1            record spans / counters
+    DEAL_ANALYZER_METRICS_PORT=9464    serve them at http://127.0.0.1:9464/metrics
+    DEAL_ANALYZER_METRICS_FILE=x.json  dump them to a JSON file at exit
+    DEAL_ANALYZER_LOG=DEBUG            send the "deal_analyzer" logger to stderr
+
+Stages used across the app: calc -> verdict -> chart -> pdf -> email. Each
+span name gets a latency histogram (Prometheus-style cumulative buckets), so
+the /metrics endpoint can be scraped directly.
+"""
+import atexit
+import bisect
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+log = logging.getLogger("deal_analyzer")
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_enabled = False
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_server = None
+_dump_path = None
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (seconds)."""
+
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def to_dict(self):
+        cumulative, running = {}, 0
+        for bound, n in zip(BUCKETS + (float("inf"),), self.counts):
+            running += n
+            cumulative["+Inf" if bound == float("inf") else repr(bound)] = running
+        return {"count": self.count, "sum_s": self.total, "buckets": cumulative}
+
+
+# ---- Switches
+def enable(on=True):
+    global _enabled
+    _enabled = bool(on)
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+# ---- Recording
+def observe(name, seconds):
+    """Record one duration for span `name` (no-op while disabled)."""
+    if not _enabled:
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.observe(seconds)
+
+
+def increment(name, amount=1):
+    """Bump counter `name` (no-op while disabled)."""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+@contextmanager
+def _timed_span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+def span(name):
+    """Context manager timing the enclosed block as `name`."""
+    return _timed_span(name) if _enabled else _NOOP_SPAN
+
+
+def timed(name):
+    """Decorator form of span(); the wrapper is a flag check while disabled."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+# ---- Export
+def snapshot():
+    """Plain-dict copy of every histogram and counter."""
+    with _lock:
+        return {
+            "spans": {name: histogram.to_dict() for name, histogram in sorted(_histograms.items())},
+            "counters": dict(sorted(_counters.items())),
+        }
+
+
+def prometheus_text():
+    """Snapshot in the Prometheus text exposition format."""
+    data = snapshot()
+    lines = [
+        "# HELP deal_analyzer_span_seconds Latency of instrumented stages.",
+        "# TYPE deal_analyzer_span_seconds histogram",
+    ]
+    for name, histogram in data["spans"].items():
+        for bound, count in histogram["buckets"].items():
+            lines.append(f'deal_analyzer_span_seconds_bucket{{span="{name}",le="{bound}"}} {count}')
+        lines.append(f'deal_analyzer_span_seconds_sum{{span="{name}"}} {histogram["sum_s"]}')
+        lines.append(f'deal_analyzer_span_seconds_count{{span="{name}"}} {histogram["count"]}')
+    lines.append("# TYPE deal_analyzer_events_total counter")
+    for name, value in data["counters"].items():
+        lines.append(f'deal_analyzer_events_total{{name="{name}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def dump(path):
+    """Write the snapshot as JSON to `path`."""
+    with open(path, "w") as f:
+        json.dump(snapshot(), f, indent=2)
+
+
+def serve(port=9464, host="127.0.0.1"):
+    """Serve /metrics (Prometheus text) and /metrics.json from a daemon thread; idempotent."""
+    global _server
+    if _server is not None:
+        return _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, content_type = prometheus_text().encode(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, content_type = json.dumps(snapshot()).encode(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    _server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=_server.serve_forever, name="metrics-endpoint", daemon=True).start()
+    log.info("metrics endpoint on http://%s:%s/metrics", host, port)
+    return _server
+
+
+def configure_from_env():
+    """Apply the DEAL_ANALYZER_* environment variables (safe to call more than once)."""
+    global _dump_path
+    level = os.getenv("DEAL_ANALYZER_LOG")
+    if level and not log.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        log.addHandler(handler)
+        log.setLevel(level.upper())
+
+    if os.getenv("DEAL_ANALYZER_METRICS", "").lower() in ("1", "true", "yes", "on"):
+        enable()
+        port = os.getenv("DEAL_ANALYZER_METRICS_PORT")
+        if port:
+            try:
+                serve(int(port))
+            except OSError as e:  # e.g. another Streamlit process already owns the port
+                log.warning("metrics endpoint not started: %s", e)
+        path = os.getenv("DEAL_ANALYZER_METRICS_FILE")
+        if path and _dump_path is None:
+            _dump_path = path
+            atexit.register(dump, path)
+
+
+configure_from_env()
@@ -0,0 +1,203 @@
+"""
+Batched IRR solver.
+
+Solves many cash-flow vectors at once with a safeguarded Newton / bisection
+hybrid. Each row is first bracketed by scanning NPV over a fixed rate grid
+(one matrix product for the whole batch), then refined with Newton steps
+that fall back to bisection whenever a step leaves the bracket.
+
+Rows that cannot be solved come back as NaN with a per-row status code
+instead of a silent 0.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+# ---- Per-row status codes
+CONVERGED = 0
+NO_SIGN_CHANGE = 1    # NPV never crosses zero on the search grid (e.g. all flows negative)
+MAX_ITERATIONS = 2    # bracket found but tolerance not reached within max_iter
+INVALID_INPUT = 3     # NaN / inf in the cash flows
+
+STATUS_LABELS = {
+    CONVERGED: "converged",
+    NO_SIGN_CHANGE: "no sign change",
+    MAX_ITERATIONS: "max iterations",
+    INVALID_INPUT: "invalid input",
+}
+
+# Rates (decimal) scanned to bracket each root; dense near typical real-estate IRRs
+RATE_GRID = np.array([
+    -0.9999, -0.999, -0.99, -0.95, -0.9, -0.8, -0.7, -0.6, -0.5, -0.4, -0.3, -0.25, -0.2, -0.15, -0.1, -0.05,
+    0.0, 0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.4, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0,
+    100.0, 1000.0,
+])
+
+
+class IRRResult(NamedTuple):
+    rate: np.ndarray        # decimal IRR per row, NaN unless status == CONVERGED
+    status: np.ndarray      # int8 status code per row
+    iterations: np.ndarray  # Newton / bisection steps taken per row
+
+
+def npv_batch(rates, cash_flows):
+    """NPV of each cash-flow row (period 0 first) at the matching rate."""
+    cash_flows = np.atleast_2d(np.asarray(cash_flows, dtype=float))
+    rates = np.broadcast_to(np.asarray(rates, dtype=float), cash_flows.shape[:1])
+    periods = np.arange(cash_flows.shape[1])
+    discount = (1.0 + rates[:, None]) ** -periods[None, :]
+    return np.einsum("ij,ij->i", cash_flows, discount)
+
+
+def _bracket(cash_flows, reference):
+    """Pick, per row, the sign-change interval on RATE_GRID closest to `reference`."""
+    periods = np.arange(cash_flows.shape[1])
+    discount = (1.0 + RATE_GRID[None, :]) ** -periods[:, None]
+    npv = cash_flows @ discount                                      # (n, len(RATE_GRID))
+
+    lo_rates, hi_rates = RATE_GRID[:-1], RATE_GRID[1:]
+    crosses = (npv[:, :-1] * npv[:, 1:] < 0) | (npv[:, :-1] == 0)
+    crosses[:, -1] |= npv[:, -1] == 0
+
+    ref = reference[:, None]
+    distance = np.where(
+        (lo_rates <= ref) & (ref <= hi_rates),
+        0.0,
+        np.minimum(np.abs(lo_rates - ref), np.abs(hi_rates - ref)),
+    )
+    distance = np.where(crosses, distance, np.inf)
+    pick = np.argmin(distance, axis=1)
+    found = np.isfinite(distance[np.arange(len(pick)), pick])
+
+    rows = np.arange(len(pick))
+    return (
+        found,
+        lo_rates[pick], hi_rates[pick],
+        npv[rows, pick], npv[rows, pick + 1],
+    )
+
+
+def irr_batch(cash_flows, guess=None, tol=1e-12, max_iter=100, reference=None):
+    """
+    Solve IRR for every row of `cash_flows` (shape (n, periods), period 0 first).
+
+    Rows may be zero-padded on the right to a common length; trailing zeros do
+    not change the IRR. `guess` (scalar or per-row array, decimal) warm-starts
+    Newton and, when a row has several roots, selects the one nearest to it;
+    without a guess the root nearest to 0% is returned, matching npf.irr.
+    Pass `reference` to pick the root nearest to it instead of the guess (e.g.
+    reference=0.0 to warm-start without changing which root comes back).
+    """
+    cash_flows = np.atleast_2d(np.asarray(cash_flows, dtype=float))
+    n_rows = cash_flows.shape[0]
+    rate = np.full(n_rows, np.nan)
+    status = np.full(n_rows, NO_SIGN_CHANGE, dtype=np.int8)
+    iterations = np.zeros(n_rows, dtype=np.int32)
+
+    finite = np.isfinite(cash_flows).all(axis=1)
+    status[~finite] = INVALID_INPUT
+    valid = finite & (cash_flows != 0).any(axis=1)
+    if not valid.any():
+        return IRRResult(rate, status, iterations)
+
+    flows = cash_flows[valid]
+    start = np.zeros(n_rows) if guess is None else np.broadcast_to(np.asarray(guess, dtype=float), (n_rows,))
+    start = start[valid]
+    start = np.where(np.isfinite(start), start, 0.0)
+    if reference is not None:
+        reference = np.broadcast_to(np.asarray(reference, dtype=float), (n_rows,))[valid]
+
+    found, lo, hi, f_lo, _ = _bracket(flows, start if reference is None else reference)
+    idx = np.flatnonzero(valid)[found]
+    status[idx] = MAX_ITERATIONS
+    flows, lo, hi, f_lo, start = flows[found], lo[found], hi[found], f_lo[found], start[found]
+
+    # Exact grid hits need no refinement
+    exact = f_lo == 0
+    rate[idx[exact]] = lo[exact]
+    status[idx[exact]] = CONVERGED
+    keep = ~exact
+    idx, flows, lo, hi, f_lo, start = idx[keep], flows[keep], lo[keep], hi[keep], f_lo[keep], start[keep]
+
+    periods = np.arange(flows.shape[1])
+    x = np.where((start > lo) & (start < hi), start, 0.5 * (lo + hi))
+    for step in range(1, max_iter + 1):
+        if not len(idx):
+            break
+        v = 1.0 / (1.0 + x)
+        powers = v[:, None] ** periods[None, :]
+        f = np.einsum("ij,ij->i", flows, powers)
+        df = -np.einsum("ij,ij->i", flows * periods[None, :], powers) * v
+
+        # Shrink the bracket around the sign change
+        same_side = np.sign(f) == np.sign(f_lo)
+        lo = np.where(same_side, x, lo)
+        f_lo = np.where(same_side, f, f_lo)
+        hi = np.where(same_side, hi, x)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_new = x - f / df
+        # A converged step lands on x itself, which is now a bracket end: accept it before the bracket
+        # test, or every row whose Newton run finishes on an endpoint would bisect the rest of the way
+        settled = np.abs(x_new - x) <= tol * (1.0 + np.abs(x))
+        outside = ~settled & (~np.isfinite(x_new) | (x_new <= lo) | (x_new >= hi))
+        x_new = np.where(outside, 0.5 * (lo + hi), x_new)
+
+        done = (f == 0) | settled | (np.abs(x_new - x) <= tol * (1.0 + np.abs(x))) | (hi - lo <= tol * (1.0 + np.abs(x)))
+        iterations[idx] = step
+        rate[idx[done]] = np.where(f[done] == 0, x[done], x_new[done])
+        status[idx[done]] = CONVERGED
+
+        active = ~done
+        idx, flows, lo, hi, f_lo, x = idx[active], flows[active], lo[active], hi[active], f_lo[active], x_new[active]
+
+    return IRRResult(rate, status, iterations)
+
+
+def irr_warm(cash_flows, guess, tol=1e-12, max_iter=50):
+    """
+    IRR of one cash-flow vector by plain Newton from `guess` (decimal), in pure Python.
+
+    For re-solving a vector that only changed a little since the last solve
+    (one more year, a nudged input), where a good guess converges in a few
+    steps and numpy's per-call overhead would dominate. It only runs when the
+    flows change sign exactly once, so the IRR is unique (Descartes' rule)
+    and equals what irr_batch returns; a step past -100% is halved toward it
+    instead. Otherwise, or if Newton misbehaves, it falls back to irr_batch
+    with the root nearest 0%.
+    Returns (decimal IRR or NaN, status code, iterations).
+    """
+    flows = [float(cf) for cf in cash_flows]
+    signs = [cf > 0 for cf in flows if cf != 0]
+    unique_root = sum(a != b for a, b in zip(signs, signs[1:])) == 1
+    x = float(guess) if guess is not None else 0.0
+    if unique_root and all(np.isfinite(flows)) and np.isfinite(x) and x > -1:
+        for step in range(1, max_iter + 1):
+            # Horner in v = 1 / (1 + x): f = NPV, d = dNPV/dv
+            v = 1.0 / (1.0 + x)
+            f = d = 0.0
+            for cf in reversed(flows):
+                d = d * v + f
+                f = f * v + cf
+            if f == 0:
+                return x, CONVERGED, step
+            slope = -d * v * v
+            if slope == 0:
+                break
+            x_new = x - f / slope
+            if not np.isfinite(x_new):
+                break
+            if x_new <= -1:  # overshot past -100% (deeply negative IRRs): go halfway there instead
+                x_new = (x - 1.0) / 2.0
+            if abs(x_new - x) <= tol * (1.0 + abs(x)):
+                return x_new, CONVERGED, step
+            x = x_new
+
+    result = irr_batch([flows], guess=guess, reference=0.0)
+    return result.rate[0].item(), int(result.status[0]), int(result.iterations[0])
+
+
+def irr(cash_flows, guess=None):
+    """Scalar convenience wrapper: returns (decimal IRR or NaN, status code)."""
+    result = irr_batch([list(cash_flows)], guess=guess)
+    return result.rate[0].item(), int(result.status[0])
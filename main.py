@@ -81,6 +81,16 @@ with col2:
     if st.button("Go to Dual Comparison", key="dual_btn"):
         st.switch_page("pages/2_Main_Dual_Property.py")
 
+st.subheader("🎯 Sensitivity Analysis")
+st.write("Sweep a whole grid of rates, prices and vacancies at once and see which input moves IRR the most.")
+if st.button("Go to Sensitivity Analysis", key="sensitivity_btn"):
+    st.switch_page("pages/3_Sensitivity_Analysis.py")
+
+st.subheader("🏘️ Multi-Property Comparison")
+st.write("Compare 3, 10 or 20 properties at once and find the ones on the return frontier.")
+if st.button("Go to Multi-Property Comparison", key="multi_btn"):
+    st.switch_page("pages/4_Multi_Property_Comparison.py")
+
 st.markdown("""
     <hr style="margin-top: 2rem; margin-bottom: 1rem;">
     <div style='text-align: center; font-size: 0.9em;'>
@@ -4,12 +4,19 @@ import os
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from dotenv import load_dotenv
-from calc_engine import calculate_metrics
+from result_cache import cached_calculate_metrics, METRICS_CACHE
+from calc_engine import TaxProfile
+from projection_engine import Projection, exit_year_analysis
+from simulation_engine import simulate_metrics
+from goal_seek_engine import max_offer_price
+from email_queue import EMAIL_QUEUE
 from pdf_single import generate_pdf
+from pdf_multi import format_cell  # NaN (unsolved IRR) -> "N/A"
+from chart_engine import cash_flow_chart, equity_chart, exit_year_chart, roi_fan_chart
+from pdf_jobs import PDF_JOBS
 from pdf_single import generate_ai_verdict
-import matplotlib.pyplot as plt
-from email.message import EmailMessage
-import smtplib
+from rerun_timer import page_started, page_finished, section
+import queue
 import re
 import pandas as pd
 
@@ -37,6 +44,9 @@ if not st.session_state.authenticated:
     elif password:
         st.error("❌ Incorrect password. Please try again.")
     st.stop()  # 🔒 Block access until correct
+
+# ⏱️ Rerun latency (sidebar readout at the bottom of the page)
+rerun_started = page_started("single")
     
 
 # 📌 Property Information
@@ -55,17 +65,86 @@ mortgage_term = st.sidebar.number_input("Mortgage Term (years)", min_value=1, va
 vacancy_rate = st.sidebar.slider("Vacancy Rate (%)", 0, 100, 5)
 appreciation_rate = st.sidebar.slider("Annual Appreciation Rate (%)", 0, 10, 3)
 rent_growth_rate = st.sidebar.slider("Annual Rent Growth Rate (%)", 0, 10, 3)
+expense_growth_rate = st.sidebar.slider("Annual Expense Growth Rate (%)", 0.0, 10.0, 0.0, 0.5)
 time_horizon = st.sidebar.slider("🏁 Investment Time Horizon (Years)", 1, 30, 10)
 
+# 🏗️ Capital Improvements Tracker
+# Each upgrade is paid out of its year's cash flow and its rent uplift starts the year after,
+# so it feeds the projection (cash flow, IRR, equity multiple) like any other input
+with st.expander("🏗️ Capital Improvements", expanded=False):
+    st.caption("Record upgrades like kitchen remodels, HVAC systems, or roof replacements. "
+               "Year 1 is the first year after purchase; the rent uplift applies from the following year.")
+
+    # Editable table with ROI input
+    initial_data = pd.DataFrame({
+        "Year": [""],
+        "Amount ($)": [""],
+        "Description": [""],
+        "Rent Uplift ($/mo)": [""]
+    })
+
+    improvements_df = st.data_editor(
+        initial_data,
+        num_rows="dynamic",
+        width='stretch',
+        key="improvements_editor"
+    )
+
+    # Convert to numbers and compute derived values
+    improvements_df["Year"] = pd.to_numeric(improvements_df["Year"], errors="coerce")
+    improvements_df["Amount ($)"] = pd.to_numeric(improvements_df["Amount ($)"], errors="coerce")
+    improvements_df["Rent Uplift ($/mo)"] = pd.to_numeric(improvements_df["Rent Uplift ($/mo)"], errors="coerce").fillna(0.0)
+
+    # Rows with a whole year >= 1 and an amount become capex events for the engine
+    events_df = improvements_df.dropna(subset=["Year", "Amount ($)"])
+    events_df = events_df[(events_df["Year"] >= 1) & (events_df["Year"] == events_df["Year"].round())]
+    capex = tuple(zip(events_df["Year"].astype(int), events_df["Amount ($)"], events_df["Rent Uplift ($/mo)"]))
+
+    # Totals
+    total_cost = events_df["Amount ($)"].sum()
+    weighted_roi = events_df["Rent Uplift ($/mo)"].sum() * 12 / total_cost * 100 if total_cost > 0 else 0
+
+    # Display Metrics
+    st.success(f"📊 Weighted ROI from Capital Improvements: {weighted_roi:.2f}% (based on ${total_cost:,.0f} spent)")
+    if len(events_df) < improvements_df[["Year", "Amount ($)"]].notna().any(axis=1).sum():
+        st.warning("⚠️ Rows need a whole Year (1 or later) and an Amount to count.")
+
+# 🧾 Taxes & Depreciation
+# Off by default so the headline metrics stay pre-tax; when on, the engine adds the after-tax figures
+with st.expander("🧾 Taxes & Depreciation", expanded=False):
+    apply_tax = st.checkbox("Include income taxes, 27.5-year depreciation and tax on sale", value=False, key="apply_tax")
+    tax_col1, tax_col2 = st.columns(2)
+    land_value_pct = tax_col1.slider("Land Share of Price (%)", 0, 60, 20, help="Land never depreciates.")
+    income_tax_rate = tax_col2.selectbox("Income Tax Bracket (%)", [10, 12, 22, 24, 32, 35, 37], index=3)
+    capital_gains_rate = tax_col1.selectbox("Long-Term Capital Gains Rate (%)", [0, 15, 20], index=1)
+    recapture_rate = tax_col2.number_input("Depreciation Recapture Rate (%)", min_value=0.0, max_value=40.0, value=25.0, step=1.0)
+    offset_losses = st.checkbox("Rental losses offset my other income each year",
+                                help="Otherwise losses are carried forward and released when the property is sold.")
+
+    annual_depreciation = purchase_price * (1 - land_value_pct / 100.0) / 27.5
+    st.info(f"📉 Annual Depreciation: ${annual_depreciation:,.2f} (plus each capital improvement over 27.5 years)")
+    tax = TaxProfile(income_tax_rate=income_tax_rate, capital_gains_rate=capital_gains_rate, recapture_rate=recapture_rate,
+                     land_value_pct=land_value_pct, offset_losses=offset_losses) if apply_tax else None
+
 # 🔢 Run Calculations
 # Monthly mortgage payment = derived from mortgage rate and term
-metrics = calculate_metrics(
+# Cache misses go through this session's Projection, so a slider drag only computes what changed
+projection = st.session_state.setdefault("projection", Projection())
+metrics = cached_calculate_metrics(
     purchase_price, monthly_rent, down_payment_pct,
     mortgage_rate, mortgage_term,
     monthly_expenses, vacancy_rate, appreciation_rate, rent_growth_rate,
-    time_horizon
+    time_horizon,
+    capex=capex,
+    tax=tax,
+    expense_growth_rate=expense_growth_rate,
+    compute=projection.calculate,
 )
 
+# ⚡ Shared result cache (unchanged inputs skip the engine on reruns)
+cache_stats = METRICS_CACHE.stats()
+st.sidebar.caption(f"⚡ Result cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses ({cache_stats['disk_hits']} from disk), {cache_stats['entries']} deals cached")
+
 
 # 🧾 Generate PDF
 #pdf_bytes = generate_pdf(metrics, time_horizon, street_address, zip_code)
@@ -81,127 +160,195 @@ property_data = {
     "vacancy_rate": vacancy_rate,
     "appreciation_rate": appreciation_rate,
     "rent_growth_rate": rent_growth_rate,
+    "expense_growth_rate": expense_growth_rate,
     "time_horizon": time_horizon
 }
 
 summary_text, grade = generate_ai_verdict(metrics)
-pdf_bytes = generate_pdf(property_data, metrics, summary_text)
+pdf_report = PDF_JOBS.lazy(generate_pdf, property_data, metrics, summary_text)  # 📄 rendered only on download / email
 
 # 📊 Display Long-Term Metrics
 st.subheader("📈 Long-Term Metrics")
 col1, col2, col3 = st.columns(3)
-col1.metric("IRR (Operational) (%)", f"{metrics.get('IRR (Operational) (%)', 0):.2f}")
-col2.metric("IRR (Total incl. Sale) (%)", f"{metrics.get('IRR (Total incl. Sale) (%)', 0):.2f}")
+col1.metric("IRR (Operational) (%)", format_cell("{:.2f}", metrics.get('IRR (Operational) (%)', 0)))
+col2.metric("IRR (Total incl. Sale) (%)", format_cell("{:.2f}", metrics.get('IRR (Total incl. Sale) (%)', 0)))
 col3.metric("Equity Multiple", f"{metrics.get('equity_multiple', 0):.2f}")
 
+# 🧾 After-Tax Returns (only when taxes are switched on)
+if tax is not None:
+    st.subheader("🧾 After-Tax Returns")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("After-Tax IRR (%)", format_cell("{:.2f}", metrics['After-Tax IRR (%)']))
+    col2.metric("After-Tax Equity Multiple", f"{metrics['After-Tax Equity Multiple']:.2f}")
+    col3.metric("Tax on Sale ($)", f"{metrics['Depreciation Recapture Tax ($)'] + metrics['Capital Gains Tax ($)']:,.0f}")
+    st.caption(
+        f"Year-1 taxable income ${metrics['Taxable Income $ (by year)'][0]:,.0f} after interest and "
+        f"${metrics['Depreciation $ (by year)'][0]:,.0f} depreciation; after-tax cash flow "
+        f"${metrics['After-Tax Cash Flow'][0]:,.0f}. Sale taxes: ${metrics['Depreciation Recapture Tax ($)']:,.0f} "
+        f"recapture + ${metrics['Capital Gains Tax ($)']:,.0f} capital gains."
+    )
+
+# 🎯 Max Offer Price (goal seek on purchase price, cached per input set)
+@st.cache_data(show_spinner=False, max_entries=64)
+def solve_max_offer(inputs, target, metric, capex):
+    result = max_offer_price(dict(inputs), target, metric=metric, capex=capex or None)
+    return float(result.value[0]), float(result.metric_value[0])
+
+# 🧩 Fragment: changing the target reruns only this section, not the metrics and charts around it
+@st.fragment
+def max_offer_section():
+    with section("Max Offer"):
+        st.subheader("🎯 Max Offer Price")
+        offer_col1, offer_col2 = st.columns(2)
+        offer_metric = offer_col1.selectbox("Target metric", ["IRR (Total incl. Sale) (%)", "Cash-on-Cash Return (%)"], key="offer_metric")
+        offer_target = offer_col2.number_input("Target (%)", value=12.0, step=0.5, key="offer_target")
+        max_price, achieved = solve_max_offer(tuple(offer_inputs.items()), offer_target, offer_metric, capex)
+        if max_price == max_price:  # not NaN
+            st.metric("Max Offer Price ($)", f"{max_price:,.0f}", delta=f"{max_price - purchase_price:,.0f} vs asking")
+            st.caption(f"Highest price at which {offer_metric} still reaches {offer_target:.2f}% (solved: {achieved:.2f}%).")
+        else:
+            st.warning("⚠️ No purchase price between 1% and 10x of the asking price reaches that target.")
+
+offer_inputs = {key: value for key, value in property_data.items() if key not in ("street_address", "zip_code")}
+max_offer_section()
+
 # 📈 Multi-Year Cash Flow Projection
 st.subheader("📈 Multi-Year Cash Flow Projection")
-fig, ax = plt.subplots()
-years = list(range(1, time_horizon + 1))
-ax.plot(years, metrics["Multi-Year Cash Flow"], marker='o', label="Multi-Year Cash Flow ($)")
-ax.plot(years, metrics["Annual Rents $ (by year)"], marker='s', linestyle='--', label="Projected Rent ($)")
-ax.set_xlabel("Year")
-ax.set_ylabel("Projected Cash Flow / Rent ($)")
-ax.grid(True)
-ax2 = ax.twinx()
-ax2.plot(years, metrics["Annual ROI % (by year)"], color='green', marker='^', label="ROI (%)")
-ax2.set_ylabel("ROI (%)", color='green')
-lines, labels = ax.get_legend_handles_labels()
-lines2, labels2 = ax2.get_legend_handles_labels()
-ax.legend(lines + lines2, labels + labels2, loc="upper left")
-ax.set_title("Multi - Year Projected Cash Flow & ROI")
-st.pyplot(fig)
+# 🖼️ Charts render from the metric arrays, once per distinct content (see chart_engine.py)
+st.image(cash_flow_chart(metrics.cash_flows, metrics.rents_by_year, metrics.roi_by_year), width='stretch')
+
+# 🏦 Loan Paydown & Equity (from the monthly amortization schedule)
+st.subheader("🏦 Loan Paydown & Equity")
+st.metric("Net Sale Proceeds at Exit ($)", f"{metrics.get('Net Sale Proceeds ($)', 0):,.0f}")
+st.image(equity_chart(metrics.equity_by_year, metrics.loan_balance_by_year), width='stretch')
+
+# ⏱️ Best Year to Sell (every exit year 1-30 from one shared projection, cached per input set)
+@st.cache_data(show_spinner=False, max_entries=64)
+def analyze_exit_years(inputs, capex):
+    return exit_year_analysis(**dict(inputs), max_years=30, capex=capex)
+
+st.subheader("⏱️ Best Year to Sell")
+exits = analyze_exit_years(tuple((key, value) for key, value in offer_inputs.items() if key != "time_horizon"), capex)
+if exits.best_year:
+    st.caption(
+        f"Total IRR peaks at {exits.best_irr:.2f}% for a sale after year {exits.best_year} "
+        f"(your {time_horizon}-year plan: {format_cell('{:.2f}%', exits.irr_total[time_horizon - 1].item())})."
+    )
+st.image(exit_year_chart(exits, time_horizon), width='stretch')
+
+# 🎲 Monte Carlo Simulation (runs only when switched on; cached per input set)
+@st.cache_data(show_spinner=False, max_entries=32)
+def run_simulation(inputs, n_paths, volatility, expense_growth_rate):
+    return simulate_metrics(*inputs, n_paths=n_paths, volatility=dict(volatility), seed=42,
+                            expense_growth_rate=expense_growth_rate)
+
+@st.fragment
+def monte_carlo_section():
+    with st.expander("🎲 Monte Carlo Simulation", expanded=False), section("Monte Carlo"):
+        st.caption("Draws correlated yearly paths for appreciation, rent growth and vacancy around your inputs.")
+        run_mc = st.checkbox("Run simulation", value=False, key="run_mc")
+        mc_col1, mc_col2, mc_col3, mc_col4 = st.columns(4)
+        n_paths = mc_col1.selectbox("Paths", [5000, 20000, 50000, 100000], index=1)
+        appreciation_vol = mc_col2.slider("Appreciation σ (%)", 0.0, 10.0, 4.0, 0.5)
+        rent_growth_vol = mc_col3.slider("Rent Growth σ (%)", 0.0, 10.0, 2.0, 0.5)
+        vacancy_vol = mc_col4.slider("Vacancy σ (%)", 0.0, 10.0, 3.0, 0.5)
+
+        if run_mc:
+            with st.spinner("Simulating..."):
+                sim = run_simulation(
+                    (purchase_price, monthly_rent, down_payment_pct, mortgage_rate, mortgage_term,
+                     monthly_expenses, vacancy_rate, appreciation_rate, rent_growth_rate, time_horizon),
+                    n_paths,
+                    (("appreciation_rate", appreciation_vol), ("rent_growth_rate", rent_growth_vol), ("vacancy_rate", vacancy_vol)),
+                    expense_growth_rate,
+                )
+
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("IRR P5 (%)", format_cell("{:.2f}", sim.irr_total[5]))
+            col2.metric("IRR Median (%)", format_cell("{:.2f}", sim.irr_total[50]))
+            col3.metric("IRR P95 (%)", format_cell("{:.2f}", sim.irr_total[95]))
+            col4.metric("Probability of Loss", f"{sim.probability_of_loss:.1%}")
+            st.caption(
+                f"Equity Multiple P5 / Median / P95: {sim.equity_multiple[5]:.2f} / "
+                f"{sim.equity_multiple[50]:.2f} / {sim.equity_multiple[95]:.2f}"
+            )
+
+            st.image(roi_fan_chart(sim.roi_fan, sim.n_paths), width='stretch')
+
+monte_carlo_section()
 
 # 📘 Download User Manual
 st.markdown("---")
-try:
+# Read once per process, not on every rerun
+@st.cache_resource(show_spinner=False)
+def load_user_manual():
     with open("Investment_Metrics_User_Guide.pdf", "rb") as f:
-        st.download_button(
-            label="📘 Download User Manual (PDF)",
-            data=f,
-            file_name="Investment_Metrics_User_Guide.pdf",
-            mime="application/pdf"
-        )
-except FileNotFoundError:
-    st.error("📄 User Manual PDF is missing from directory.")
+        return f.read()
 
-# 📄 PDF Download Section
-if pdf_bytes is not None:
+try:
     st.download_button(
-        label="📄 Download PDF Report",
-        data=pdf_bytes,
-        file_name="real_estate_report.pdf",
+        label="📘 Download User Manual (PDF)",
+        data=load_user_manual(),
+        file_name="Investment_Metrics_User_Guide.pdf",
         mime="application/pdf",
-        key="download_pdf_unique"
+        on_click="ignore"  # downloading doesn't rerun the page
     )
-else:
-    st.error("⚠️ PDF generation failed. Please check your input or logs.")
-
-# ✉️ Email This Report Section
-st.markdown("### 📨 Email This Report")
-recipient_email = st.text_input("Enter email address to send the report", placeholder="you@example.com")
-if st.button("Send Email Report") and recipient_email:
-    if not re.match(r"[^@]+@[^@]+\.[^@]+", recipient_email):
-        st.error("❌ Please enter a valid email address.")
-        st.stop()
-    try:
-        msg = EmailMessage()
-        msg["Subject"] = "Your Real Estate Evaluation Report"
-        msg["From"] = os.getenv("EMAIL_USER")
-        msg["To"] = recipient_email
-        msg.set_content("Please find attached your real estate evaluation report.")
-        pdf_bytes.seek(0)
-        msg.add_attachment(pdf_bytes.read(), maintype='application', subtype='pdf', filename="real_estate_report.pdf")
-        with smtplib.SMTP("smtp.gmail.com", 587) as smtp:
-            smtp.starttls()
-            smtp.login(os.getenv("EMAIL_USER"), os.getenv("EMAIL_PASSWORD"))
-            smtp.send_message(msg)
-        st.success(f"✅ Report sent to {recipient_email}!")
-    except Exception as e:
-        st.error(f"❌ Failed to send email: {e}")
-
-# =============================
-# 🔧 Optional Enhancements
-# =============================
-with st.expander("🔧 Optional Enhancements", expanded=False):
-
-    # 🏗️ Capital Improvements Tracker
-    st.subheader("🏗️ Capital Improvements Tracker")
-    st.caption("Use this to record upgrades like kitchen remodels, HVAC systems, or roof replacements.")
-
-    # Editable table with ROI input
-    initial_data = pd.DataFrame({
-        "Year": [""],
-        "Amount ($)": [""],
-        "Description": [""],
-        "Rent Uplift ($/mo)": [""]
-    })
+except FileNotFoundError:
+    st.error("📄 User Manual PDF is missing from directory.")
 
-    improvements_df = st.data_editor(
-        initial_data,
-        num_rows="dynamic",
-        width='stretch',
-        key="improvements_editor"
-    )
+# 📄 PDF Download Section
+st.download_button(
+    label="📄 Download PDF Report",
+    data=pdf_report,
+    file_name="real_estate_report.pdf",
+    mime="application/pdf",
+    key="download_pdf_unique",
+    on_click="ignore"
+)
 
-    # Convert to numbers and compute derived values
-    improvements_df["Amount ($)"] = pd.to_numeric(improvements_df["Amount ($)"], errors="coerce")
-    improvements_df["Rent Uplift ($/mo)"] = pd.to_numeric(improvements_df["Rent Uplift ($/mo)"], errors="coerce")
-    improvements_df["Annual Uplift ($)"] = improvements_df["Rent Uplift ($/mo)"] * 12
-    improvements_df["ROI (%)"] = (
-        improvements_df["Annual Uplift ($)"] / improvements_df["Amount ($)"]
-    ) * 100
+# 📬 Delivery status (re-polled every 2 s while a message is still on its way)
+def show_email_status():
+    for job_id in st.session_state.get("email_jobs", [])[-5:]:
+        job = EMAIL_QUEUE.status(job_id)
+        if job is None:
+            continue
+        if job["status"] == "sent":
+            st.success(f"✅ Report sent to {job['recipient']}!")
+        elif job["status"] == "failed":
+            st.error(f"❌ Failed to send email to {job['recipient']}: {job['error']}")
+        elif job["status"] == "retrying":
+            st.warning(f"🔁 Retrying {job['recipient']} (attempt {job['attempts']} failed: {job['error']})")
+        else:
+            st.info(f"📤 Sending report to {job['recipient']}...")
 
-    # Drop rows with missing values
-    valid_df = improvements_df.dropna(subset=["Amount ($)", "Annual Uplift ($)", "ROI (%)"])
+# ✉️ Email This Report Section (typing an address or clicking Send reruns only this section)
+@st.fragment
+def email_section(pdf_report):
+    with section("Email"):
+        st.markdown("### 📨 Email This Report")
+        recipient_email = st.text_input("Enter email address to send the report", placeholder="you@example.com")
+        if st.button("Send Email Report") and recipient_email:
+            if not re.match(r"[^@]+@[^@]+\.[^@]+", recipient_email):
+                st.error("❌ Please enter a valid email address.")
+            else:
+                try:
+                    # ✉️ Queued for the background sender; the PDF renders there too, so the page never waits on SMTP
+                    job_id = EMAIL_QUEUE.submit(
+                        recipient_email,
+                        "Your Real Estate Evaluation Report",
+                        "Please find attached your real estate evaluation report.",
+                        attachment=pdf_report,
+                        filename="real_estate_report.pdf",
+                    )
+                    st.session_state.setdefault("email_jobs", []).append(job_id)
+                except queue.Full as e:
+                    st.error(f"❌ Email queue is full: {e}")
 
-    # Totals
-    total_cost = valid_df["Amount ($)"].sum()
-    weighted_roi = (
-        (valid_df["Amount ($)"] * valid_df["ROI (%)"]).sum() / total_cost
-        if total_cost > 0 else 0
-    )
+        email_pending = any((EMAIL_QUEUE.status(job_id) or {}).get("status") in ("queued", "sending", "retrying")
+                            for job_id in st.session_state.get("email_jobs", []))
+        st.fragment(run_every=2 if email_pending else None)(show_email_status)()
 
-    # Display Metrics
-    st.success(f"📊 Weighted ROI from Capital Improvements: {weighted_roi:.2f}% (based on ${total_cost:,.0f} spent)")
+email_section(pdf_report)
 
+# ⏱️ Full-rerun latency readout (fragment reruns show their own under each section)
+page_finished("single", rerun_started)
@@ -6,12 +6,18 @@ import sys  # ✅ Move this before using sys
 sys.path.append(os.path.abspath(".."))  # ✅ Now valid
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from dotenv import load_dotenv
-import smtplib
-from email.message import EmailMessage
-import matplotlib.pyplot as plt
+import queue
+import re
 import pandas as pd
-from calc_engine import calculate_metrics
+from result_cache import cached_calculate_metrics, METRICS_CACHE
+from projection_engine import Projection
+from simulation_engine import simulate_metrics
+from email_queue import EMAIL_QUEUE
 from pdf_dual import generate_pdf , generate_comparison_pdf , generate_comparison_pdf_table_style
+from pdf_multi import format_cell  # NaN (unsolved IRR) -> "N/A"
+from chart_engine import dual_cash_flow_chart, dual_roi_fan_chart
+from pdf_jobs import PDF_JOBS
+from rerun_timer import page_started, page_finished, section
 load_dotenv()
 
 #from pdf_generator import generate_comparison_pdf_table_style
@@ -45,7 +51,9 @@ if not st.session_state.authenticated:
         st.error("❌ Incorrect password. Please try again.")
     st.stop()  # 🔒 Block access until correct
 
-    
+# ⏱️ Rerun latency (sidebar readout at the bottom of the page)
+rerun_started = page_started("dual")
+
 # ✅ Titles shown only after succesful login
 st.markdown("## 🏡 Real Estate Deal Evaluator")
 #st.markdown("### 📈 Multi-Year Cash Flow Projection")
@@ -60,13 +68,20 @@ st.markdown(
     unsafe_allow_html=True
 )
 st.markdown("---")
-with open("Investment_Metrics_User_Guide.pdf", "rb") as f:
-    st.download_button(
-        label="📘 Download User Manual (PDF)",
-        data=f,
-        file_name="Investment_Metrics_User_Guide.pdf",
-        mime="application/pdf"
-    )
+
+# 📘 Read once per process, not on every rerun
+@st.cache_resource(show_spinner=False)
+def load_user_manual():
+    with open("Investment_Metrics_User_Guide.pdf", "rb") as f:
+        return f.read()
+
+st.download_button(
+    label="📘 Download User Manual (PDF)",
+    data=load_user_manual(),
+    file_name="Investment_Metrics_User_Guide.pdf",
+    mime="application/pdf",
+    on_click="ignore"  # downloading doesn't rerun the page
+)
 
     # Sidebar Title
 #sidebar.markdown("## 🧾 Shared Financial Inputs")
@@ -99,352 +114,394 @@ vacancy_rate = st.sidebar.slider("🏠 Vacancy Rate (%)", 0.0, 20.0, 5.0, 0.5)
 # 👇 DO NOT include shared Down Payment slider here
     
 
-col1, col2 = st.columns(2)
-
-with col1:
-    st.subheader("🏠 Property A")
-    purchase_price_a = st.number_input("Purchase Price A", value=300000)
-    down_payment_pct_a = st.slider("Down Payment A (%)", 0.0, 100.0, value=20.0, step=1.0)
-    rent_a = st.number_input("Monthly Rent A", value=2000)
-    monthly_expenses_a = st.number_input("Monthly Expenses A", value=300, key="monthly_expenses_a")
-    appreciation_rate_a = st.slider("Annual Appreciation A (%)", 0.0, 10.0, value=3.0, step=0.1, key="appreciation_rate_a")
-    rent_growth_rate_a = st.slider("Annual Rent Growth A (%)", 0.0, 10.0, value=2.0, step=0.1, key="rent_growth_rate_a")
-    time_horizon_a = st.slider("🏁 Investment Time Horizon A (Years)", 1, 30, value=10, key="time_horizon_a")
-    # ...add other inputs like interest rate, years, etc.
-
-with col2:
-    st.subheader("🏘️ Property B")
-    purchase_price_b = st.number_input("Purchase Price B", value=320000)
-    down_payment_pct_b = st.slider("Down Payment B (%)", 0.0, 100.0, value=20.0, step=1.0)
-    rent_b = st.number_input("Monthly Rent B", value=2100)
-    monthly_expenses_b = st.number_input("Monthly Expenses B", value=300, key="monthly_expenses_b")
-    appreciation_rate_b = st.slider("Annual Appreciation B (%)", 0.0, 10.0, value=3.0, step=0.1, key="appreciation_rate_b")
-    rent_growth_rate_b = st.slider("Annual Rent Growth B (%)", 0.0, 10.0, value=2.0, step=0.1, key="rent_growth_rate_b")
-    time_horizon_b = st.slider("🏁 Investment Time Horizon A (Years)", 1, 30, value=10, key="time_horizon_b")
-    # ...same structure
-
-# Calculate metrics
-# ---- Property A Metrics ----
-metrics_a = calculate_metrics(
-    purchase_price_a,
-    rent_a,
-    down_payment_pct_a,
-    mortgage_rate,
-    mortgage_term,
-    monthly_expenses_a,
-    vacancy_rate,
-    appreciation_rate_a,
-    rent_growth_rate_a,
-    time_horizon_a
-)
+# 🎲 Monte Carlo Simulation (runs only when switched on; cached per input set)
+@st.cache_data(show_spinner=False, max_entries=32)
+def run_simulation(inputs, n_paths, volatility):
+    return simulate_metrics(*inputs, n_paths=n_paths, volatility=dict(volatility), seed=42)
 
-# ---- Property B Metrics ----
-metrics_b = calculate_metrics(
-    purchase_price_b,
-    rent_b,
-    down_payment_pct_b,
-    mortgage_rate,
-    mortgage_term,
-    monthly_expenses_b,
-    vacancy_rate,
-    appreciation_rate_b,
-    rent_growth_rate_b,
-    time_horizon_b
-)
+# 🧩 Nested fragments: their own widgets rerun only that section, not the metrics and chart around it
+@st.fragment
+def monte_carlo_section(inputs_a, inputs_b):
+    with st.expander("🎲 Monte Carlo Simulation (A vs B)", expanded=False), section("Monte Carlo"):
+        st.caption("Draws correlated yearly paths for appreciation, rent growth and vacancy around each property's inputs.")
+        run_mc = st.checkbox("Run simulation", value=False, key="run_mc")
+        mc_col1, mc_col2, mc_col3, mc_col4 = st.columns(4)
+        n_paths = mc_col1.selectbox("Paths", [5000, 20000, 50000, 100000], index=1)
+        appreciation_vol = mc_col2.slider("Appreciation σ (%)", 0.0, 10.0, 4.0, 0.5)
+        rent_growth_vol = mc_col3.slider("Rent Growth σ (%)", 0.0, 10.0, 2.0, 0.5)
+        vacancy_vol = mc_col4.slider("Vacancy σ (%)", 0.0, 10.0, 3.0, 0.5)
+        volatility = (("appreciation_rate", appreciation_vol), ("rent_growth_rate", rent_growth_vol), ("vacancy_rate", vacancy_vol))
 
+        if run_mc:
+            with st.spinner("Simulating..."):
+                sim_a = run_simulation(inputs_a, n_paths, volatility)
+                sim_b = run_simulation(inputs_b, n_paths, volatility)
+
+            for label, sim in [("A", sim_a), ("B", sim_b)]:
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric(f"IRR {label} P5 (%)", format_cell("{:.2f}", sim.irr_total[5]))
+                col2.metric(f"IRR {label} Median (%)", format_cell("{:.2f}", sim.irr_total[50]))
+                col3.metric(f"IRR {label} P95 (%)", format_cell("{:.2f}", sim.irr_total[95]))
+                col4.metric(f"Probability of Loss {label}", f"{sim.probability_of_loss:.1%}")
+
+            st.image(dual_roi_fan_chart(sim_a.roi_fan, sim_b.roi_fan, n_paths), width='stretch')
 
-if metrics_a and metrics_b:
-    # 🏠 Add address + zip support for dual PDF table
-    comparison_pdf = generate_comparison_pdf_table_style(
-        metrics_a, metrics_b,
-        address_a=address_a,
-        zip_a=zip_code_a,
-        address_b=address_b,
-        zip_b=zip_code_b
-    )
-
-    st.download_button(
-        label="📄 Download Comparison PDF",
-        data=comparison_pdf,
-        file_name="comparison_report.pdf",
-        mime="application/pdf",
-        key="download_comparison_pdf"
-    )
-
-
-# Title
-#st.markdown("""<div style='text-align: center; margin-top: -40px;'><h1>🏡 Real Estate Deal Evaluator</h1></div>""", unsafe_allow_html=True)
-
-#load_dotenv()
-
-# Prepare inputs and call AI verdict generator
-verdict_input = {
-    "ROI (%)": f"{metrics_a.get('ROI (%)', 0)} vs {metrics_b.get('ROI (%)', 0)}",
-    "Multi-Year Cash Flow A": metrics_a.get("Multi-Year Cash Flow", []),
-    "Multi-Year Cash Flow B": metrics_b.get("Multi-Year Cash Flow", []),
-    "Cap Rate (%) A": metrics_a.get("Cap Rate (%)", 0),
-    "Cap Rate (%) B": metrics_b.get("Cap Rate (%)", 0),
-    "Cash-on-Cash Return (%) A": metrics_a.get("Cash-on-Cash Return (%)", 0),
-    "Cash-on-Cash Return (%) B": metrics_b.get("Cash-on-Cash Return (%)", 0),
-}
-
-summary_text, grade = generate_ai_verdict(metrics_a, metrics_b)
-
-# Add verdict to metrics so pdf_generator can consume it
-metrics_a["AI Verdict"] = summary_text
-metrics_a["Grade"] = grade
-metrics_b["AI Verdict"] = summary_text
-metrics_b["Grade"] = grade
-
-
-# Prepare property_data
-property_data = {
-    "Purchase Price A": purchase_price_a,
-    "Purchase Price B": purchase_price_b,
-    "Monthly Rent A": rent_a,
-    "Monthly Rent B": rent_b,
-    "Down Payment (%) A": down_payment_pct_a,
-    "Down Payment (%) B": down_payment_pct_b,
-    "Monthly Expenses A": monthly_expenses_a,
-    "Monthly Expenses B": monthly_expenses_b,
-    "Appreciation Rate (%) A": appreciation_rate_a,
-    "Appreciation Rate (%) B": appreciation_rate_b,
-    "Rent Growth Rate (%) A": rent_growth_rate_a,
-    "Rent Growth Rate (%) B": rent_growth_rate_b,
-    
-    # Shared inputs
-    "Mortgage Rate (%)": mortgage_rate,
-    "Mortgage Term (Years)": mortgage_term,
-    "Vacancy Rate (%)": vacancy_rate,
-}
-
-# Generate PDF
-#summary_text = f"Property A is a {metrics_a['Grade']}-grade rental, and Property B is a {metrics_b['Grade']}-grade rental with upside potential"
-#pdf_bytes = generate_pdf(property_data, metrics_a, metrics_b, summary_text)
-
-# 🔁 Updated summary (same)
-summary_text = f"Property A is a {metrics_a['Grade']}-grade rental, and Property B is a {metrics_b['Grade']}-grade rental with upside potential"
-
-# ✅ Create property A and B data dictionaries
-property_data_a = {
-    "Address": address_a,
-    "ZIP Code": zip_code_a,
-    "Purchase Price": purchase_price_a,
-    "Monthly Rent": rent_a,
-    "Down Payment (%)": down_payment_pct_a,
-    "Monthly Expenses": monthly_expenses_a,
-    "Appreciation Rate (%)": appreciation_rate_a,
-    "Rent Growth Rate (%)": rent_growth_rate_a,
-    "🏁 Investment Time Horizon (Years)": time_horizon_a
-}
-
-property_data_b = {
-    "Address": address_b,
-    "ZIP Code": zip_code_b,
-    "Purchase Price": purchase_price_b,
-    "Monthly Rent": rent_b,
-    "Down Payment (%)": down_payment_pct_b,
-    "Monthly Expenses": monthly_expenses_b,
-    "Appreciation Rate (%)": appreciation_rate_b,
-    "Rent Growth Rate (%)": rent_growth_rate_b,
-    "🏁 Investment Time Horizon (Years)": time_horizon_b
-}
-
-# ✅ Now generate dual PDF
-# ✅ Now generate dual PDF with property address and zip
-pdf_bytes = generate_pdf(
-    property_data_a={
-        "Address": address_a,
-        "ZIP Code": zip_code_a,
-        "Purchase Price": purchase_price_a,
-        "Monthly Rent": rent_a,
-        "Monthly Expenses": monthly_expenses_a,
-        "Down Payment (%)": down_payment_pct_a,
-        "Appreciation Rate (%)": appreciation_rate_a,
-        "Rent Growth Rate (%)": rent_growth_rate_a,
-        "Mortgage Rate (%)": mortgage_rate,
-        "Mortgage Term (Years)": mortgage_term,
-        "Vacancy Rate (%)": vacancy_rate,
-    },
-    property_data_b={
-        "Address": address_b,
-        "ZIP Code": zip_code_b,
-        "Purchase Price": purchase_price_b,
-        "Monthly Rent": rent_b,
-        "Monthly Expenses": monthly_expenses_b,
-        "Down Payment (%)": down_payment_pct_b,
-        "Appreciation Rate (%)": appreciation_rate_b,
-        "Rent Growth Rate (%)": rent_growth_rate_b,
-        "Mortgage Rate (%)": mortgage_rate,
-        "Mortgage Term (Years)": mortgage_term,
-        "Vacancy Rate (%)": vacancy_rate,
-    },
-    metrics_a=metrics_a,
-    metrics_b=metrics_b,
-    summary_text=summary_text
-)
-# ✅ Extract cash flow lists from metrics for plotting
-cf_a = metrics_a.get("Multi-Year Cash Flow", [])
-cf_b = metrics_b.get("Multi-Year Cash Flow", [])
-
-# Ensure they are lists of numbers
-if isinstance(cf_a, str):
-    cf_a = [float(x.strip()) for x in cf_a.strip("[]").split(",") if x.strip()]
-if isinstance(cf_b, str):
-    cf_b = [float(x.strip()) for x in cf_b.strip("[]").split(",") if x.strip()]
-
-
-# 📊 New 6-Curve Dual-Y Comparison Plot
-st.subheader("📈 Multi-Year ROI, Rent & Cash Flow Comparison (A vs B)")
-
-# ✅ INSERT THE NEW BLOCK RIGHT AFTER THAT:
-st.subheader("📈 Long-Term Metrics")
-
-# --- Property A Metrics ---
-col1, col2, col3 = st.columns(3)
-col1.metric("IRR A (Operational) (%)", f"{metrics_a.get('IRR (Operational) (%)', 0):.2f}")
-col2.metric("IRR A (Total incl. Sale) (%)", f"{metrics_a.get('IRR (Total incl. Sale) (%)', 0):.2f}")
-col3.metric("Equity Multiple A", f"{metrics_a.get('equity_multiple', 0):.2f}")
-
-# --- Property B Metrics ---
-col4, col5, col6 = st.columns(3)
-col4.metric("IRR B (Operational) (%)", f"{metrics_b.get('IRR (Operational) (%)', 0):.2f}")
-col5.metric("IRR B (Total incl. Sale) (%)", f"{metrics_b.get('IRR (Total incl. Sale) (%)', 0):.2f}")
-col6.metric("Equity Multiple B", f"{metrics_b.get('equity_multiple', 0):.2f}")
-
-# Extract data from metrics
-# Pad shorter cash flow list with None or 0
-max_years = max(len(cf_a), len(cf_b))
-cf_a += [0] * (max_years - len(cf_a))
-cf_b += [0] * (max_years - len(cf_b))
-
-rent_a = metrics_a.get("Annual Rents $ (by year)", [])
-rent_b = metrics_b.get("Annual Rents $ (by year)", [])
-roi_a = metrics_a.get("Annual ROI % (by year)", [])
-roi_b = metrics_b.get("Annual ROI % (by year)", [])
-
-# Use longest time horizon
-#years = list(range(1, max(len(cf_a), len(cf_b)) + 1))
-fig, ax1 = plt.subplots()
-#fig, ax1 = plt.subplots(figsize=(10, 5))  # ✅ Create figure and axes
-years_a = list(range(1, len(cf_a) + 1))
-years_b = list(range(1, len(cf_b) + 1))
-
-# ✅ Step 3: Defensive trim to avoid x/y mismatch
-years_a = years_a[:min(len(years_a), len(rent_a), len(roi_a), len(cf_a))]
-years_b = years_b[:min(len(years_b), len(rent_b), len(roi_b), len(cf_b))]
-cf_a = cf_a[:len(years_a)]
-cf_b = cf_b[:len(years_b)]
-rent_a = rent_a[:len(years_a)]
-rent_b = rent_b[:len(years_b)]
-roi_a = roi_a[:len(years_a)]
-roi_b = roi_b[:len(years_b)]
-
-
-# Primary Y-axis: Cash Flow & Rent
-ax1.plot(years_a, cf_a, marker='o', label="Cash Flow A ($)", color='blue')
-ax1.plot(years_b, cf_b, marker='o', label="Cash Flow B ($)", color='skyblue')
-ax1.plot(years_a, rent_a, marker='s', linestyle='--', label="Rent A ($)", color='orange')
-ax1.plot(years_b, rent_b, marker='s', linestyle='--', label="Rent B ($)", color='goldenrod')
-ax1.set_xlabel("Year")
-ax1.set_ylabel("Cash Flow / Rent ($)")
-ax1.grid(True)
-
-# Secondary Y-axis: ROI
-ax2 = ax1.twinx()
-ax2.plot(years_a, roi_a, marker='^', linestyle='-', label="ROI A (%)", color='green')
-ax2.plot(years_b, roi_b, marker='^', linestyle='--', label="ROI B (%)", color='darkgreen')
-ax2.set_ylabel("ROI (%)", color='green')
-ax2.tick_params(axis='y', labelcolor='green')
-
-# Merge legends from both y-axes
-lines1, labels1 = ax1.get_legend_handles_labels()
-lines2, labels2 = ax2.get_legend_handles_labels()
-ax1.legend(lines1 + lines2, labels1 + labels2, loc='upper left')
-
-# Final layout
-ax1.set_title("Projected Cash Flow, Rent, and ROI Over Time")
-st.pyplot(fig)
 
 
 # Email Section
-st.markdown("### 📨 Email This Report")
-recipient_email = st.text_input("Enter email address to send the report", placeholder="you@example.com")
-
-# Debug diagnostics
-
-if st.button("Send Email Report") and recipient_email:
-    # ✅ UI-level validation of malformed email inputs
-    import re
-    if not re.match(r"[^@]+@[^@]+\.[^@]+", recipient_email):
-        st.error("❌ Please enter a valid email address.")
-        st.stop()
-    try:
-        st.write("📤 Attempting to send email...")
-        msg = EmailMessage()
-        msg["Subject"] = "Your Real Estate Evaluation Report"
-        msg["From"] = os.getenv("EMAIL_USER")  # ✅ From address
-        msg["To"] = recipient_email
-        msg.set_content("Please find attached your real estate evaluation report.")
-        pdf_bytes.seek(0)
-        msg.add_attachment(pdf_bytes.read(), maintype='application', subtype='pdf', filename="real_estate_report.pdf")
-
-        with smtplib.SMTP("smtp.gmail.com", 587) as smtp:
-            smtp.starttls()
-                # ✅ Debug prints BEFORE login
-            #st.write("🔐 EMAIL_USER:", os.getenv("EMAIL_USER"))
-            #st.write("🔐 EMAIL_PASSWORD present:", bool(os.getenv("EMAIL_PASSWORD")))
-            smtp.login(os.getenv("EMAIL_USER"), os.getenv("EMAIL_PASSWORD")) # GMAIL was changed to EMAIL!!!
-            smtp.send_message(msg)
-
-        st.success(f"✅ Report sent to {recipient_email}!")
-    except Exception as e:
-        st.error(f"❌ Failed to send email: {e}")
-# =============================
-# 🔧 Optional Enhancements
-# =============================
-with st.expander("🔧 Optional Enhancements", expanded=False):
-
-    # 🏗️ Capital Improvements Tracker
-    st.subheader("🏗️ Capital Improvements Tracker")
-    st.caption("Use this to record upgrades like kitchen remodels, HVAC systems, or roof replacements.")
-
-    # Editable table with ROI input
-    initial_data = pd.DataFrame({
-        "Year": [""],
-        "Amount ($)": [""],
-        "Description": [""],
-        "Rent Uplift ($/mo)": [""]
-    })
-
-    improvements_df = st.data_editor(
-        initial_data,
-        num_rows="dynamic",
-        width='stretch',
-        key="improvements_editor"
-    )
-
-    # Convert to numbers and compute derived values
-    improvements_df["Amount ($)"] = pd.to_numeric(improvements_df["Amount ($)"], errors="coerce")
-    improvements_df["Rent Uplift ($/mo)"] = pd.to_numeric(improvements_df["Rent Uplift ($/mo)"], errors="coerce")
-    improvements_df["Annual Uplift ($)"] = improvements_df["Rent Uplift ($/mo)"] * 12
-    improvements_df["ROI (%)"] = (
-        improvements_df["Annual Uplift ($)"] / improvements_df["Amount ($)"]
-    ) * 100
-
-    # Drop rows with missing values
-    valid_df = improvements_df.dropna(subset=["Amount ($)", "Annual Uplift ($)", "ROI (%)"])
-
-    # Totals
-    total_cost = valid_df["Amount ($)"].sum()
-    weighted_roi = (
-        (valid_df["Amount ($)"] * valid_df["ROI (%)"]).sum() / total_cost
-        if total_cost > 0 else 0
-    )
-
-    # Display Metrics
-    st.success(f"📊 Weighted ROI from Capital Improvements: {weighted_roi:.2f}% (based on ${total_cost:,.0f} spent)")
-
-
-
-        
+# 📬 Delivery status (re-polled every 2 s while a message is still on its way)
+def show_email_status():
+    for job_id in st.session_state.get("email_jobs_dual", [])[-5:]:
+        job = EMAIL_QUEUE.status(job_id)
+        if job is None:
+            continue
+        if job["status"] == "sent":
+            st.success(f"✅ Report sent to {job['recipient']}!")
+        elif job["status"] == "failed":
+            st.error(f"❌ Failed to send email to {job['recipient']}: {job['error']}")
+        elif job["status"] == "retrying":
+            st.warning(f"🔁 Retrying {job['recipient']} (attempt {job['attempts']} failed: {job['error']})")
+        else:
+            st.info(f"📤 Sending report to {job['recipient']}...")
+
+# ✉️ Typing an address or clicking Send reruns only this section; the report itself is already registered above
+@st.fragment
+def email_section(pdf_report):
+    with section("Email"):
+        st.markdown("### 📨 Email This Report")
+        recipient_email = st.text_input("Enter email address to send the report", placeholder="you@example.com")
+
+        if st.button("Send Email Report") and recipient_email:
+            # ✅ UI-level validation of malformed email inputs
+            if not re.match(r"[^@]+@[^@]+\.[^@]+", recipient_email):
+                st.error("❌ Please enter a valid email address.")
+            else:
+                try:
+                    # ✉️ Queued for the background sender; the PDF renders there too, so the page never waits on SMTP
+                    job_id = EMAIL_QUEUE.submit(
+                        recipient_email,
+                        "Your Real Estate Evaluation Report",
+                        "Please find attached your real estate evaluation report.",
+                        attachment=pdf_report,
+                        filename="real_estate_report.pdf",
+                    )
+                    st.session_state.setdefault("email_jobs_dual", []).append(job_id)
+                except queue.Full as e:
+                    st.error(f"❌ Email queue is full: {e}")
+
+        email_pending = any((EMAIL_QUEUE.status(job_id) or {}).get("status") in ("queued", "sending", "retrying")
+                            for job_id in st.session_state.get("email_jobs_dual", []))
+        st.fragment(run_every=2 if email_pending else None)(show_email_status)()
+
+# 🧩 Property inputs and everything computed from them, as one fragment: editing A or B reruns this
+# section only (not the header, manual or shared sidebar inputs, which still rerun the page). A and B
+# can't be separate fragments because the verdict, comparison chart and both PDFs need the two together.
+@st.fragment
+def deal_section():
+    with section("Deals"):
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.subheader("🏠 Property A")
+            purchase_price_a = st.number_input("Purchase Price A", value=300000)
+            down_payment_pct_a = st.slider("Down Payment A (%)", 0.0, 100.0, value=20.0, step=1.0)
+            rent_a = st.number_input("Monthly Rent A", value=2000)
+            monthly_expenses_a = st.number_input("Monthly Expenses A", value=300, key="monthly_expenses_a")
+            appreciation_rate_a = st.slider("Annual Appreciation A (%)", 0.0, 10.0, value=3.0, step=0.1, key="appreciation_rate_a")
+            rent_growth_rate_a = st.slider("Annual Rent Growth A (%)", 0.0, 10.0, value=2.0, step=0.1, key="rent_growth_rate_a")
+            time_horizon_a = st.slider("🏁 Investment Time Horizon A (Years)", 1, 30, value=10, key="time_horizon_a")
+            # ...add other inputs like interest rate, years, etc.
+
+        with col2:
+            st.subheader("🏘️ Property B")
+            purchase_price_b = st.number_input("Purchase Price B", value=320000)
+            down_payment_pct_b = st.slider("Down Payment B (%)", 0.0, 100.0, value=20.0, step=1.0)
+            rent_b = st.number_input("Monthly Rent B", value=2100)
+            monthly_expenses_b = st.number_input("Monthly Expenses B", value=300, key="monthly_expenses_b")
+            appreciation_rate_b = st.slider("Annual Appreciation B (%)", 0.0, 10.0, value=3.0, step=0.1, key="appreciation_rate_b")
+            rent_growth_rate_b = st.slider("Annual Rent Growth B (%)", 0.0, 10.0, value=2.0, step=0.1, key="rent_growth_rate_b")
+            time_horizon_b = st.slider("🏁 Investment Time Horizon A (Years)", 1, 30, value=10, key="time_horizon_b")
+            # ...same structure
+
+        # 🏗️ Capital Improvements Tracker
+        # Each upgrade is paid out of its year's cash flow and its rent uplift starts the year after,
+        # so it feeds that property's projection (cash flow, IRR, equity multiple) like any other input
+        with st.expander("🏗️ Capital Improvements (A & B)", expanded=False):
+            st.caption("Record upgrades like kitchen remodels, HVAC systems, or roof replacements for either property. "
+                       "Year 1 is the first year after purchase; the rent uplift applies from the following year.")
+
+            # Editable table with ROI input
+            initial_data = pd.DataFrame({
+                "Property": ["A"],
+                "Year": [""],
+                "Amount ($)": [""],
+                "Description": [""],
+                "Rent Uplift ($/mo)": [""]
+            })
+
+            improvements_df = st.data_editor(
+                initial_data,
+                num_rows="dynamic",
+                width='stretch',
+                column_config={"Property": st.column_config.SelectboxColumn("Property", options=["A", "B"], required=True)},
+                key="improvements_editor_dual"
+            )
+
+            # Convert to numbers and compute derived values
+            improvements_df["Year"] = pd.to_numeric(improvements_df["Year"], errors="coerce")
+            improvements_df["Amount ($)"] = pd.to_numeric(improvements_df["Amount ($)"], errors="coerce")
+            improvements_df["Rent Uplift ($/mo)"] = pd.to_numeric(improvements_df["Rent Uplift ($/mo)"], errors="coerce").fillna(0.0)
+
+            # Rows with a property, a whole year >= 1 and an amount become capex events for the engine
+            events_df = improvements_df.dropna(subset=["Property", "Year", "Amount ($)"])
+            events_df = events_df[(events_df["Year"] >= 1) & (events_df["Year"] == events_df["Year"].round())]
+
+            def capex_for(label):
+                rows = events_df[events_df["Property"] == label]
+                return tuple(zip(rows["Year"].astype(int), rows["Amount ($)"], rows["Rent Uplift ($/mo)"]))
+
+            capex_a, capex_b = capex_for("A"), capex_for("B")
+
+            # Totals per property
+            for label, capex in (("A", capex_a), ("B", capex_b)):
+                total_cost = sum(amount for _, amount, _ in capex)
+                if total_cost > 0:
+                    weighted_roi = sum(uplift for _, _, uplift in capex) * 12 / total_cost * 100
+                    st.success(f"📊 Property {label}: weighted ROI from capital improvements {weighted_roi:.2f}% (based on ${total_cost:,.0f} spent)")
+            if len(events_df) < improvements_df[["Year", "Amount ($)"]].notna().any(axis=1).sum():
+                st.warning("⚠️ Rows need a Property, a whole Year (1 or later) and an Amount to count.")
+
+        # Calculate metrics
+        # Cache misses go through each property's Projection, so a slider drag only computes what changed
+        projection_a = st.session_state.setdefault("projection_a", Projection())
+        projection_b = st.session_state.setdefault("projection_b", Projection())
+
+        # ---- Property A Metrics ----
+        metrics_a = cached_calculate_metrics(
+            purchase_price_a,
+            rent_a,
+            down_payment_pct_a,
+            mortgage_rate,
+            mortgage_term,
+            monthly_expenses_a,
+            vacancy_rate,
+            appreciation_rate_a,
+            rent_growth_rate_a,
+            time_horizon_a,
+            capex=capex_a,
+            compute=projection_a.calculate,
+        )
+
+        # ---- Property B Metrics ----
+        metrics_b = cached_calculate_metrics(
+            purchase_price_b,
+            rent_b,
+            down_payment_pct_b,
+            mortgage_rate,
+            mortgage_term,
+            monthly_expenses_b,
+            vacancy_rate,
+            appreciation_rate_b,
+            rent_growth_rate_b,
+            time_horizon_b,
+            capex=capex_b,
+            compute=projection_b.calculate,
+        )
+
+
+
+        if metrics_a and metrics_b:
+            # 🏠 Add address + zip support for dual PDF table
+            comparison_pdf = PDF_JOBS.lazy(  # 📄 rendered only when downloaded
+                generate_comparison_pdf_table_style,
+                metrics_a, metrics_b,
+                address_a=address_a,
+                zip_a=zip_code_a,
+                address_b=address_b,
+                zip_b=zip_code_b
+            )
+
+            st.download_button(
+                label="📄 Download Comparison PDF",
+                data=comparison_pdf,
+                file_name="comparison_report.pdf",
+                mime="application/pdf",
+                key="download_comparison_pdf",
+                on_click="ignore"
+            )
+
+
+        # Title
+        #st.markdown("""<div style='text-align: center; margin-top: -40px;'><h1>🏡 Real Estate Deal Evaluator</h1></div>""", unsafe_allow_html=True)
+
+        #load_dotenv()
+
+        # Prepare inputs and call AI verdict generator
+        verdict_input = {
+            "ROI (%)": f"{metrics_a.get('ROI (%)', 0)} vs {metrics_b.get('ROI (%)', 0)}",
+            "Multi-Year Cash Flow A": metrics_a.get("Multi-Year Cash Flow", []),
+            "Multi-Year Cash Flow B": metrics_b.get("Multi-Year Cash Flow", []),
+            "Cap Rate (%) A": metrics_a.get("Cap Rate (%)", 0),
+            "Cap Rate (%) B": metrics_b.get("Cap Rate (%)", 0),
+            "Cash-on-Cash Return (%) A": metrics_a.get("Cash-on-Cash Return (%)", 0),
+            "Cash-on-Cash Return (%) B": metrics_b.get("Cash-on-Cash Return (%)", 0),
+        }
+
+        summary_text, grade = generate_ai_verdict(metrics_a, metrics_b)
+
+        # Add verdict to metrics so pdf_generator can consume it
+        metrics_a["AI Verdict"] = summary_text
+        metrics_a["Grade"] = grade
+        metrics_b["AI Verdict"] = summary_text
+        metrics_b["Grade"] = grade
+
+
+        # Prepare property_data
+        property_data = {
+            "Purchase Price A": purchase_price_a,
+            "Purchase Price B": purchase_price_b,
+            "Monthly Rent A": rent_a,
+            "Monthly Rent B": rent_b,
+            "Down Payment (%) A": down_payment_pct_a,
+            "Down Payment (%) B": down_payment_pct_b,
+            "Monthly Expenses A": monthly_expenses_a,
+            "Monthly Expenses B": monthly_expenses_b,
+            "Appreciation Rate (%) A": appreciation_rate_a,
+            "Appreciation Rate (%) B": appreciation_rate_b,
+            "Rent Growth Rate (%) A": rent_growth_rate_a,
+            "Rent Growth Rate (%) B": rent_growth_rate_b,
+    
+            # Shared inputs
+            "Mortgage Rate (%)": mortgage_rate,
+            "Mortgage Term (Years)": mortgage_term,
+            "Vacancy Rate (%)": vacancy_rate,
+        }
+
+        # Generate PDF
+        #summary_text = f"Property A is a {metrics_a['Grade']}-grade rental, and Property B is a {metrics_b['Grade']}-grade rental with upside potential"
+        #pdf_bytes = generate_pdf(property_data, metrics_a, metrics_b, summary_text)
+
+        # 🔁 Updated summary (same)
+        summary_text = f"Property A is a {metrics_a['Grade']}-grade rental, and Property B is a {metrics_b['Grade']}-grade rental with upside potential"
+
+        # ✅ Create property A and B data dictionaries
+        property_data_a = {
+            "Address": address_a,
+            "ZIP Code": zip_code_a,
+            "Purchase Price": purchase_price_a,
+            "Monthly Rent": rent_a,
+            "Down Payment (%)": down_payment_pct_a,
+            "Monthly Expenses": monthly_expenses_a,
+            "Appreciation Rate (%)": appreciation_rate_a,
+            "Rent Growth Rate (%)": rent_growth_rate_a,
+            "🏁 Investment Time Horizon (Years)": time_horizon_a
+        }
+
+        property_data_b = {
+            "Address": address_b,
+            "ZIP Code": zip_code_b,
+            "Purchase Price": purchase_price_b,
+            "Monthly Rent": rent_b,
+            "Down Payment (%)": down_payment_pct_b,
+            "Monthly Expenses": monthly_expenses_b,
+            "Appreciation Rate (%)": appreciation_rate_b,
+            "Rent Growth Rate (%)": rent_growth_rate_b,
+            "🏁 Investment Time Horizon (Years)": time_horizon_b
+        }
+
+        # ✅ Now generate dual PDF
+        # ✅ Now generate dual PDF with property address and zip
+        pdf_report = PDF_JOBS.lazy(  # 📄 rendered only when emailed
+            generate_pdf,
+            property_data_a={
+                "Address": address_a,
+                "ZIP Code": zip_code_a,
+                "Purchase Price": purchase_price_a,
+                "Monthly Rent": rent_a,
+                "Monthly Expenses": monthly_expenses_a,
+                "Down Payment (%)": down_payment_pct_a,
+                "Appreciation Rate (%)": appreciation_rate_a,
+                "Rent Growth Rate (%)": rent_growth_rate_a,
+                "Mortgage Rate (%)": mortgage_rate,
+                "Mortgage Term (Years)": mortgage_term,
+                "Vacancy Rate (%)": vacancy_rate,
+            },
+            property_data_b={
+                "Address": address_b,
+                "ZIP Code": zip_code_b,
+                "Purchase Price": purchase_price_b,
+                "Monthly Rent": rent_b,
+                "Monthly Expenses": monthly_expenses_b,
+                "Down Payment (%)": down_payment_pct_b,
+                "Appreciation Rate (%)": appreciation_rate_b,
+                "Rent Growth Rate (%)": rent_growth_rate_b,
+                "Mortgage Rate (%)": mortgage_rate,
+                "Mortgage Term (Years)": mortgage_term,
+                "Vacancy Rate (%)": vacancy_rate,
+            },
+            metrics_a=metrics_a,
+            metrics_b=metrics_b,
+            summary_text=summary_text
+        )
+        # ✅ Extract cash flow lists from metrics for plotting
+        cf_a = metrics_a.get("Multi-Year Cash Flow", [])
+        cf_b = metrics_b.get("Multi-Year Cash Flow", [])
+
+        # Ensure they are lists of numbers
+        if isinstance(cf_a, str):
+            cf_a = [float(x.strip()) for x in cf_a.strip("[]").split(",") if x.strip()]
+        if isinstance(cf_b, str):
+            cf_b = [float(x.strip()) for x in cf_b.strip("[]").split(",") if x.strip()]
+
+
+        # 📊 New 6-Curve Dual-Y Comparison Plot
+        st.subheader("📈 Multi-Year ROI, Rent & Cash Flow Comparison (A vs B)")
+
+        # ✅ INSERT THE NEW BLOCK RIGHT AFTER THAT:
+        st.subheader("📈 Long-Term Metrics")
+
+        # --- Property A Metrics ---
+        col1, col2, col3 = st.columns(3)
+        col1.metric("IRR A (Operational) (%)", format_cell("{:.2f}", metrics_a.get('IRR (Operational) (%)', 0)))
+        col2.metric("IRR A (Total incl. Sale) (%)", format_cell("{:.2f}", metrics_a.get('IRR (Total incl. Sale) (%)', 0)))
+        col3.metric("Equity Multiple A", f"{metrics_a.get('equity_multiple', 0):.2f}")
+
+        # --- Property B Metrics ---
+        col4, col5, col6 = st.columns(3)
+        col4.metric("IRR B (Operational) (%)", format_cell("{:.2f}", metrics_b.get('IRR (Operational) (%)', 0)))
+        col5.metric("IRR B (Total incl. Sale) (%)", format_cell("{:.2f}", metrics_b.get('IRR (Total incl. Sale) (%)', 0)))
+        col6.metric("Equity Multiple B", f"{metrics_b.get('equity_multiple', 0):.2f}")
+
+        # Extract data from metrics
+        # Pad shorter cash flow list with None or 0
+        max_years = max(len(cf_a), len(cf_b))
+        cf_a += [0] * (max_years - len(cf_a))
+        cf_b += [0] * (max_years - len(cf_b))
+
+        rent_a = metrics_a.get("Annual Rents $ (by year)", [])
+        rent_b = metrics_b.get("Annual Rents $ (by year)", [])
+        roi_a = metrics_a.get("Annual ROI % (by year)", [])
+        roi_b = metrics_b.get("Annual ROI % (by year)", [])
+
+        # Use longest time horizon
+        #years = list(range(1, max(len(cf_a), len(cf_b)) + 1))
+        # 🖼️ Rendered from the arrays, once per distinct content (each property over its own horizon)
+        st.image(dual_cash_flow_chart((cf_a, rent_a, roi_a), (cf_b, rent_b, roi_b)), width='stretch')
+
+        # 🎲 Monte Carlo and 📨 Email run on this rerun's inputs and report
+        monte_carlo_section(
+            (purchase_price_a, property_data["Monthly Rent A"], down_payment_pct_a, mortgage_rate, mortgage_term,
+             monthly_expenses_a, vacancy_rate, appreciation_rate_a, rent_growth_rate_a, time_horizon_a),
+            (purchase_price_b, property_data["Monthly Rent B"], down_payment_pct_b, mortgage_rate, mortgage_term,
+             monthly_expenses_b, vacancy_rate, appreciation_rate_b, rent_growth_rate_b, time_horizon_b),
+        )
+        email_section(pdf_report)
+
+deal_section()
+
+# ⚡ Shared result cache (unchanged inputs skip the engine on reruns)
+cache_stats = METRICS_CACHE.stats()
+st.sidebar.caption(f"⚡ Result cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses ({cache_stats['disk_hits']} from disk), {cache_stats['entries']} deals cached")
+
+# ⏱️ Full-rerun latency readout (fragment reruns show their own under each section)
+page_finished("dual", rerun_started)
@@ -0,0 +1,152 @@
+
+import streamlit as st
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from dotenv import load_dotenv
+from sensitivity_engine import sensitivity_grid, tornado
+from chart_engine import heatmap_chart, tornado_chart
+from rerun_timer import page_started, page_finished, section
+import numpy as np
+
+load_dotenv()
+
+st.set_page_config(page_title="Sensitivity Analysis", layout="wide")
+st.title("🎯 Sensitivity Analysis")
+st.markdown("See how IRR and Cash-on-Cash move across a whole grid of inputs at once, and which input matters most.")
+
+# Default password (can be overridden by .env)
+APP_PASSWORD = os.getenv("APP_PASSWORD", "SmartInvest1!")
+
+# Use session state to remember successful login
+if "authenticated" not in st.session_state:
+    st.session_state.authenticated = False
+
+# Show password input only if not yet authenticated
+if not st.session_state.authenticated:
+    password = st.text_input("🔒 Please enter access password", type="password")
+
+    if password == APP_PASSWORD:
+        st.session_state.authenticated = True
+        st.rerun()  # 🔁 Clear the password input and reload
+    elif password:
+        st.error("❌ Incorrect password. Please try again.")
+    st.stop()  # 🔒 Block access until correct
+
+# ⏱️ Rerun latency (sidebar readout at the bottom of the page)
+rerun_started = page_started("sensitivity")
+
+# 📌 Base Case (same inputs as the single-property evaluator)
+st.sidebar.header("📌 Base Case")
+purchase_price = st.sidebar.number_input("Purchase Price ($)", min_value=10000, value=300000, step=1000)
+monthly_rent = st.sidebar.number_input("Expected Monthly Rent ($)", min_value=0, value=2000, step=100)
+monthly_expenses = st.sidebar.number_input("Monthly Expenses ($)", min_value=0, value=300, step=50)
+down_payment_pct = st.sidebar.slider("Down Payment (%)", 0, 100, 20)
+mortgage_rate = st.sidebar.slider("Mortgage Rate (%)", 0.0, 15.0, 6.5)
+mortgage_term = st.sidebar.number_input("Mortgage Term (years)", min_value=1, value=30)
+vacancy_rate = st.sidebar.slider("Vacancy Rate (%)", 0, 100, 5)
+appreciation_rate = st.sidebar.slider("Annual Appreciation Rate (%)", 0, 10, 3)
+rent_growth_rate = st.sidebar.slider("Annual Rent Growth Rate (%)", 0, 10, 3)
+time_horizon = st.sidebar.slider("🏁 Investment Time Horizon (Years)", 1, 30, 10)
+
+base_inputs = {
+    "purchase_price": purchase_price,
+    "monthly_rent": monthly_rent,
+    "down_payment_pct": down_payment_pct,
+    "mortgage_rate": mortgage_rate,
+    "mortgage_term": mortgage_term,
+    "monthly_expenses": monthly_expenses,
+    "vacancy_rate": vacancy_rate,
+    "appreciation_rate": appreciation_rate,
+    "rent_growth_rate": rent_growth_rate,
+    "time_horizon": time_horizon,
+}
+
+# Sweepable inputs: label -> (input name, low, high) around the base case
+AXIS_CHOICES = {
+    "Mortgage Rate (%)": ("mortgage_rate", max(0.0, mortgage_rate - 3.0), mortgage_rate + 3.0),
+    "Purchase Price ($)": ("purchase_price", purchase_price * 0.8, purchase_price * 1.2),
+    "Vacancy Rate (%)": ("vacancy_rate", 0.0, min(100.0, vacancy_rate + 15.0)),
+    "Monthly Rent ($)": ("monthly_rent", monthly_rent * 0.8, monthly_rent * 1.2),
+    "Down Payment (%)": ("down_payment_pct", max(0.0, down_payment_pct - 15.0), min(100.0, down_payment_pct + 15.0)),
+    "Appreciation Rate (%)": ("appreciation_rate", max(0.0, appreciation_rate - 3.0), appreciation_rate + 3.0),
+    "Rent Growth Rate (%)": ("rent_growth_rate", max(0.0, rent_growth_rate - 3.0), rent_growth_rate + 3.0),
+    "Monthly Expenses ($)": ("monthly_expenses", monthly_expenses * 0.5, monthly_expenses * 1.5),
+}
+METRIC_CHOICES = {
+    "IRR (Total incl. Sale) (%)": "IRR (Total incl. Sale) (%)",
+    "Cash-on-Cash Return (%)": "Cash-on-Cash Return (%)",
+    "Equity Multiple": "equity_multiple",
+}
+
+
+# 🔢 Whole grid in one vectorized call, cached per base case / axes
+@st.cache_data(show_spinner=False, max_entries=16)
+def run_grid(base, axes):
+    grid = sensitivity_grid(dict(base), {name: np.linspace(lo, hi, steps) for name, lo, hi, steps in axes})
+    return grid.axes, {name: np.asarray(values) for name, values in grid.metrics.items()}
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def run_tornado(base, metric):
+    return tornado(dict(base), metric=metric)
+
+
+# 🧩 Each chart is a fragment: its own controls rerun only that chart (sidebar inputs rerun both)
+@st.fragment
+def heatmap_section():
+    with section("Heatmap"):
+        st.subheader("🌡️ Sensitivity Heatmap")
+        col1, col2, col3, col4 = st.columns(4)
+        x_label = col1.selectbox("X axis", list(AXIS_CHOICES), index=1)
+        y_label = col2.selectbox("Y axis", [label for label in AXIS_CHOICES if label != x_label], index=0)
+        z_options = ["(none)"] + [label for label in AXIS_CHOICES if label not in (x_label, y_label)]
+        z_label = col3.selectbox("Third axis (slice)", z_options, index=z_options.index("Vacancy Rate (%)") if "Vacancy Rate (%)" in z_options else 0)
+        metric_label = col4.selectbox("Metric", list(METRIC_CHOICES))
+        steps = st.slider("Grid points per axis", 5, 41, 21, step=2)
+
+        axes = [(AXIS_CHOICES[y_label][0], AXIS_CHOICES[y_label][1], AXIS_CHOICES[y_label][2], steps),
+                (AXIS_CHOICES[x_label][0], AXIS_CHOICES[x_label][1], AXIS_CHOICES[x_label][2], steps)]
+        if z_label != "(none)":
+            axes.append((AXIS_CHOICES[z_label][0], AXIS_CHOICES[z_label][1], AXIS_CHOICES[z_label][2], steps))
+
+        grid_axes, grid_metrics = run_grid(tuple(base_inputs.items()), tuple(axes))
+        values = grid_metrics[METRIC_CHOICES[metric_label]]
+        y_values, x_values = grid_axes[axes[0][0]], grid_axes[axes[1][0]]
+
+        # Slicing the cached 3-D grid is instant; only the heatmap is redrawn
+        if z_label != "(none)":
+            z_values = grid_axes[axes[2][0]]
+            z_index = st.select_slider(z_label, options=list(range(len(z_values))), value=len(z_values) // 2,
+                                       format_func=lambda i: f"{z_values[i]:,.2f}")
+            values = values[:, :, z_index]
+
+        st.image(heatmap_chart(values, x_values, y_values, base_inputs[axes[1][0]], base_inputs[axes[0][0]],
+                               x_label, y_label, metric_label), width='stretch')
+        st.caption(f"{values.size:,} scenarios shown; {int(np.prod([len(v) for v in grid_axes.values()])):,} evaluated in one batch.")
+
+heatmap_section()
+
+
+# 🌪️ Tornado: which input moves the metric the most
+@st.fragment
+def tornado_section():
+    with section("Tornado"):
+        st.subheader("🌪️ What Moves the Needle")
+        tornado_metric = st.radio("Tornado metric", ["IRR (Total incl. Sale) (%)", "Cash-on-Cash Return (%)"], horizontal=True)
+        bars = run_tornado(tuple(base_inputs.items()), tornado_metric)
+        labels = {name: label for label, (name, _, _) in AXIS_CHOICES.items()}
+
+        rows = list(reversed(bars))
+        st.image(tornado_chart(
+            [bar.metric_low for bar in rows],
+            [bar.metric_high for bar in rows],
+            rows[0].metric_base if rows else 0.0,
+            [f"{labels.get(bar.input, bar.input)}\n{bar.low_value:,.1f} → {bar.high_value:,.1f}" for bar in rows],
+            tornado_metric,
+        ), width='stretch')
+
+tornado_section()
+
+# ⏱️ Full-rerun latency readout
+page_finished("sensitivity", rerun_started)
@@ -0,0 +1,136 @@
+
+import streamlit as st
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from dotenv import load_dotenv
+from comparison_engine import PARETO_METRICS, compare_properties
+from pdf_multi import generate_multi_comparison_pdf
+from pdf_jobs import PDF_JOBS
+from chart_engine import frontier_chart
+from rerun_timer import page_started, page_finished
+import numpy as np
+import pandas as pd
+
+load_dotenv()
+
+st.set_page_config(page_title="Multi-Property Comparison", layout="wide")
+st.title("🏘️ Multi-Property Comparison")
+st.markdown("Compare any number of properties at once and see which ones are on the IRR / Cash-on-Cash / Equity Multiple frontier.")
+
+# Default password (can be overridden by .env)
+APP_PASSWORD = os.getenv("APP_PASSWORD", "SmartInvest1!")
+
+# Use session state to remember successful login
+if "authenticated" not in st.session_state:
+    st.session_state.authenticated = False
+
+# Show password input only if not yet authenticated
+if not st.session_state.authenticated:
+    password = st.text_input("🔒 Please enter access password", type="password")
+
+    if password == APP_PASSWORD:
+        st.session_state.authenticated = True
+        st.rerun()  # 🔁 Clear the password input and reload
+    elif password:
+        st.error("❌ Incorrect password. Please try again.")
+    st.stop()  # 🔒 Block access until correct
+
+# ⏱️ Rerun latency (sidebar readout at the bottom of the page)
+rerun_started = page_started("multi")
+
+# 📋 Properties: one editable row each (one widget however many properties there are)
+INPUT_COLUMNS = {
+    "name": "Property",
+    "purchase_price": "Price ($)",
+    "monthly_rent": "Rent ($/mo)",
+    "monthly_expenses": "Expenses ($/mo)",
+    "down_payment_pct": "Down (%)",
+    "mortgage_rate": "Rate (%)",
+    "mortgage_term": "Term (yrs)",
+    "vacancy_rate": "Vacancy (%)",
+    "appreciation_rate": "Appreciation (%)",
+    "rent_growth_rate": "Rent Growth (%)",
+    "time_horizon": "Horizon (yrs)",
+}
+DEFAULT_PROPERTIES = pd.DataFrame([
+    ["123 Main St", 300000, 2000, 300, 20, 6.5, 30, 5, 3, 3, 10],
+    ["45 Oak Ave", 350000, 2400, 350, 20, 6.5, 30, 5, 3, 3, 10],
+    ["9 Pine Rd", 250000, 1800, 250, 25, 6.5, 30, 7, 2, 2, 10],
+    ["77 Elm Ct", 420000, 2900, 450, 20, 6.5, 30, 5, 4, 3, 10],
+], columns=list(INPUT_COLUMNS))
+
+st.subheader("📋 Properties")
+st.caption("Add, edit or delete rows; 10–20 properties work fine.")
+edited = st.data_editor(
+    DEFAULT_PROPERTIES,
+    num_rows="dynamic",
+    width='stretch',
+    column_config={key: st.column_config.Column(label) for key, label in INPUT_COLUMNS.items()},
+    key="properties",
+)
+
+numeric_columns = [key for key in INPUT_COLUMNS if key != "name"]
+table = edited.copy()
+table[numeric_columns] = table[numeric_columns].apply(pd.to_numeric, errors="coerce")
+complete = table[numeric_columns].notna().all(axis=1)
+if (~complete).any():
+    st.warning(f"⚠️ Skipping {int((~complete).sum())} row(s) with missing inputs.")
+table = table[complete].reset_index(drop=True)
+table["name"] = [name if isinstance(name, str) and name.strip() else f"Property {i + 1}" for i, name in enumerate(table["name"])]
+if table.empty:
+    st.info("Add at least one property to compare.")
+    st.stop()
+
+
+# 🔢 All properties in one vectorized call, cached per table
+@st.cache_data(show_spinner=False, max_entries=32)
+def run_comparison(rows):
+    frame = pd.DataFrame(list(rows), columns=list(INPUT_COLUMNS))
+    return compare_properties(frame, names=frame["name"].tolist())
+
+
+rows = tuple(table.itertuples(index=False, name=None))
+comparison = run_comparison(rows)
+metrics = comparison.metrics
+
+# 🏆 Results table, best total IRR first
+st.subheader("🏆 Results")
+results = pd.DataFrame({
+    "Rank": comparison.rank,
+    "Property": comparison.names,
+    "Pareto": np.where(comparison.pareto, "⭐", ""),
+    "Grade": metrics["Grade"],
+    "IRR Total (%)": metrics["IRR (Total incl. Sale) (%)"],
+    "IRR Ops (%)": metrics["IRR (Operational) (%)"],
+    "CoC (%)": metrics["Cash-on-Cash Return (%)"],
+    "Cap Rate (%)": metrics["Cap Rate (%)"],
+    "Equity Multiple": metrics["equity_multiple"],
+    "Year-1 Cash Flow ($)": metrics["First Year Cash Flow ($)"],
+    "Net Sale ($)": metrics["Net Sale Proceeds ($)"],
+}).sort_values("Rank")
+st.dataframe(results, hide_index=True, width='stretch')
+frontier = [name for name, on in zip(comparison.names, comparison.pareto) if on]
+st.caption(f"⭐ Pareto frontier (no other property is at least as good on all of {', '.join(PARETO_METRICS)}): {', '.join(frontier)}")
+
+# 📈 IRR vs Cash-on-Cash, bubble size = equity multiple
+st.subheader("📈 Return Frontier")
+st.image(frontier_chart(
+    comparison.names,
+    metrics["Cash-on-Cash Return (%)"],
+    metrics["IRR (Total incl. Sale) (%)"],
+    metrics["equity_multiple"],
+    comparison.pareto,
+), width='stretch')
+
+# 📄 PDF table (rendered only when downloaded, once per table)
+st.download_button(
+    label="📄 Download Comparison Table (PDF)",
+    data=PDF_JOBS.lazy(generate_multi_comparison_pdf, comparison),
+    file_name="multi_property_comparison.pdf",
+    mime="application/pdf",
+    on_click="ignore",  # downloading doesn't rerun the page
+)
+
+# ⏱️ Full-rerun latency readout
+page_finished("multi", rerun_started)
@@ -1,10 +1,9 @@
 
+import logging
 from io import BytesIO
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet , ParagraphStyle
-#from reportlab.pdfgen import canvas
+from instrumentation import timed
+
+log = logging.getLogger("deal_analyzer.pdf")
 
 # ✅ Keys to skip (prevent duplicates like "10yr Cash Flow")
 skip_keys = {"10Yr Cash Flow", "10yr Cash Flow"}
@@ -54,9 +53,10 @@ def parse_numeric(value):
         return float(str(value).replace(",", "").strip())
     except:
         return 0.0
+@timed("verdict")
 def generate_ai_verdict(metrics_a: dict, metrics_b: dict) -> tuple[str, str]:
-    print("🗝️ Property A keys:", list(metrics_a.keys()))
-    print("🗝️ Property B keys:", list(metrics_b.keys()))
+    log.debug("Property A keys: %s", list(metrics_a.keys()))
+    log.debug("Property B keys: %s", list(metrics_b.keys()))
 
     roi_a = parse_numeric(metrics_a.get("Final Year ROI (%)") or metrics_a.get("ROI (%)", 0))
     roi_b = parse_numeric(metrics_b.get("Final Year ROI (%)") or metrics_b.get("ROI (%)", 0))
@@ -84,9 +84,8 @@ def generate_ai_verdict(metrics_a: dict, metrics_b: dict) -> tuple[str, str]:
 
     # ✅ Use Multi-Year Cash Flow to sum total
     raw_cash_flow = metrics.get("Multi-Year Cash Flow", [])
-    print("🧾 Raw cash flow data (before processing):", raw_cash_flow)
+    log.debug("Raw cash flow data (before processing): %s", raw_cash_flow)
 
-    #print("🧾 Raw cash flow data (before processing):", raw_cash_flow)  # Debug line
 
    # ✅ Step 1: Handle case where it's a comma-separated string
     if isinstance(raw_cash_flow, str):
@@ -102,8 +101,8 @@ def generate_ai_verdict(metrics_a: dict, metrics_b: dict) -> tuple[str, str]:
 
     cash_flow = sum(raw_cash_flow)
 
-    print("🧾 Parsed cash flow list:", raw_cash_flow)
-    print(f"🧪 Debug: ROI={roi}, CashFlow={cash_flow}, CoC Return={coc_return}")
+    log.debug("Parsed cash flow list: %s", raw_cash_flow)
+    log.debug("ROI=%s, CashFlow=%s, CoC Return=%s", roi, cash_flow, coc_return)
     
     # Sample grading logic
     if roi > 200 and cash_flow > 20000 and coc_return >= 5:
@@ -124,7 +123,14 @@ def generate_ai_verdict(metrics_a: dict, metrics_b: dict) -> tuple[str, str]:
 
     return summary, grade
 
+@timed("pdf")
 def generate_pdf(property_data_a, property_data_b, metrics_a, metrics_b, summary_text):
+    # reportlab is imported here, not at module level, so loading the page doesn't pay for it
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
     address_a = property_data_a.get("Address A", "")
     zip_a = property_data_a.get("ZIP Code A", "")
     address_b = property_data_b.get("Address B", "")
@@ -222,7 +228,11 @@ generate_pdf_report = generate_pdf
 
 #### ***** Full generate_comparison_pdf()  ******
 
+@timed("pdf")
 def generate_comparison_pdf(metrics_a, metrics_b):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
     buffer = BytesIO()
     c = canvas.Canvas(buffer, pagesize=letter)
 
@@ -257,7 +267,13 @@ def generate_comparison_pdf(metrics_a, metrics_b):
 
 # Existing PDF generation logic...
 
+@timed("pdf")
 def generate_comparison_pdf_table_style(metrics_a, metrics_b, address_a="", zip_a="", address_b="", zip_b=""):
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=letter)
     elements = []
@@ -0,0 +1,112 @@
+"""
+On-demand PDF reports.
+
+The pages used to build every report on every rerun (the dual page builds
+two reportlab documents per slider move), although a download is rare.
+Now a page only registers the report it *would* build:
+
+    report = PDF_JOBS.lazy(generate_pdf, property_data, metrics, summary_text)
+    st.download_button("📄 Download PDF Report", data=report, ...)   # rendered on click
+    attachment = report()                                             # or when emailing
+
+lazy() snapshots the arguments (the pages keep mutating metrics
+afterwards) and hashes them into a content key. The PDF is rendered the
+first time someone calls the job, through disk_cache.cached_pdf, and the job
+is memoized per key, so the same report is built at most once per process
+(and not at all after a restart when the disk cache already has it).
+
+With prefetch on (DEAL_ANALYZER_PDF_PREFETCH=1) lazy() also queues the
+render on a single background worker, so the file is usually ready by the
+time the button is clicked; the UI never waits for it either way.
+"""
+import copy
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from disk_cache import cached_pdf, fingerprint
+from instrumentation import increment
+
+log = logging.getLogger("deal_analyzer.pdf")
+
+DEFAULT_MAX_JOBS = 64
+
+
+class PdfJob:
+    """A report that renders on first call; calling it again returns the same bytes."""
+
+    def __init__(self, key, generate, args, kwargs):
+        self.key = key
+        self._generate = generate
+        self._args = args
+        self._kwargs = kwargs
+        self._lock = threading.Lock()
+        self._pdf = None
+        self._future = None
+
+    def done(self):
+        return self._pdf is not None
+
+    def __call__(self):
+        with self._lock:
+            if self._pdf is None:
+                if self._future is not None:
+                    self._pdf = self._future.result()
+                else:
+                    self._pdf = self._render()
+                self._args = self._kwargs = None  # only the bytes are needed from now on
+            return self._pdf
+
+    def _render(self):
+        increment("pdf.rendered")
+        return cached_pdf(self._generate, *self._args, **self._kwargs)
+
+
+class PdfJobs:
+    """Bounded, process-wide registry of PdfJobs by content key."""
+
+    def __init__(self, max_jobs=DEFAULT_MAX_JOBS, prefetch=False):
+        self.max_jobs = max_jobs
+        self.prefetch = prefetch
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = None
+        self.requested = 0
+        self.reused = 0
+
+    def lazy(self, generate, *args, **kwargs):
+        """Register generate(*args, **kwargs) and return its PdfJob (nothing is rendered yet)."""
+        key = fingerprint(generate.__module__, generate.__qualname__, args, kwargs)
+        with self._lock:
+            self.requested += 1
+            job = self._jobs.get(key)
+            if job is not None:
+                self._jobs.move_to_end(key)
+                self.reused += 1
+                return job
+            job = PdfJob(key, generate, copy.deepcopy(args), copy.deepcopy(kwargs))
+            self._jobs[key] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+            if self.prefetch:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf")
+                job._future = self._executor.submit(job._render)
+        log.debug("pdf job %s registered for %s", key[:8], generate.__qualname__)
+        return job
+
+    def stats(self):
+        with self._lock:
+            return {
+                "jobs": len(self._jobs),
+                "rendered": sum(job.done() for job in self._jobs.values()),
+                "requested": self.requested,
+                "reused": self.reused,
+                "prefetch": self.prefetch,
+            }
+
+
+# One registry per process, shared by every Streamlit session
+PDF_JOBS = PdfJobs(prefetch=os.getenv("DEAL_ANALYZER_PDF_PREFETCH", "0").lower() in ("1", "true", "yes", "on"))
@@ -0,0 +1,87 @@
+import logging
+from io import BytesIO
+from instrumentation import timed
+
+log = logging.getLogger("deal_analyzer.pdf")
+
+# Columns of the comparison table: (header, metric key, format)
+table_columns = [
+    ("Grade", "Grade", "{}"),
+    ("IRR Total (%)", "IRR (Total incl. Sale) (%)", "{:.2f}"),
+    ("IRR Ops (%)", "IRR (Operational) (%)", "{:.2f}"),
+    ("CoC (%)", "Cash-on-Cash Return (%)", "{:.2f}"),
+    ("Cap Rate (%)", "Cap Rate (%)", "{:.2f}"),
+    ("Equity Mult.", "equity_multiple", "{:.2f}"),
+    ("Year-1 CF ($)", "First Year Cash Flow ($)", "{:,.0f}"),
+    ("Mortgage ($/mo)", "Monthly Mortgage ($)", "{:,.0f}"),
+    ("Net Sale ($)", "Net Sale Proceeds ($)", "{:,.0f}"),
+]
+
+
+def format_cell(template, value):
+    if isinstance(value, float) and value != value:
+        return "N/A"
+    return template.format(value)
+
+
+@timed("pdf")
+def generate_multi_comparison_pdf(comparison, title="Multi-Property Comparison"):
+    """
+    One-page table for a comparison_engine.Comparison, one row per property.
+
+    Rows are sorted by total IRR; Pareto-frontier properties are marked and
+    shaded. Landscape letter fits about 20 properties on one page; longer
+    lists simply continue on the next page (the header row repeats).
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import landscape, letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=landscape(letter), leftMargin=30, rightMargin=30, topMargin=30, bottomMargin=30)
+    styles = getSampleStyleSheet()
+    elements = [Paragraph(title, styles["Title"])]
+
+    n = len(comparison.names)
+    frontier = [comparison.names[i] for i in range(n) if comparison.pareto[i]]
+    elements.append(Paragraph(
+        f"{n} properties compared. Pareto = on the frontier on total IRR, Cash-on-Cash and equity multiple "
+        f"(no other property is at least as good on all three): {', '.join(frontier) or 'none'}.",
+        styles["Normal"],
+    ))
+    elements.append(Spacer(1, 10))
+
+    order = sorted(range(n), key=lambda i: comparison.rank[i])
+    table_data = [["#", "Property", "Pareto"] + [header for header, _, _ in table_columns]]
+    for i in order:
+        row = [str(comparison.rank[i]), comparison.names[i], "Yes" if comparison.pareto[i] else ""]
+        for _, key, template in table_columns:
+            row.append(format_cell(template, comparison.metrics[key][i].item()))
+        table_data.append(row)
+
+    table = Table(table_data, repeatRows=1, colWidths=[24, 140, 40] + [62] * len(table_columns))
+    style = [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('ALIGN', (1, 1), (1, -1), 'LEFT'),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ]
+    for row_index, i in enumerate(order, start=1):
+        if comparison.pareto[i]:
+            style.append(('BACKGROUND', (0, row_index), (-1, row_index), colors.Color(0.85, 0.95, 0.85)))
+    table.setStyle(TableStyle(style))
+    elements.append(table)
+    elements.append(Spacer(1, 8))
+    elements.append(Paragraph(
+        "(Grades and rankings are based on estimated returns and cash flow. Informational only.)",
+        styles["Italic"],
+    ))
+
+    log.debug("multi comparison pdf: %d properties, frontier %s", n, frontier)
+    doc.build(elements)
+    buffer.seek(0)
+    return buffer.getvalue()
@@ -1,10 +1,9 @@
 
+import logging
 from io import BytesIO
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.pdfgen import canvas
+from instrumentation import timed
+
+log = logging.getLogger("deal_analyzer.pdf")
 
 # ✅ Keys to skip (prevent duplicates like "10yr Cash Flow")
 skip_keys = {"10Yr Cash Flow", "10yr Cash Flow"}
@@ -54,8 +53,9 @@ def parse_numeric(value):
         return float(str(value).replace(",", "").strip())
     except:
         return 0.0
+@timed("verdict")
 def generate_ai_verdict(metrics: dict) -> tuple[str, str]:
-    print("🗝️ Available metric keys:", list(metrics.keys()))
+    log.debug("Available metric keys: %s", list(metrics.keys()))
 
     #roi = parse_numeric(metrics.get("Final Year ROI (%)") or metrics.get("ROI (%)", 0))
     roi = parse_numeric(metrics.get("Final Year ROI (%)"))
@@ -66,9 +66,8 @@ def generate_ai_verdict(metrics: dict) -> tuple[str, str]:
 
     # ✅ Use Multi-Year Cash Flow to sum total
     raw_cash_flow = metrics.get("Multi-Year Cash Flow", [])
-    print("🧾 Raw cash flow data (before processing):", raw_cash_flow)
+    log.debug("Raw cash flow data (before processing): %s", raw_cash_flow)
 
-    #print("🧾 Raw cash flow data (before processing):", raw_cash_flow)  # Debug line
 
    # ✅ Step 1: Handle case where it's a comma-separated string
     if isinstance(raw_cash_flow, str):
@@ -84,8 +83,8 @@ def generate_ai_verdict(metrics: dict) -> tuple[str, str]:
 
     cash_flow = sum(raw_cash_flow)
 
-    print("🧾 Parsed cash flow list:", raw_cash_flow)
-    print(f"🧪 Debug: ROI={roi}, CashFlow={cash_flow}, CoC Return={coc_return}")
+    log.debug("Parsed cash flow list: %s", raw_cash_flow)
+    log.debug("ROI=%s, CashFlow=%s, CoC Return=%s", roi, cash_flow, coc_return)
     
     # Sample grading logic
     if roi > 200 and cash_flow > 20000 and coc_return >= 5:
@@ -110,7 +109,14 @@ def generate_ai_verdict(metrics: dict) -> tuple[str, str]:
 
 
 
+@timed("pdf")
 def generate_pdf(property_data, metrics, summary_text):
+    # reportlab is imported here, not at module level, so loading the page doesn't pay for it
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=letter)
     elements = []
@@ -0,0 +1,196 @@
+"""
+Portfolio aggregation.
+
+calculate_metrics looks at one deal from its own year 0. A portfolio holds
+properties bought in different years and kept for different horizons, so
+their cash flows only add up on a shared calendar:
+
+    calendar year   2019     2020     2021   ...   2031
+    A (2019, 10y)   -60000   +4200    +4300  ...   (sold 2029)
+    B (2021, 10y)                     -64000 ...   +sale
+    portfolio       -60000   +4200    -59700 ...
+
+Each property's flows come from calculate_metrics_batch (down payment in its
+purchase year, yearly cash flow after that, net sale proceeds added in its
+exit year) and are scattered onto the calendar with one bincount. Portfolio
+IRR is solved on the summed calendar flows, the equity multiple is total cash
+received over total equity invested, and the concentration of returns is
+the Herfindahl index of each property's share of the profit.
+
+A Portfolio is incremental: add() evaluates only the new properties, adds
+their flows to the running calendar totals and re-solves the one portfolio
+IRR warm-started from the last solution, so adding a property to 500 costs
+about as much as evaluating that one property.
+"""
+import datetime
+from typing import NamedTuple
+
+import numpy as np
+
+from calc_engine import BATCH_INPUTS, _round2, calculate_metrics_batch
+from irr_engine import irr_warm
+
+# The ten deal inputs plus the calendar year the property was bought
+PORTFOLIO_INPUTS = BATCH_INPUTS + ("purchase_year",)
+
+
+class PortfolioSummary(NamedTuple):
+    calendar: np.ndarray          # calendar years, first purchase .. last sale
+    cash_flow: np.ndarray         # net portfolio cash flow per calendar year (down payments negative, sales included)
+    invested: float               # total down payments
+    cash_received: float          # operating cash flow + net sale proceeds over every holding period
+    irr: float                    # portfolio IRR (%) on the calendar cash flow, NaN when unsolvable
+    irr_status: int               # irr_engine status code
+    equity_multiple: float        # cash_received / invested
+    profit: np.ndarray            # per property: cash received - down payment (holding order)
+    profit_share: np.ndarray      # profit / total profit (signed; NaN when the total is 0)
+    hhi: float                    # Herfindahl index of |profit| shares: 1/n spread evenly .. 1 all from one property
+    effective_holdings: float     # 1 / hhi, "how many equal properties the returns behave like"
+    largest_share: float          # biggest single |profit| share
+
+
+def _columns(properties, names):
+    """Input columns (+ purchase_year, names) from a DataFrame / dict of columns or a list of dicts."""
+    if isinstance(properties, (list, tuple)):
+        if names is None and properties and all("name" in p for p in properties):
+            names = [p["name"] for p in properties]
+        properties = {name: [p[name] for p in properties if name in p] for name in PORTFOLIO_INPUTS + ("name",)}
+    elif names is None and "name" in properties:
+        names = list(properties["name"])
+
+    columns = {name: np.atleast_1d(np.asarray(properties[name], dtype=float)) for name in BATCH_INPUTS}
+    n = len(columns["purchase_price"])
+    purchase_year = properties["purchase_year"] if "purchase_year" in properties else []
+    if len(purchase_year) not in (0, n):
+        raise ValueError(f"Got {len(purchase_year)} purchase years for {n} properties")
+    columns["purchase_year"] = (np.asarray(purchase_year, dtype=int) if len(purchase_year)
+                                else np.full(n, datetime.date.today().year))
+    if names is not None and len(names) != n:
+        raise ValueError(f"Got {len(names)} names for {n} properties")
+    return columns, names
+
+
+class Portfolio:
+    """
+    Properties on a common calendar, with running portfolio totals.
+
+        portfolio = Portfolio(properties)        # DataFrame / dict of columns / list of dicts
+        portfolio.add(new_listing)               # evaluates only the new rows
+        summary = portfolio.summary()
+
+    Properties need the ten calculate_metrics inputs and may carry a
+    "purchase_year" (default: this year) and a "name".
+    """
+
+    def __init__(self, properties=None, names=None):
+        self.names = []
+        self.start_year = None
+        self._cash_flow = np.zeros(0)                 # calendar totals from start_year on
+        self._holdings = {key: np.zeros(0, dtype=int if key in ("purchase_year", "time_horizon") else float)
+                          for key in ("purchase_year", "time_horizon", "invested", "cash_received",
+                                      "irr_total", "equity_multiple")}
+        self._last_rate = 0.1                         # warm start for the next portfolio IRR
+        self._summary = None
+        self.evaluated = 0                            # properties run through the engine so far
+        if properties is not None:
+            self.add(properties, names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, properties, names=None):
+        """Evaluate and add properties; returns their positions in the holding order."""
+        columns, names = _columns(properties, names)
+        n = len(columns["purchase_price"])
+        if not n:
+            return np.arange(len(self), len(self))
+        metrics = calculate_metrics_batch({name: columns[name] for name in BATCH_INPUTS})
+        self.evaluated += n
+
+        # ---- Year-relative flows: year 0 = down payment, years 1..H = cash flow, sale added in year H
+        horizon = metrics["Time Horizon"]
+        invested = columns["purchase_price"] * (columns["down_payment_pct"] / 100.0)
+        operating = np.nan_to_num(metrics["Multi-Year Cash Flow"])
+        flows = np.hstack([-invested[:, None], operating])
+        flows[np.arange(n), horizon] += metrics["Net Sale Proceeds ($)"]
+        cash_received = operating.sum(axis=1) + metrics["Net Sale Proceeds ($)"]
+
+        # ---- Grow the calendar to cover the new holdings, then scatter their flows onto it
+        purchase_year = columns["purchase_year"]
+        first, last = int(purchase_year.min()), int((purchase_year + horizon).max())
+        if self.start_year is None:
+            self.start_year, self._cash_flow = first, np.zeros(last - first + 1)
+        else:
+            end_year = self.start_year + len(self._cash_flow) - 1
+            before, after = max(self.start_year - first, 0), max(last - end_year, 0)
+            if before or after:
+                self._cash_flow = np.pad(self._cash_flow, (before, after))
+                self.start_year -= before
+        years = np.arange(flows.shape[1])
+        held = years <= horizon[:, None]
+        index = (purchase_year - self.start_year)[:, None] + years
+        self._cash_flow += np.bincount(index[held], weights=flows[held], minlength=len(self._cash_flow))
+
+        # ---- Per-property columns
+        added = {
+            "purchase_year": purchase_year, "time_horizon": horizon, "invested": invested,
+            "cash_received": cash_received, "irr_total": metrics["IRR (Total incl. Sale) (%)"],
+            "equity_multiple": metrics["equity_multiple"],
+        }
+        for key, values in added.items():
+            self._holdings[key] = np.concatenate([self._holdings[key], values])
+        start = len(self.names)
+        if names is None:
+            names = [f"Property {i + 1}" for i in range(start, start + n)]
+        self.names.extend(str(name) for name in names)
+        self._summary = None
+        return np.arange(start, start + n)
+
+    def holdings(self):
+        """Per-property columns in holding order (names, purchase year, horizon, invested, ... profit)."""
+        columns = {"name": list(self.names)}
+        columns.update({key: values.copy() for key, values in self._holdings.items()})
+        columns["profit"] = columns["cash_received"] - columns["invested"]
+        return columns
+
+    def summary(self):
+        """PortfolioSummary of everything added so far (memoized until the next add)."""
+        if self._summary is not None:
+            return self._summary
+        if not len(self):
+            raise ValueError("Portfolio is empty")
+        invested = float(self._holdings["invested"].sum())
+        cash_received = float(self._holdings["cash_received"].sum())
+
+        rate, status, _ = irr_warm(self._cash_flow, self._last_rate)
+        if rate == rate:  # keep the last good solution as the next guess
+            self._last_rate = rate
+
+        profit = self._holdings["cash_received"] - self._holdings["invested"]
+        total_profit = profit.sum()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            profit_share = profit / total_profit if total_profit else np.full(len(profit), np.nan)
+        weight = np.abs(profit)
+        shares = weight / weight.sum() if weight.sum() else np.full(len(profit), 1.0 / len(profit))
+        hhi = float(np.dot(shares, shares))
+
+        self._summary = PortfolioSummary(
+            calendar=np.arange(self.start_year, self.start_year + len(self._cash_flow)),
+            cash_flow=_round2(self._cash_flow),
+            invested=invested,
+            cash_received=cash_received,
+            irr=_round2(rate * 100.0).item(),
+            irr_status=status,
+            equity_multiple=_round2(cash_received / invested).item() if invested else 0.0,
+            profit=profit,
+            profit_share=profit_share,
+            hhi=hhi,
+            effective_holdings=1.0 / hhi,
+            largest_share=float(shares.max()),
+        )
+        return self._summary
+
+
+def portfolio_summary(properties, names=None):
+    """One-shot PortfolioSummary for a set of properties (see Portfolio for incremental use)."""
+    return Portfolio(properties, names).summary()
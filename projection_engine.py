@@ -0,0 +1,403 @@
+"""
+Incremental single-deal projection.
+
+calculate_metrics rebuilds every year's cash flow, ROI and both IRRs on each
+call, so dragging the horizon slider from 10 to 11 years redoes the ten years
+that did not change. A Projection keeps the per-year state of one deal (rent
+path, amortization, rounded cash flows and their prefix sums, property
+values) and only recomputes what an input change actually touches:
+
+- time horizon: missing years are appended (O(Δ)); a shorter horizon reads a
+  prefix of what is already there. Exit-year figures (sale value, payoff,
+  total cash received) come from the prefix sums in O(1).
+- appreciation rate: property values and the total IRR only
+- rent / expenses / vacancy / rent growth / expense growth / capex events:
+  rent path and cash flows (the amortization schedule is kept)
+- price / down payment / rate / term: everything
+
+IRRs are memoized per exit year, and every new solve is warm-started from
+the last solution of the same kind (the neighbouring exit year while the
+horizon moves, the previous inputs while a rate slider moves). The root is
+still picked nearest 0%, so metrics(h) matches calculate_metrics(..., h).
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from amortization_engine import yearly_schedule
+from calc_engine import (BATCH_INPUTS, YEARLY_INPUTS, _after_tax, _after_tax_extras, _capex_grids, _first_year, _grade,
+                         _growth_path, _per_year, _round2, _scalar_payment, capex_events, tax_profile)
+from deal_metrics import DealMetrics
+from irr_engine import irr_warm
+
+# The nine deal inputs; the horizon is passed to metrics() instead
+INPUTS = BATCH_INPUTS[:-1]
+OPTIONAL_INPUTS = {"expense_growth_rate": 0.0}
+
+# Which per-year state each input feeds (see Projection.update)
+_LOAN_INPUTS = frozenset({"purchase_price", "down_payment_pct", "mortgage_rate", "mortgage_term"})
+_RENT_INPUTS = frozenset({"monthly_rent", "rent_growth_rate", "capex"})
+_CASH_FLOW_INPUTS = _LOAN_INPUTS | _RENT_INPUTS | {"monthly_expenses", "vacancy_rate", "expense_growth_rate"}
+_VALUE_INPUTS = frozenset({"purchase_price", "appreciation_rate"})
+
+
+class ExitAnalysis(NamedTuple):
+    years: np.ndarray               # exit years 1..max_years
+    irr_total: np.ndarray           # IRR incl. sale (%) for an exit in each year, NaN when unsolvable
+    irr_operational: np.ndarray     # IRR from operations only (%)
+    equity_multiple: np.ndarray
+    roi: np.ndarray                 # ROI (%) at the exit year (calculate_metrics' "Final Year ROI (%)")
+    net_sale_proceeds: np.ndarray
+    best_year: int                  # IRR-maximizing holding period (0 if no exit year solves)
+    best_irr: float
+
+
+class _Series:
+    """Growable float buffer with `n` valid values at the front (amortized O(1) append)."""
+
+    __slots__ = ("data", "n")
+
+    def __init__(self):
+        self.data = np.empty(0)
+        self.n = 0
+
+    def append(self, values):
+        end = self.n + len(values)
+        if end > len(self.data):
+            grown = np.empty(max(end, 2 * len(self.data), 16))
+            grown[:self.n] = self.data[:self.n]
+            self.data = grown
+        self.data[self.n:end] = values
+        self.n = end
+
+    def head(self, years):
+        return self.data[:years]
+
+
+class Projection:
+    """
+    One deal's projection that can be extended, truncated and re-evaluated.
+
+        projection = Projection(purchase_price=300000, monthly_rent=2000, ...)
+        projection.metrics(10)          # same DealMetrics as calculate_metrics(..., 10)
+        projection.metrics(11)          # computes year 11 only, plus the new exit
+        projection.update(rent_growth_rate=4)
+
+    calculate() has the calculate_metrics signature, so a Projection can sit
+    behind result_cache as its compute function.
+    """
+
+    def __init__(self, **inputs):
+        self._inputs = dict(OPTIONAL_INPUTS)
+        self._capex = ()            # capex_events() tuple
+        self._irr = {}              # (kind, years) -> IRR in percent (NaN when unsolvable)
+        self._last_rate = {}        # kind -> last solved decimal rate, used as the next guess
+        self.irr_solves = 0
+        self.irr_iterations = 0
+        self._reset(_CASH_FLOW_INPUTS | _VALUE_INPUTS)
+        if inputs:
+            self.update(**inputs)
+
+    # ---- Inputs
+    def update(self, **inputs):
+        """
+        Change any of the nine deal inputs (or the capex events, expense growth);
+        returns the names that actually changed. Per-year paths are kept as tuples.
+        """
+        unknown = set(inputs) - set(INPUTS) - set(OPTIONAL_INPUTS) - {"capex"}
+        if unknown:
+            raise TypeError(f"Unknown inputs: {', '.join(sorted(unknown))}")
+        capex = capex_events(inputs.pop("capex")) if "capex" in inputs else self._capex
+        for name in YEARLY_INPUTS:
+            if name in inputs and np.ndim(inputs[name]):
+                inputs[name] = tuple(np.asarray(inputs[name], dtype=float).ravel().tolist())
+        changed = {name for name, value in inputs.items() if self._inputs.get(name) != value}
+        if capex != self._capex:
+            changed.add("capex")
+        if not changed:
+            return changed
+        self._capex = capex
+        self._inputs.update(inputs)
+        if not self._missing():
+            self._year_one()
+        self._reset(changed)
+        return changed
+
+    def _reset(self, changed):
+        if changed & _LOAN_INPUTS:
+            self._payment, self._balance = _Series(), _Series()
+        if changed & _RENT_INPUTS:
+            self._rents = _Series()
+        if changed & _CASH_FLOW_INPUTS:
+            self._cash_flows, self._cum_cash_flows = _Series(), _Series()
+            self._irr.clear()
+        if changed & _VALUE_INPUTS:
+            self._values = _Series()
+            self._irr = {key: value for key, value in self._irr.items() if key[0] != "total"}
+
+    def _year_one(self):
+        """Loan terms and the year-1 metrics (O(1), redone on any input change)."""
+        p = self._inputs
+        self.down_payment_amount = p["purchase_price"] * (p["down_payment_pct"] / 100.0)
+        self.loan_amount = p["purchase_price"] - self.down_payment_amount
+        self.monthly_rate = (p["mortgage_rate"] / 100.0) / 12.0
+        self.n_payments = int(p["mortgage_term"] * 12)
+        self.monthly_mortgage_payment = _scalar_payment(self.loan_amount, self.monthly_rate, self.n_payments)
+
+        self._vacancy_factor = 1 - float(_first_year(p["vacancy_rate"])) / 100.0
+        self._annual_expenses = p["monthly_expenses"] * 12.0
+        annual_rent = p["monthly_rent"] * self._vacancy_factor * 12.0
+        annual_cash_flow = annual_rent - self._annual_expenses - self.monthly_mortgage_payment * 12.0
+        price, down = p["purchase_price"], self.down_payment_amount
+        self.cap_rate = ((annual_rent - self._annual_expenses) / price) * 100.0 if price else 0.0
+        self.cash_on_cash = (annual_cash_flow / down) * 100.0 if down else 0.0
+
+    def _missing(self):
+        return [name for name in INPUTS if name not in self._inputs]
+
+    # ---- Per-year state
+    @property
+    def years(self):
+        """Years of per-year state currently held."""
+        return min(self._payment.n, self._rents.n, self._cash_flows.n, self._values.n)
+
+    def extend(self, years):
+        """Make sure the per-year state covers `years` years; only the missing years are computed."""
+        missing = self._missing()
+        if missing:
+            raise TypeError(f"Projection missing inputs: {', '.join(missing)}")
+        p = self._inputs
+
+        start = self._payment.n
+        if start < years:
+            schedule = yearly_schedule(self.loan_amount, self.monthly_rate, self.n_payments,
+                                       self.monthly_mortgage_payment, years, first_year=start)
+            self._payment.append(schedule.payment)
+            self._balance.append(schedule.balance)
+
+        outlay, uplift = _capex_grids(self._capex, years)
+        start = self._rents.n
+        if start < years:
+            # Continue the rent path from the last year held (same multiplications as the scalar engine)
+            rent_growth = np.broadcast_to(1 + _per_year(p["rent_growth_rate"], years) / 100.0, (years,))
+            if start == 0:
+                first = p["monthly_rent"]
+            else:
+                first = self._rents.data[start - 1] * rent_growth[start - 1]
+                if uplift is not None and uplift.any():
+                    first += uplift[start - 1]
+            self._rents.append(_growth_path(first, rent_growth[start:], years - start,
+                                            uplift[start:] if uplift is not None else None))
+
+        start = self._cash_flows.n
+        if start < years:
+            cash_flows = self._noi(start, years) - self._payment.data[start:years]
+            if outlay is not None:
+                cash_flows = cash_flows - outlay[start:years]
+            cash_flows = _round2(cash_flows)
+            running = self._cum_cash_flows.data[start - 1] if start else 0.0
+            self._cash_flows.append(cash_flows)
+            self._cum_cash_flows.append(np.cumsum(np.concatenate([[running], cash_flows]))[1:])
+
+        start = self._values.n
+        if start < years:
+            if np.ndim(p["appreciation_rate"]):
+                self._values.append(p["purchase_price"] * self._value_growth(years)[start:])
+            else:
+                self._values.append(p["purchase_price"] * (1 + p["appreciation_rate"] / 100.0) ** np.arange(start + 1, years + 1))
+
+    def _noi(self, start, years):
+        """Rent after vacancy less expenses for years start+1..years (the year's vacancy and expense growth)."""
+        p = self._inputs
+        vacancy_factor = self._vacancy_factor
+        if np.ndim(p["vacancy_rate"]):
+            vacancy_factor = 1 - np.broadcast_to(_per_year(p["vacancy_rate"], years), (years,))[start:] / 100.0
+        year_rent = self._rents.data[start:years] * vacancy_factor * 12.0
+        expenses = self._annual_expenses
+        if np.any(p["expense_growth_rate"]):
+            expenses = _growth_path(expenses, 1 + _per_year(p["expense_growth_rate"], years) / 100.0, years)[start:]
+        return year_rent - expenses
+
+    def _value_growth(self, years):
+        """
+        Appreciation factor at the end of each year 1..years: Python ** per
+        year for one rate (like the scalar engine's sale value; numpy's power
+        can differ in the last bit), the running product for a per-year path.
+        """
+        rate = self._inputs["appreciation_rate"]
+        if np.ndim(rate):
+            return np.cumprod(np.broadcast_to(1 + _per_year(rate, years) / 100.0, (years,)))
+        return np.array([(1 + rate / 100.0) ** year for year in range(1, years + 1)])
+
+    def _appreciation(self, years):
+        """Appreciation factor at an exit after `years`."""
+        rate = self._inputs["appreciation_rate"]
+        if not np.ndim(rate):
+            return (1 + rate / 100.0) ** years
+        return self._value_growth(years)[-1].item() if years else 1.0
+
+    def truncate(self, years):
+        """Drop per-year state and memoized IRRs past `years` (keeps the buffers)."""
+        for series in (self._payment, self._balance, self._rents, self._cash_flows, self._cum_cash_flows, self._values):
+            series.n = min(series.n, years)
+        self._irr = {key: value for key, value in self._irr.items() if key[1] <= years}
+
+    # ---- Results
+    def _irrs(self, years, net_sale_proceeds):
+        """(operational, total) IRR in percent for an exit after `years`, solving only what is not memoized."""
+        flows = np.concatenate([[-self.down_payment_amount], self._cash_flows.head(years)])
+        total = flows.copy()
+        if years:
+            total[-1] += net_sale_proceeds
+        rows = {"operational": flows, "total": total}
+        for kind, row in rows.items():
+            if (kind, years) in self._irr:
+                continue
+            rate, _, iterations = irr_warm(row, self._last_rate.get(kind, 0.1))
+            self.irr_solves += 1
+            self.irr_iterations += iterations
+            self._irr[(kind, years)] = _round2(rate * 100.0).item()
+            if rate == rate:  # keep the last good solution as the next guess
+                self._last_rate[kind] = rate
+        return self._irr[("operational", years)], self._irr[("total", years)]
+
+    def metrics(self, time_horizon, tax=None):
+        """DealMetrics for an exit after `time_horizon` years (identical to calculate_metrics)."""
+        years = int(time_horizon)
+        self.extend(years)
+        p = self._inputs
+        price, down = p["purchase_price"], self.down_payment_amount
+        cash_flows = self._cash_flows.head(years)
+        cum_cash_flows = self._cum_cash_flows.head(years)
+        balance = self._balance.head(years)
+
+        # ---- Exit year, O(1) from the prefix sums
+        appreciation = self._appreciation(years)
+        net_sale_proceeds = price * appreciation - (balance[-1].item() if years else 0.0)
+        if years:
+            before_exit = cum_cash_flows[-2].item() if years > 1 else 0.0
+            total_cash_received = before_exit + (cash_flows[-1].item() + net_sale_proceeds)
+        else:
+            total_cash_received = 0.0
+        irr_operational, irr_total = self._irrs(years, net_sale_proceeds)
+
+        # ---- ROI by year: appreciation spread evenly up to the exit year
+        linearized_app = price * (appreciation - 1) * (np.arange(1, years + 1) / years)
+        roi = _round2((cum_cash_flows + linearized_app) / down * 100.0) if down else np.zeros(years)
+
+        return DealMetrics(
+            extra=self._after_tax(years, tax_profile(tax), net_sale_proceeds),
+            cap_rate=round(self.cap_rate, 2),
+            cash_on_cash=round(self.cash_on_cash, 2),
+            final_year_roi=roi[-1].item() if years else 0.0,
+            first_year_cash_flow=cash_flows[0].item() if years else 0.0,
+            monthly_mortgage=round(self.monthly_mortgage_payment, 2),
+            grade=_grade(self.cash_on_cash),
+            irr_operational=irr_operational,
+            irr_total=irr_total,
+            equity_multiple=round(total_cash_received / down, 2) if down else 0.0,
+            net_sale_proceeds=round(net_sale_proceeds, 2),
+            series=[
+                cash_flows,
+                roi,
+                _round2(self._rents.head(years) * 12.0),
+                _round2(balance),
+                _round2(self._values.head(years) - balance),
+            ],
+        )
+
+    def _after_tax(self, years, tax, net_sale_proceeds):
+        """After-tax extra keys for an exit after `years` (not memoized: cheap next to the pre-tax state)."""
+        if tax is None:
+            return None
+        p = self._inputs
+        noi = self._noi(0, years)
+        balance = self._balance.head(years)
+        principal = np.concatenate([[self.loan_amount], balance[:-1]]) - balance
+        outlay, _ = _capex_grids(self._capex, years)
+        sale_value = p["purchase_price"] * self._appreciation(years)
+        after_tax = _after_tax(tax, p["purchase_price"], self.down_payment_amount, noi,
+                               self._payment.head(years) - principal, outlay, self._cash_flows.head(years),
+                               np.ones(years, dtype=bool), sale_value, net_sale_proceeds)
+        row = np.concatenate([[-self.down_payment_amount], after_tax["after_tax_total"]])
+        rate, _, iterations = irr_warm(row, self._last_rate.get("after_tax", 0.1))
+        self.irr_solves += 1
+        self.irr_iterations += iterations
+        if rate == rate:
+            self._last_rate["after_tax"] = rate
+        return _after_tax_extras(after_tax, _round2(rate * 100.0).item())
+
+    def exit_analysis(self, max_years=30):
+        """
+        Total IRR, equity multiple and ROI for every exit year 1..max_years in one pass.
+
+        Every exit shares the same per-year state: exit-year sums come from the
+        prefix sums, and the IRRs are solved in order, each warm-started from
+        the previous year's (memoized ones are reused). Each row equals what
+        calculate_metrics returns for that time_horizon.
+        """
+        max_years = int(max_years)
+        self.extend(max_years)
+        p = self._inputs
+        price, down = p["purchase_price"], self.down_payment_amount
+        years = np.arange(1, max_years + 1)
+        cash_flows = self._cash_flows.head(max_years)
+        cum_cash_flows = self._cum_cash_flows.head(max_years)
+
+        appreciation = self._value_growth(max_years)
+        net_sale_proceeds = price * appreciation - self._balance.head(max_years)
+        before_exit = np.concatenate([[0.0], cum_cash_flows[:-1]])
+        total_cash_received = before_exit + (cash_flows + net_sale_proceeds)
+
+        irrs = [self._irrs(year, net) for year, net in zip(years.tolist(), net_sale_proceeds.tolist())]
+        irr_operational, irr_total = np.array(irrs, dtype=float).reshape(-1, 2).T
+
+        if down:
+            equity_multiple = _round2(total_cash_received / down)
+            roi = _round2((cum_cash_flows + price * (appreciation - 1)) / down * 100.0)
+        else:
+            equity_multiple = roi = np.zeros(max_years)
+
+        solved = np.isfinite(irr_total)
+        best = int(np.argmax(np.where(solved, irr_total, -np.inf))) if solved.any() else -1
+        return ExitAnalysis(
+            years=years,
+            irr_total=irr_total,
+            irr_operational=irr_operational,
+            equity_multiple=equity_multiple,
+            roi=roi,
+            net_sale_proceeds=_round2(net_sale_proceeds),
+            best_year=best + 1,
+            best_irr=irr_total[best].item() if best >= 0 else float("nan"),
+        )
+
+    def calculate(self, *args, **kwargs):
+        """calculate_metrics(*args, **kwargs), reusing this projection's state."""
+        values = dict(zip(BATCH_INPUTS + ("capex", "tax", "expense_growth_rate"), args))
+        values.update(kwargs)
+        values.setdefault("expense_growth_rate", 0.0)
+        time_horizon = values.pop("time_horizon")
+        tax = values.pop("tax", None)
+        self.update(**values)
+        return self.metrics(time_horizon, tax)
+
+    def stats(self):
+        return {
+            "years": self.years,
+            "irr_cached": len(self._irr),
+            "irr_solves": self.irr_solves,
+            "irr_iterations": self.irr_iterations,
+        }
+
+
+def exit_year_analysis(purchase_price, monthly_rent, down_payment_pct, mortgage_rate, mortgage_term,
+                       monthly_expenses, vacancy_rate, appreciation_rate, rent_growth_rate, max_years=30, capex=None,
+                       expense_growth_rate=0.0):
+    """Every exit year 1..max_years for one deal (see Projection.exit_analysis)."""
+    projection = Projection(
+        purchase_price=purchase_price, monthly_rent=monthly_rent, down_payment_pct=down_payment_pct,
+        mortgage_rate=mortgage_rate, mortgage_term=mortgage_term, monthly_expenses=monthly_expenses,
+        vacancy_rate=vacancy_rate, appreciation_rate=appreciation_rate, rent_growth_rate=rent_growth_rate,
+        capex=capex, expense_growth_rate=expense_growth_rate,
+    )
+    return projection.exit_analysis(max_years)
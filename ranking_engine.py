@@ -0,0 +1,263 @@
+"""
+Top-K deal ranking with bound-based pruning.
+
+Pulling the best 50 deals by total IRR out of 500k listings does not need
+500k projections and IRR solves. For each chunk of candidates the ranker:
+
+1. computes the cheap year-1 figures (one vectorized pass, no year axis) and
+   drops rows that fail the minimum filters (cap rate, CoC, year-1 cash flow)
+2. computes an upper bound on the sort key for the rest
+3. fully evaluates only the candidates whose bound can still beat the current
+   K-th best value, best bound first and in small batches, so the threshold
+   rises quickly and most of the tail is never evaluated
+
+A min-heap holds the current top K. The bounds are conservative, so pruning
+never changes the result: the top K equals a full evaluation + stable sort.
+
+- Cap rate / Cash-on-Cash: exact from the year-1 pass, nothing else to run
+- Equity multiple: (H * C + N) / down, with C an upper bound on any one
+  year's cash flow and N the exact net sale proceeds (closed-form balance)
+- IRR: the rate where -down + C * annuity(r, H) + N * v^H reaches zero. That
+  function is decreasing in r and never below the deal's real NPV, so the
+  deal has no IRR above it. The operational IRR uses N = 0.
+"""
+import heapq
+from typing import NamedTuple
+
+import numpy as np
+
+from amortization_engine import _balance_after
+from calc_engine import (BATCH_INPUTS, YEARLY_INPUTS, _batch_inputs, _evaluate_batch, _round2, _year_one_batch,
+                         _yearly_key)
+from irr_engine import RATE_GRID
+
+# Sort keys: result key -> how its upper bound is obtained
+RANK_KEYS = {
+    "IRR (Total incl. Sale) (%)": "irr",
+    "IRR (Operational) (%)": "irr",
+    "Cash-on-Cash Return (%)": "exact",
+    "Cap Rate (%)": "exact",
+    "equity_multiple": "multiple",
+}
+
+# Year-1 columns the cheap pass can filter on (minimum values)
+FILTER_COLUMNS = ("Cap Rate (%)", "Cash-on-Cash Return (%)", "First Year Cash Flow ($)")
+
+DEFAULT_BATCH_SIZE = 2048
+
+
+def _single_rate_inputs(deals):
+    """_batch_inputs columns; the pruning bounds assume one rate per deal, so per-year paths are refused."""
+    cols = _batch_inputs((deals,), {})
+    paths = [name for name in YEARLY_INPUTS if _yearly_key(name) in cols]
+    if paths:
+        raise ValueError(f"Ranking needs one rate per deal; got per-year paths for {', '.join(paths)}")
+    return cols
+
+
+class RankingResult(NamedTuple):
+    index: np.ndarray       # row positions (across every chunk pushed) of the top K, best first
+    value: np.ndarray       # sort-key value of each
+    metrics: dict           # calculate_metrics_batch columns for those rows, same order
+    stats: dict             # candidate counts and pruning rates
+
+
+def _cheap_columns(cols, year_one):
+    """The FILTER_COLUMNS values, exactly as the full engine rounds them."""
+    horizon = cols["time_horizon"]
+    first_payment = year_one["monthly_mortgage_payment"] * np.clip(year_one["n_payments"], 0, 12)
+    first_cash_flow = _round2(cols["monthly_rent"] * year_one["vacancy_factor"] * 12.0
+                              - year_one["annual_expenses"] - first_payment)
+    return {
+        "Cap Rate (%)": _round2(year_one["cap_rate"]),
+        "Cash-on-Cash Return (%)": _round2(year_one["coc_return"]),
+        "First Year Cash Flow ($)": np.where(horizon > 0, first_cash_flow, 0.0),
+    }
+
+
+def _cash_flow_cap(cols, year_one):
+    """Upper bound on any single year's (rounded) cash flow within the horizon, never below 0."""
+    horizon = cols["time_horizon"]
+    rent_growth = np.abs(1 + cols["rent_growth_rate"] / 100.0)
+    first_rent = np.abs(cols["monthly_rent"] * year_one["vacancy_factor"] * 12.0)
+    max_rent = first_rent * np.maximum(rent_growth, 1.0) ** np.maximum(horizon - 1, 0)
+    # Months of mortgage paid per year only go down over time, so the last year pays the least
+    last_year_months = np.clip(year_one["n_payments"] - 12 * (horizon - 1), 0, 12)
+    min_payment = year_one["monthly_mortgage_payment"] * last_year_months
+    return np.maximum(max_rent - year_one["annual_expenses"] - min_payment, 0.0) + 0.01
+
+
+def _net_sale_proceeds(cols, year_one):
+    """Exact sale value net of the loan payoff at each deal's horizon."""
+    horizon = cols["time_horizon"]
+    balance = _balance_after(year_one["loan_amount"], year_one["monthly_rate"], year_one["n_payments"],
+                             year_one["monthly_mortgage_payment"], (12 * horizon)[:, None])[:, 0]
+    sale_value = cols["purchase_price"] * (1 + cols["appreciation_rate"] / 100.0) ** horizon
+    return np.where(horizon > 0, sale_value - balance, 0.0)
+
+
+def _irr_bound(down, cap, terminal, horizon, iterations=64):
+    """Percent upper bound on the IRR: root of -down + cap * annuity(r, H) + terminal * v^H (bisection)."""
+    def npv_bound(rate):
+        v = 1.0 / (1.0 + rate)
+        v_h = v ** horizon
+        with np.errstate(divide="ignore", invalid="ignore"):
+            annuity = np.where(rate == 0, horizon, (1.0 - v_h) / np.where(rate == 0, 1.0, rate))
+        return -down + cap * annuity + terminal * v_h
+
+    lo = np.full(len(down), RATE_GRID[0])
+    hi = np.full(len(down), RATE_GRID[-1])
+    no_root = npv_bound(lo) <= 0  # bounded NPV already negative at the lowest rate irr_batch tries
+    for _ in range(iterations):
+        mid = 0.5 * (lo + hi)
+        above = npv_bound(mid) > 0
+        lo = np.where(above, mid, lo)
+        hi = np.where(above, hi, mid)
+
+    bound = hi * 100.0 + 0.005 + 1e-9  # allow for rounding the IRR to 2 dp
+    bound = np.where(npv_bound(hi) > 0, np.inf, bound)
+    bound = np.where(no_root, -np.inf, bound)  # the IRR can only be NaN
+    return np.where(down > 0, bound, np.inf)
+
+
+class TopK:
+    """
+    Streaming top-K ranker; push() chunks of deals, then result().
+
+    `key` is one of RANK_KEYS; `filters` maps FILTER_COLUMNS to minimum values.
+    """
+
+    def __init__(self, k=50, key="IRR (Total incl. Sale) (%)", filters=None, batch_size=DEFAULT_BATCH_SIZE):
+        if key not in RANK_KEYS:
+            raise ValueError(f"Cannot rank by {key!r}; choose one of {', '.join(RANK_KEYS)}")
+        unknown = set(filters or ()) - set(FILTER_COLUMNS)
+        if unknown:
+            raise ValueError(f"Cannot filter on {', '.join(sorted(unknown))}; choose from {', '.join(FILTER_COLUMNS)}")
+        self.k = int(k)
+        self.key = key
+        self.filters = dict(filters or {})
+        self.batch_size = batch_size
+        self._heap = []             # (value, -index, inputs) min-heap of the current top K
+        self.candidates = 0
+        self.invalid = 0
+        self.filtered = 0
+        self.pruned = 0
+        self.evaluated = 0
+
+    @property
+    def threshold(self):
+        """Value a candidate has to beat to enter the top K."""
+        return self._heap[0][0] if len(self._heap) >= self.k else -np.inf
+
+    def _offer(self, values, index, cols, rows):
+        """Push evaluated rows into the heap (only those at or above the threshold are looked at)."""
+        values = np.nan_to_num(values, nan=-np.inf)
+        cut = self.threshold
+        if len(values) > self.k:
+            # Only this batch's own top k (plus ties) can enter the heap
+            cut = max(cut, np.partition(values, len(values) - self.k)[len(values) - self.k])
+        keep = np.flatnonzero((values >= cut) & (values > -np.inf))
+        for i in keep.tolist():
+            entry = (values[i].item(), -int(index[i]), tuple(cols[name][rows[i]].item() for name in BATCH_INPUTS))
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, entry)
+            elif entry[:2] > self._heap[0][:2]:
+                heapq.heapreplace(self._heap, entry)
+        return len(keep)
+
+    def push(self, deals):
+        """Rank another chunk of deals (DataFrame / dict of the ten input columns)."""
+        cols = _single_rate_inputs(deals)
+        n = len(cols["purchase_price"])
+        index = self.candidates + np.arange(n)
+        self.candidates += n
+        if self.k <= 0 or not n:
+            return
+
+        valid = np.all([np.isfinite(col) for col in cols.values()], axis=0)
+        self.invalid += int(n - valid.sum())
+        year_one = _year_one_batch(cols)
+        cheap = _cheap_columns(cols, year_one)
+        keep = valid.copy()
+        for column, minimum in self.filters.items():
+            keep &= cheap[column] >= minimum
+        self.filtered += int(valid.sum() - keep.sum())
+        rows = np.flatnonzero(keep)
+
+        kind = RANK_KEYS[self.key]
+        if kind == "exact":
+            # Exact key: nothing expensive to skip, only rows outside the running top K to drop
+            values = cheap[self.key][rows]
+            self.pruned += len(rows) - self._offer(values, index[rows], cols, rows)
+            return
+
+        kept = {name: col[rows] for name, col in cols.items()}
+        kept_year_one = {name: value[rows] for name, value in year_one.items()}
+        down = kept_year_one["down_payment_amount"]
+        cap = _cash_flow_cap(kept, kept_year_one)
+        horizon = kept["time_horizon"]
+        net_sale = np.maximum(_net_sale_proceeds(kept, kept_year_one), 0.0) + 0.01
+        if kind == "multiple":
+            with np.errstate(divide="ignore", invalid="ignore"):
+                bound = np.where(down > 0, (horizon * cap + net_sale) / down + 0.005 + 1e-9, np.inf)
+        else:
+            terminal = net_sale if self.key == "IRR (Total incl. Sale) (%)" else 0.0
+            bound = _irr_bound(down, cap, terminal, horizon)
+
+        # Best bound first, in batches, so the threshold climbs as early as possible
+        order = np.argsort(-bound, kind="stable")
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            live = bound[batch] >= self.threshold
+            if not live.any():
+                self.pruned += len(order) - start  # sorted, so everything after this fails too
+                break
+            self.pruned += int((~live).sum())
+            batch_rows = rows[batch[live]]
+            values = _evaluate_batch({name: col[batch_rows] for name, col in cols.items()})[self.key]
+            self.evaluated += len(batch_rows)
+            self._offer(values, index[batch_rows], cols, batch_rows)
+
+    def stats(self):
+        screened = self.candidates - self.invalid
+        skipped = self.filtered + self.pruned
+        return {
+            "candidates": self.candidates,
+            "invalid": self.invalid,
+            "filtered": self.filtered,
+            "pruned": self.pruned,
+            "evaluated": self.evaluated,
+            "filter_rate": self.filtered / screened if screened else 0.0,
+            "prune_rate": self.pruned / screened if screened else 0.0,
+            "skip_rate": skipped / screened if screened else 0.0,
+        }
+
+    def result(self):
+        """The top K so far, best first, with their full metrics (one small batch-engine call)."""
+        ranked = sorted(self._heap, reverse=True)
+        inputs = np.array([entry[2] for entry in ranked], dtype=float).reshape(-1, len(BATCH_INPUTS))
+        metrics = _evaluate_batch(_batch_inputs((dict(zip(BATCH_INPUTS, inputs.T)),), {})) if ranked else {}
+        return RankingResult(
+            index=np.array([-entry[1] for entry in ranked], dtype=int),
+            value=np.array([entry[0] for entry in ranked], dtype=float),
+            metrics=metrics,
+            stats=self.stats(),
+        )
+
+
+def top_k(deals, k=50, key="IRR (Total incl. Sale) (%)", filters=None, chunk_size=50_000):
+    """
+    The best `k` deals by `key`, skipping candidates that provably cannot make the cut.
+
+    `deals` is a DataFrame / dict of the ten calculate_metrics inputs;
+    `filters` maps FILTER_COLUMNS to minimum values, e.g.
+    {"First Year Cash Flow ($)": 0, "Cap Rate (%)": 5}. Returns a
+    RankingResult whose stats report how many rows were filtered, pruned
+    by their bound, and actually evaluated.
+    """
+    cols = _single_rate_inputs(deals)
+    ranker = TopK(k, key, filters)
+    n = len(cols["purchase_price"])
+    for start in range(0, n, chunk_size):
+        ranker.push({name: col[start:start + chunk_size] for name, col in cols.items()})
+    return ranker.result()
@@ -0,0 +1,67 @@
+"""
+Rerun latency readout for the pages.
+
+Streamlit reruns a page script top to bottom on every widget change. The
+pages now wrap their self-contained sections (Monte Carlo, report & email,
+max offer...) in st.fragment, so touching a widget inside one
+reruns only that section. This module times both kinds of rerun so the
+difference is visible:
+
+    started = page_started("dual")          # right after the password gate
+    with section("Email"): ...              # inside a fragment body
+    page_finished("dual", started)          # last line of the page
+
+page_finished() writes a sidebar caption with the last full rerun and the
+latest time of each section; section() adds a small caption under the
+section itself (a fragment can't write to the sidebar). Timings are also
+recorded as rerun.<page> / section.<name> spans (see instrumentation.py).
+"""
+import time
+from contextlib import contextmanager
+from statistics import median
+
+import streamlit as st
+
+from instrumentation import observe
+
+HISTORY = 20  # reruns kept per page / section for the median
+
+
+def _history(page):
+    """{"page": [...], "<section>": [...]} of ms timings for one page in this session."""
+    return st.session_state.setdefault("rerun_latency", {}).setdefault(page, {})
+
+
+def _record(page, name, seconds):
+    times = _history(page).setdefault(name, [])
+    times.append(seconds * 1e3)
+    del times[:-HISTORY]
+    return times
+
+
+def page_started(page):
+    st.session_state["rerun_page"] = page  # fragment reruns belong to the page that last ran in full
+    return time.perf_counter()
+
+
+def page_finished(page, started):
+    """Record this full rerun and show the readout in the sidebar."""
+    elapsed = time.perf_counter() - started
+    observe(f"rerun.{page}", elapsed)
+    times = _record(page, "page", elapsed)
+    lines = [f"⏱️ Full rerun: {times[-1]:.0f} ms (median {median(times):.0f} ms of last {len(times)})"]
+    for name, section_times in _history(page).items():
+        if name != "page":
+            lines.append(f"{name}: {section_times[-1]:.1f} ms")
+    st.sidebar.caption("  \n".join(lines))
+
+
+@contextmanager
+def section(name):
+    """Time a fragment body; its own caption shows how long the section took."""
+    started = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - started
+    observe(f"section.{name.lower().replace(' ', '_')}", elapsed)
+    _record(st.session_state.get("rerun_page", ""), name, elapsed)
+    st.caption(f"⏱️ {name} rerun: {elapsed * 1e3:.1f} ms")
@@ -0,0 +1,149 @@
+"""
+Process-wide LRU cache for calculate_metrics results.
+
+Streamlit reruns the whole page script on every widget change, so the same
+deal is often recomputed many times per session (and across sessions).
+Entries are keyed by a hash of the normalized inputs and stored frozen; every
+hit hands back a fresh DealMetrics (sharing only the read-only series array),
+so callers that mutate the result (e.g. generate_ai_verdict setting
+metrics["Grade"]) never touch the cached copy.
+
+Misses fall through to the persistent disk cache (disk_cache.py) before
+computing, so a restarted process serves deals it has already seen.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from calc_engine import BATCH_INPUTS, calculate_metrics, capex_events, tax_profile
+from disk_cache import load_metrics, store_metrics
+from instrumentation import increment
+
+DEFAULT_MAX_ENTRIES = 1024
+
+
+def _normalize(value):
+    if np.ndim(value):  # per-year path
+        return tuple(_normalize(v) for v in np.ravel(value).tolist())
+    value = float(value)
+    return 0.0 if value == 0 else value  # fold -0.0 into 0.0
+
+
+def input_key(*args, **kwargs):
+    """
+    Stable hash of the ten calculate_metrics inputs (positional or by name),
+    any capex events, tax profile and expense growth.
+    """
+    values = dict(zip(BATCH_INPUTS + ("capex", "tax", "expense_growth_rate"), args))
+    values.update(kwargs)
+    missing = [name for name in BATCH_INPUTS if name not in values]
+    if missing:
+        raise TypeError(f"missing inputs: {', '.join(missing)}")
+    normalized = [repr(_normalize(values[name])) for name in BATCH_INPUTS[:-1]]
+    normalized.append(repr(int(values["time_horizon"])))
+    events = capex_events(values.get("capex"))
+    if events:  # deals without capex keep their old keys
+        normalized.append(repr([(year, _normalize(amount), _normalize(uplift)) for year, amount, uplift in events]))
+    tax = tax_profile(values.get("tax"))
+    if tax is not None:
+        normalized.append("tax:" + repr([_normalize(field) for field in tax]))
+    expense_growth = _normalize(values.get("expense_growth_rate", 0.0))
+    if expense_growth:  # flat expenses keep their old keys
+        normalized.append("expense_growth:" + repr(expense_growth))
+    return hashlib.blake2b("|".join(normalized).encode(), digest_size=16).hexdigest()
+
+
+def _freeze(metrics):
+    frozen = metrics.copy()
+    frozen.series.setflags(write=False)  # writes through the cached array fail loudly
+    return frozen
+
+
+def _thaw(frozen):
+    return frozen.copy()
+
+
+class MetricsCache:
+    """
+    Bounded LRU of frozen DealMetrics with hit / miss / eviction counters.
+
+    Thread-safe, since Streamlit serves each session from its own thread.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, compute=calculate_metrics, persist=False):
+        self.max_entries = max_entries
+        self.compute = compute
+        self.persist = persist  # read / write through to disk_cache on misses
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+
+    def get(self, *args, compute=None, **kwargs):
+        """
+        calculate_metrics(*args, **kwargs), memoized; always returns a new DealMetrics.
+
+        `compute` overrides the function used on a miss (same signature and
+        results as calculate_metrics, e.g. a session's Projection.calculate).
+        """
+        key = input_key(*args, **kwargs)
+        with self._lock:
+            frozen = self._entries.get(key)
+            if frozen is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                increment("cache.hit")
+                return _thaw(frozen)
+            self.misses += 1
+        increment("cache.miss")
+
+        # Compute outside the lock; a concurrent miss on the same key just stores it twice
+        stored = load_metrics(key) if self.persist else None
+        if stored is not None:
+            self.disk_hits += 1
+            frozen = _freeze(stored)
+        else:
+            frozen = _freeze((compute or self.compute)(*args, **kwargs))
+            if self.persist:
+                store_metrics(key, frozen)
+        with self._lock:
+            self._entries[key] = frozen
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return _thaw(frozen)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.disk_hits = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_hits": self.disk_hits,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# One cache per process, shared by every Streamlit session
+METRICS_CACHE = MetricsCache(persist=True)
+
+
+def cached_calculate_metrics(*args, **kwargs):
+    """Drop-in replacement for calculate_metrics backed by METRICS_CACHE."""
+    return METRICS_CACHE.get(*args, **kwargs)
@@ -0,0 +1,129 @@
+"""
+Sensitivity grids and tornado ranking on top of the batch engine.
+
+A grid evaluates every combination of a few inputs in one vectorized call:
+each swept input gets its own array axis, so terms that depend on only some
+inputs (the annuity factor on rate x term, rent growth on rent x growth rate)
+are computed once per distinct value and broadcast across the rest.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from calc_engine import BATCH_INPUTS, _evaluate_batch, calculate_metrics_batch
+
+DEFAULT_METRICS = ("IRR (Total incl. Sale) (%)", "Cash-on-Cash Return (%)", "equity_multiple")
+
+# How far each input is pushed down / up for the tornado chart:
+# ("pct", x) moves the input by +/- x percent of its value, ("abs", x) by +/- x units
+DEFAULT_SWINGS = {
+    "purchase_price": ("pct", 10.0),
+    "monthly_rent": ("pct", 10.0),
+    "down_payment_pct": ("abs", 5.0),
+    "mortgage_rate": ("abs", 1.0),
+    "monthly_expenses": ("pct", 20.0),
+    "vacancy_rate": ("abs", 3.0),
+    "appreciation_rate": ("abs", 1.0),
+    "rent_growth_rate": ("abs", 1.0),
+}
+
+# Inputs that cannot go below zero when swung
+NON_NEGATIVE = {"purchase_price", "monthly_rent", "down_payment_pct", "mortgage_rate",
+                "monthly_expenses", "vacancy_rate", "mortgage_term", "time_horizon"}
+
+
+class SensitivityGrid(NamedTuple):
+    axes: dict       # input name -> 1-D array of swept values, in axis order
+    metrics: dict    # metric name -> array shaped (len(axis_0), len(axis_1), ...)
+
+
+class TornadoBar(NamedTuple):
+    input: str
+    low_value: float
+    high_value: float
+    metric_base: float    # metric at the base case
+    metric_low: float     # metric with the input at low_value
+    metric_high: float    # metric with the input at high_value
+    swing: float          # |metric_high - metric_low|
+
+
+def _base_columns(base_inputs):
+    missing = [name for name in BATCH_INPUTS if name not in base_inputs]
+    if missing:
+        raise KeyError(f"base_inputs missing: {', '.join(missing)}")
+    return {name: np.asarray(base_inputs[name], dtype=float) for name in BATCH_INPUTS}
+
+
+def sensitivity_grid(base_inputs, axes, metrics=DEFAULT_METRICS):
+    """
+    Evaluate `metrics` over the full grid spanned by `axes`.
+
+    `base_inputs` holds all ten calculate_metrics inputs by name; `axes` maps
+    some of them to the values to sweep (dict order = axis order). Returns a
+    SensitivityGrid whose metric arrays have one dimension per axis.
+    """
+    cols = _base_columns(base_inputs)
+    axis_values = {}
+    for position, (name, values) in enumerate(axes.items()):
+        if name not in cols:
+            raise KeyError(f"Unknown input: {name}")
+        values = np.asarray(values, dtype=float).ravel()
+        shape = [1] * len(axes)
+        shape[position] = len(values)
+        cols[name] = values.reshape(shape)
+        axis_values[name] = values
+    cols["time_horizon"] = cols["time_horizon"].astype(int)
+
+    results = _evaluate_batch(cols)
+    grid_shape = tuple(len(values) for values in axis_values.values())
+    return SensitivityGrid(
+        axes=axis_values,
+        metrics={name: np.broadcast_to(results[name], grid_shape) for name in metrics},
+    )
+
+
+def _swing_values(name, base_value, swing):
+    kind, amount = swing
+    delta = abs(base_value) * amount / 100.0 if kind == "pct" else amount
+    low, high = base_value - delta, base_value + delta
+    if name in NON_NEGATIVE:
+        low = max(low, 0.0)
+    if name in ("down_payment_pct", "vacancy_rate"):
+        high = min(high, 100.0)
+    return low, high
+
+
+def tornado(base_inputs, metric="IRR (Total incl. Sale) (%)", swings=None):
+    """
+    Rank inputs by how far `metric` moves when each is swung low / high.
+
+    The base case and all 2 * len(swings) scenarios run as one batch. `swings`
+    defaults to DEFAULT_SWINGS; returns TornadoBars sorted by swing, largest first.
+    """
+    swings = DEFAULT_SWINGS if swings is None else swings
+    base = {name: float(value) for name, value in _base_columns(base_inputs).items()}
+
+    names = list(swings)
+    scenarios = {name: np.full(2 * len(names) + 1, base[name]) for name in BATCH_INPUTS}
+    bounds = []
+    for i, name in enumerate(names):
+        low, high = _swing_values(name, base[name], swings[name])
+        scenarios[name][2 * i] = low
+        scenarios[name][2 * i + 1] = high
+        bounds.append((low, high))
+
+    values = calculate_metrics_batch(scenarios)[metric]
+    base_metric = float(values[-1])
+    bars = [
+        TornadoBar(
+            input=name,
+            low_value=low,
+            high_value=high,
+            metric_base=base_metric,
+            metric_low=float(values[2 * i]),
+            metric_high=float(values[2 * i + 1]),
+            swing=float(abs(values[2 * i + 1] - values[2 * i])),
+        )
+        for i, (name, (low, high)) in enumerate(zip(names, bounds))
+    ]
+    return sorted(bars, key=lambda bar: -bar.swing if np.isfinite(bar.swing) else np.inf)
@@ -0,0 +1,209 @@
+"""
+Monte Carlo simulation for appreciation, rent growth and vacancy.
+
+Each path draws a fresh (appreciation, rent growth, vacancy) triple for every
+year from a correlated normal centred on the deal's deterministic inputs
+(that year's value when an input is a per-year path).
+Paths are evaluated in vectorized chunks and folded into fixed-size streaming
+histograms, so memory stays bounded no matter how many paths are requested.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from amortization_engine import _monthly_payment, yearly_schedule
+from calc_engine import _growth_path, _per_year
+from irr_engine import CONVERGED, irr_batch
+
+DRIVERS = ("appreciation_rate", "rent_growth_rate", "vacancy_rate")
+
+# Year-over-year standard deviation of each driver, in percentage points
+DEFAULT_VOLATILITY = {"appreciation_rate": 4.0, "rent_growth_rate": 2.0, "vacancy_rate": 3.0}
+
+# Correlation between the drivers' yearly shocks, ordered as DRIVERS
+DEFAULT_CORRELATION = (
+    (1.0, 0.5, -0.3),
+    (0.5, 1.0, -0.4),
+    (-0.3, -0.4, 1.0),
+)
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+class StreamingHistogram:
+    """
+    Fixed-bin histogram per column, for percentiles over data seen in chunks.
+
+    The bin range is fixed from the first chunk (padded on both sides); later
+    values outside it are clamped into the edge bins. Memory is
+    O(columns * bins) regardless of how many values are added.
+    """
+
+    def __init__(self, n_columns=1, bins=2048, padding=0.5):
+        self.n_columns = n_columns
+        self.bins = bins
+        self.padding = padding
+        self.counts = np.zeros((n_columns, bins), dtype=np.int64)
+        self.lo = None
+        self.width = None
+        self.total = np.zeros(n_columns, dtype=np.int64)
+
+    def add(self, values):
+        """Add a (rows, n_columns) block (or 1-D block for a single column); NaNs are ignored."""
+        values = np.asarray(values, dtype=float).reshape(-1, self.n_columns)
+        if self.lo is None:
+            lo = np.nanmin(values, axis=0) if np.isfinite(values).any() else np.zeros(self.n_columns)
+            hi = np.nanmax(values, axis=0) if np.isfinite(values).any() else np.ones(self.n_columns)
+            lo, hi = np.nan_to_num(lo), np.nan_to_num(hi)
+            span = np.maximum(hi - lo, 1e-9)
+            self.lo = lo - self.padding * span
+            self.width = span * (1 + 2 * self.padding) / self.bins
+
+        finite = np.isfinite(values)
+        scaled = np.where(finite, (values - self.lo) / self.width, 0.0)
+        bin_index = np.clip(scaled, 0, self.bins - 1).astype(np.int64)
+        flat = (np.arange(self.n_columns) * self.bins + bin_index)[finite]
+        self.counts += np.bincount(flat, minlength=self.n_columns * self.bins).reshape(self.n_columns, self.bins)
+        self.total += finite.sum(axis=0)
+
+    def percentiles(self, qs):
+        """Approximate percentiles (0-100) per column; shape (len(qs), n_columns)."""
+        qs = np.asarray(qs, dtype=float)
+        out = np.full((len(qs), self.n_columns), np.nan)
+        if self.lo is None:
+            return out
+        cumulative = np.cumsum(self.counts, axis=1)
+        for col in range(self.n_columns):
+            if not self.total[col]:
+                continue
+            targets = qs / 100.0 * self.total[col]
+            idx = np.searchsorted(cumulative[col], targets, side="left").clip(0, self.bins - 1)
+            below = np.where(idx > 0, cumulative[col, idx - 1], 0)
+            in_bin = np.maximum(self.counts[col, idx], 1)
+            fraction = np.clip((targets - below) / in_bin, 0.0, 1.0)
+            out[:, col] = self.lo[col] + (idx + fraction) * self.width[col]
+        return out
+
+
+class SimulationResult(NamedTuple):
+    n_paths: int
+    percentiles: tuple               # percentile levels used for every band below
+    irr_total: dict                  # percentile -> total IRR (%)
+    equity_multiple: dict            # percentile -> equity multiple
+    probability_of_loss: float       # share of paths returning less cash than the down payment
+    irr_unsolved: int                # paths whose IRR could not be solved (excluded from IRR bands)
+    roi_fan: np.ndarray              # (len(percentiles), time_horizon) ROI % by year
+    mean_irr_total: float
+    mean_equity_multiple: float
+
+
+def _driver_paths(rng, n_paths, n_years, means, volatility, cholesky):
+    """Correlated per-year driver draws around (n_years, drivers) means, shape (n_paths, n_years) per driver."""
+    shocks = rng.standard_normal((n_paths, n_years, len(DRIVERS))) @ cholesky.T
+    draws = means[None, :, :] + volatility[None, None, :] * shocks
+    appreciation, rent_growth, vacancy = np.moveaxis(draws, -1, 0)
+    return np.maximum(appreciation, -99.0), np.maximum(rent_growth, -99.0), np.clip(vacancy, 0.0, 100.0)
+
+
+def simulate_metrics(purchase_price, monthly_rent, down_payment_pct, mortgage_rate, mortgage_term,
+                     monthly_expenses, vacancy_rate, appreciation_rate, rent_growth_rate, time_horizon,
+                     n_paths=20_000, volatility=None, correlation=None, seed=None,
+                     chunk_size=20_000, percentiles=DEFAULT_PERCENTILES, expense_growth_rate=0.0):
+    """
+    Simulate `n_paths` correlated driver paths for one deal.
+
+    Takes the same ten inputs as calculate_metrics; the appreciation, rent growth
+    and vacancy inputs (one rate or a per-year path) become the per-year
+    means; expense growth stays deterministic. `volatility` overrides
+    DEFAULT_VOLATILITY per driver, `correlation` is a 3x3 matrix ordered as
+    DRIVERS. Returns a SimulationResult with percentile bands for total IRR,
+    equity multiple and ROI by year, plus the probability of loss.
+    """
+    time_horizon = int(time_horizon)
+    if time_horizon < 1:
+        raise ValueError("time_horizon must be at least 1 year to simulate")
+
+    vol = dict(DEFAULT_VOLATILITY)
+    vol.update(volatility or {})
+    volatility = np.array([vol[name] for name in DRIVERS], dtype=float)
+    means = np.column_stack([np.broadcast_to(_per_year(rate, time_horizon), (time_horizon,))
+                             for rate in (appreciation_rate, rent_growth_rate, vacancy_rate)])
+    cholesky = np.linalg.cholesky(np.asarray(correlation if correlation is not None else DEFAULT_CORRELATION, dtype=float))
+    rng = np.random.default_rng(seed)
+
+    # ---- Deterministic pieces shared by every path
+    down_payment_amount = purchase_price * (down_payment_pct / 100.0)
+    loan_amount = purchase_price - down_payment_amount
+    monthly_rate = (mortgage_rate / 100.0) / 12.0
+    n_payments = int(mortgage_term * 12)
+    monthly_payment = _monthly_payment(np.array([loan_amount]), np.array([monthly_rate]), np.array([n_payments]))[0]
+    schedule = yearly_schedule(loan_amount, monthly_rate, n_payments, monthly_payment, time_horizon)
+    annual_expenses = monthly_expenses * 12.0
+    if np.any(expense_growth_rate):
+        annual_expenses = _growth_path(annual_expenses, 1 + _per_year(expense_growth_rate, time_horizon) / 100.0, time_horizon)
+    fixed_costs = annual_expenses + schedule.payment  # mortgage stops after the term
+    exit_balance = float(schedule.balance[-1])
+
+    irr_hist = StreamingHistogram()
+    multiple_hist = StreamingHistogram()
+    roi_hist = StreamingHistogram(n_columns=time_horizon)
+    losses = unsolved = 0
+    irr_sum = multiple_sum = 0.0
+    irr_count = 0
+    warm_start = None
+
+    for start in range(0, n_paths, chunk_size):
+        m = min(chunk_size, n_paths - start)
+        appreciation, rent_growth, vacancy = _driver_paths(rng, m, time_horizon, means, volatility, cholesky)
+
+        # Rent in year t grows by the previous years' draws; year 1 is the quoted rent
+        growth = np.ones((m, time_horizon))
+        growth[:, 1:] = 1 + rent_growth[:, :-1] / 100.0
+        monthly_rents = monthly_rent * np.cumprod(growth, axis=1)
+        cash_flows = monthly_rents * (1 - vacancy / 100.0) * 12.0 - fixed_costs
+
+        values = purchase_price * np.cumprod(1 + appreciation / 100.0, axis=1)
+        sale_value = values[:, -1] - exit_balance  # net of the loan payoff
+
+        flows = np.empty((m, time_horizon + 1))
+        flows[:, 0] = -down_payment_amount
+        flows[:, 1:] = cash_flows
+        flows[:, -1] += sale_value
+
+        result = irr_batch(flows, guess=warm_start)
+        solved = result.status == CONVERGED
+        irr_pct = np.where(solved, result.rate * 100.0, np.nan)
+        if solved.any():
+            warm_start = float(np.median(result.rate[solved]))
+
+        total_received = flows[:, 1:].sum(axis=1)
+        if down_payment_amount:
+            multiple = total_received / down_payment_amount
+            roi = (np.cumsum(cash_flows, axis=1) + values - purchase_price) / down_payment_amount * 100.0
+        else:
+            multiple = np.zeros(m)
+            roi = np.zeros((m, time_horizon))
+
+        irr_hist.add(irr_pct)
+        multiple_hist.add(multiple)
+        roi_hist.add(roi)
+        losses += int((total_received < down_payment_amount).sum())
+        unsolved += int((~solved).sum())
+        irr_sum += float(np.nansum(irr_pct))
+        irr_count += int(solved.sum())
+        multiple_sum += float(multiple.sum())
+
+    qs = tuple(percentiles)
+    irr_bands = irr_hist.percentiles(qs)[:, 0]
+    multiple_bands = multiple_hist.percentiles(qs)[:, 0]
+    return SimulationResult(
+        n_paths=n_paths,
+        percentiles=qs,
+        irr_total={q: round(float(v), 2) for q, v in zip(qs, irr_bands)},
+        equity_multiple={q: round(float(v), 2) for q, v in zip(qs, multiple_bands)},
+        probability_of_loss=losses / n_paths if n_paths else 0.0,
+        irr_unsolved=unsolved,
+        roi_fan=roi_hist.percentiles(qs),
+        mean_irr_total=round(irr_sum / irr_count, 2) if irr_count else float("nan"),
+        mean_equity_multiple=round(multiple_sum / n_paths, 2) if n_paths else 0.0,
+    )
@@ -0,0 +1,14 @@
+import numpy as np
+
+from calc_engine import calculate_metrics
+from projection_engine import Projection
+
+DEAL = (300000, 2000, 20, 6.5, 30, 300, 5, 3, 3)
+
+
+def test_zero_horizon_after_tax_matches_pre_tax_shape():
+    for metrics in (calculate_metrics(*DEAL, 0, tax=True), Projection().calculate(*DEAL, 0, tax=True)):
+        assert np.isnan(metrics["IRR (Total incl. Sale) (%)"])
+        assert np.isnan(metrics["After-Tax IRR (%)"])
+        assert metrics["After-Tax Cash Flow"] == []
+        assert metrics["Depreciation $ (by year)"] == []
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bulk_screen import run
+
+pytest.importorskip("pyarrow")
+
+
+def _listings(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "listing_id": np.arange(n),
+        "purchase_price": rng.uniform(100_000, 500_000, n),
+        "monthly_rent": rng.uniform(1_000, 3_000, n),
+        "down_payment_pct": 20.0,
+        "mortgage_rate": 6.5,
+        "mortgage_term": 30,
+        "monthly_expenses": 300.0,
+        "vacancy_rate": 5.0,
+        "appreciation_rate": 3.0,
+        "rent_growth_rate": 3.0,
+        "time_horizon": 10,
+    })
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parquet_output_with_bad_cell_in_later_chunk(tmp_path, workers):
+    listings = _listings(2_500).astype({"monthly_rent": object})
+    listings.loc[1_500, "monthly_rent"] = "abc"  # second chunk; the first one is all numeric
+    listings.loc[1_600, "listing_id"] = None     # blank passthrough cell
+    source, output = tmp_path / "listings.csv", tmp_path / "results.parquet"
+    listings.to_csv(source, index=False)
+
+    rows, _ = run(str(source), str(output), workers=workers, chunk_size=1_000, progress=False, tax={})
+
+    result = pd.read_parquet(output)
+    assert rows == len(result) == 2_500
+    assert result["monthly_rent"].dtype == float
+    assert np.isnan(result.loc[1_500, "monthly_rent"])
+    assert not result.loc[1_500, "valid_input"]
+    assert np.isnan(result.loc[1_500, "IRR (Total incl. Sale) (%)"])
+    assert result["valid_input"].sum() == 2_499
+    assert result.loc[0, "Grade"] in ("A", "B", "C", "D", "F")
+
+
+def test_after_tax_screen_survives_a_chunk_with_no_valid_rows(tmp_path):
+    listings = _listings(2_000).astype({"monthly_rent": object})
+    listings.loc[1_000:, "monthly_rent"] = "abc"  # the whole second chunk is invalid
+    source, output = tmp_path / "listings.csv", tmp_path / "results.parquet"
+    listings.to_csv(source, index=False)
+
+    rows, _ = run(str(source), str(output), workers=1, chunk_size=1_000, progress=False, tax={})
+
+    result = pd.read_parquet(output)
+    assert rows == len(result) == 2_000
+    assert result["valid_input"].sum() == 1_000
+    assert result.loc[1_000:, "After-Tax IRR (%)"].isna().all()
+    assert result.loc[:999, "After-Tax IRR (%)"].notna().all()
@@ -0,0 +1,24 @@
+import disk_cache
+from disk_cache import DiskCache, load_metrics, store_metrics
+
+
+def _cache(path, engine_file):
+    # Different source files stand in for two app versions sharing one SQLite file
+    return DiskCache(str(path), sources={"metrics": (engine_file,)})
+
+
+def test_entry_written_under_another_version_is_a_miss(tmp_path, monkeypatch):
+    path = tmp_path / "cache.sqlite"
+    current = _cache(path, "calc_engine.py")
+    older = _cache(path, "irr_engine.py")  # still running, so it writes after current was opened
+
+    older.put("metrics", "deal", b"stale")
+    assert current.get("metrics", "deal") is None
+    assert older.get("metrics", "deal") == b"stale"
+
+    monkeypatch.setattr(disk_cache, "DISK_CACHE", older)
+    store_metrics("deal", {"IRR": 1.0})
+    monkeypatch.setattr(disk_cache, "DISK_CACHE", current)
+    assert load_metrics("deal") is None
+    store_metrics("deal", {"IRR": 2.0})
+    assert load_metrics("deal") == {"IRR": 2.0}
@@ -0,0 +1,20 @@
+import numpy as np
+
+from irr_engine import CONVERGED, irr_batch, irr_warm
+
+# Two-year operational flows of the benchmark deal: the root (about -82%) is where Newton used to
+# converge onto a bracket end and then bisect for ~30 more steps
+DEEP_NEGATIVE = [-60000.0, 996.44, 1680.44]
+
+
+def test_batch_accepts_newton_converging_on_a_bracket_end():
+    result = irr_batch([DEEP_NEGATIVE])
+    assert result.status[0] == CONVERGED
+    assert result.iterations[0] < 10
+    assert abs(result.rate[0] - (-0.8241365403833406)) < 1e-12
+
+
+def test_warm_matches_batch_when_newton_overshoots_minus_100():
+    rate, status, _ = irr_warm(DEEP_NEGATIVE, 0.1)
+    assert status == CONVERGED
+    assert np.isclose(rate, irr_batch([DEEP_NEGATIVE]).rate[0], rtol=0, atol=1e-12)
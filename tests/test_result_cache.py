@@ -0,0 +1,17 @@
+from calc_engine import TaxProfile
+from result_cache import MetricsCache
+
+DEAL = (300000, 2000, 20, 6.5, 30, 300, 5, 3, 3, 10)
+
+
+def test_cached_after_tax_series_cannot_be_mutated():
+    cache = MetricsCache()
+    first = cache.get(*DEAL, tax=TaxProfile())
+    expected = list(first["After-Tax Cash Flow"])
+    first["After-Tax Cash Flow"].append(999)
+
+    hit = cache.get(*DEAL, tax=TaxProfile())
+    assert cache.hits == 1
+    assert hit["After-Tax Cash Flow"] == expected
+    hit["Depreciation $ (by year)"][0] = -1.0
+    assert cache.get(*DEAL, tax=TaxProfile())["Depreciation $ (by year)"][0] != -1.0